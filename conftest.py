@@ -0,0 +1,2 @@
+# conftest.py
+# Makes the repository root importable (`src.core...`) when running pytest from it.
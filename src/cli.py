@@ -0,0 +1,307 @@
+# cli.py
+"""
+Headless entry point for batch / CI builds (no Qt import).
+
+    python -m src.cli build --profile NAME
+    python -m src.cli build --project PATH --versions "UE 5.4,UE 5.5" --out DIR
+    python -m src.cli batch --profiles A,B   (or --all)
+
+Progress is streamed to stdout as JSON lines ({"type": "log" | "progress" | "batch" | "result", ...});
+diagnostics go to stderr.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import signal
+import sys
+import threading
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Optional, Sequence
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1  # the build itself failed
+EXIT_USAGE = 2  # bad arguments (argparse uses it too)
+EXIT_CONFIG = 3  # unknown profile / version, missing project or 7-Zip
+EXIT_CANCELED = 130  # interrupted (Ctrl+C / SIGTERM)
+
+logger = logging.getLogger(__name__)
+
+
+class JsonLinesOutput:
+    """Thread-safe JSON-lines writer: build callbacks may fire from worker threads."""
+
+    def __init__(self, stream=None):
+        self._stream = stream or sys.stdout
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def emit(self, kind: str, **fields) -> None:
+        line = json.dumps({"type": kind, **fields}, ensure_ascii=False)
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self._stream.write(line + "\n")
+                self._stream.flush()
+            except BrokenPipeError:
+                # reader went away (e.g. piped into `head`): keep building, stop writing
+                self._closed = True
+
+
+class ConfigError(Exception):
+    """Invalid profile / arguments that only show up once resolved (exit code EXIT_CONFIG)."""
+
+
+# --------------------------- Build request --------------------------- #
+
+def _split_list(values: Optional[Sequence[str]]) -> list[str]:
+    """Accept both repeated flags and comma-separated values."""
+    return [v.strip() for raw in values or () for v in raw.split(",") if v.strip()]
+
+
+def _resolve_versions(wanted: Sequence[str]) -> list[tuple[str, str, str]]:
+    """Map version ids or labels ("ue54", "UE 5.4", "5.4") to catalog selections."""
+    from src.core.profiles import load_versions_catalog
+
+    catalog = load_versions_catalog()
+    out: list[tuple[str, str, str]] = []
+    for token in wanted:
+        key = token.lower().replace(" ", "")
+        match = next((v for v in catalog
+                      if key in (v.id.lower(), v.label.lower().replace(" ", ""),
+                                 v.label.lower().replace("ue", "").strip())), None)
+        if match is None:
+            raise ConfigError(f"Unknown version '{token}' (catalog: {', '.join(v.label for v in catalog)})")
+        out.append((match.id, match.label, match.engine_path))
+    return out
+
+
+def build_kwargs_from_args(args: argparse.Namespace) -> dict:
+    """Keyword arguments for build_zip_set from a profile and/or explicit flags (flags win)."""
+    from src.core.batch import profile_build_kwargs, validate_build_kwargs
+    from src.core.compression_presets import compression_from_config
+    from src.core.config import get_build_concurrency, load_app_config, resolve_seven_zip_path
+
+    cfg = load_app_config()
+    if args.profile:
+        kwargs = profile_build_kwargs(args.profile, cfg)
+    else:
+        workers, disk = get_build_concurrency(cfg)
+        seven_zip = resolve_seven_zip_path(cfg)
+        kwargs = dict(project_root=None, out_dir=None, pattern="{project}_{ueversion}", selections=[],
+                      seven_zip=seven_zip if seven_zip.exists() else None, excludes=None,
+                      use_ignore_files=bool(cfg.get("use_ignore_files", False)), plugins_to_strip=set(),
+                      max_workers=workers, disk_parallelism=disk,
+                      incremental=bool(cfg.get("incremental_build", True)),
+                      compression=compression_from_config(cfg),
+                      debug_memory=bool(cfg.get("debug_memory_stats", False)))
+
+    if args.project:
+        kwargs["project_root"] = Path(args.project)
+    if args.out:
+        kwargs["out_dir"] = Path(args.out)
+    if args.pattern:
+        kwargs["pattern"] = args.pattern
+    if args.versions:
+        kwargs["selections"] = _resolve_versions(_split_list(args.versions))
+    kwargs["plugins_to_strip"] |= set(_split_list(args.strip_plugin))
+    if args.exclude:
+        kwargs["excludes"] = [*(kwargs["excludes"] or ()), *args.exclude]
+    _apply_common_flags(args, kwargs)
+    validate_build_kwargs(kwargs)
+    kwargs["out_dir"].mkdir(parents=True, exist_ok=True)
+    return kwargs
+
+
+def _apply_common_flags(args: argparse.Namespace, kwargs: dict) -> None:
+    """Flags shared by `build` and `batch`."""
+    from src.core.compression_presets import PRESET_NAMES, preset_settings
+
+    if args.seven_zip:
+        seven_zip = Path(args.seven_zip)
+        if not seven_zip.exists():
+            raise ConfigError(f"7-Zip path not found: {seven_zip}")
+        kwargs["seven_zip"] = seven_zip
+    elif args.no_7z:
+        kwargs["seven_zip"] = None
+    if args.use_ignore_files:
+        kwargs["use_ignore_files"] = True
+    if args.workers:
+        kwargs["max_workers"] = args.workers
+    if args.no_incremental:
+        kwargs["incremental"] = False
+    if args.force:
+        kwargs["force"] = True
+    compression = kwargs["compression"]
+    if args.no_cache:
+        compression = replace(compression, cache=None)
+    if args.preset:
+        if args.preset not in PRESET_NAMES:
+            raise ConfigError(f"Unknown compression preset: {args.preset}")
+        compression = compression.with_codec(preset_settings(args.preset))
+    if args.shards:
+        compression = replace(compression, shards=args.shards)
+    if args.shard_by:
+        compression = replace(compression, shard_by=args.shard_by)
+    kwargs["compression"] = compression
+    if args.debug_memory:
+        kwargs["debug_memory"] = True
+
+
+# --------------------------- Commands ------------------------------ #
+
+def _install_cancel_handlers(cancel: threading.Event) -> None:
+    """Ctrl+C / SIGTERM request a cooperative cancel (the build stops at its next check)."""
+
+    def _handler(_signum, _frame):
+        cancel.set()
+
+    signal.signal(signal.SIGINT, _handler)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, _handler)
+
+
+def cmd_build(args: argparse.Namespace) -> int:
+    output = JsonLinesOutput()
+    try:
+        kwargs = build_kwargs_from_args(args)
+    except (ConfigError, FileNotFoundError, ValueError) as e:
+        output.emit("result", status="config_error", message=str(e))
+        return EXIT_CONFIG
+
+    # imported late: keeps --help and argument errors instant
+    from src.core.builder import build_zip_set
+
+    cancel = threading.Event()
+    _install_cancel_handlers(cancel)
+    try:
+        outputs = build_zip_set(
+            **kwargs,
+            on_log=lambda msg: output.emit("log", message=msg),
+            on_progress=lambda _percent: None,  # carried by the progress events
+            on_event=lambda event: output.emit("progress", **event.to_dict()),
+            on_check_cancel=cancel.is_set,
+        )
+    except RuntimeError as e:
+        # Convention: builder raises RuntimeError("Canceled") on cancel
+        if "Canceled" in str(e):
+            output.emit("result", status="canceled")
+            return EXIT_CANCELED
+        output.emit("result", status="failed", message=str(e))
+        return EXIT_FAILED
+    except Exception as e:
+        logger.exception("Build failed")
+        output.emit("result", status="failed", message=f"{type(e).__name__}: {e}")
+        return EXIT_FAILED
+    output.emit("result", status="ok", outputs=[str(p) for p in outputs])
+    return EXIT_OK
+
+
+def cmd_batch(args: argparse.Namespace) -> int:
+    from src.core.batch import BatchJob, get_batch_concurrency, profile_build_kwargs, validate_build_kwargs
+    from src.core.config import load_app_config
+    from src.core.profiles import list_profile_names
+
+    output = JsonLinesOutput()
+    names = list_profile_names() if args.all else _split_list(args.profiles)
+    if not names:
+        output.emit("result", status="config_error", message="No profile to build")
+        return EXIT_CONFIG
+    cfg = load_app_config()
+    jobs: list[BatchJob] = []
+    try:
+        for name in names:
+            try:
+                kwargs = profile_build_kwargs(name, cfg)
+                _apply_common_flags(args, kwargs)
+                validate_build_kwargs(kwargs)
+            except ValueError as e:
+                if not args.all:
+                    raise
+                # --all: profiles that are not set up (e.g. the placeholder default) are skipped
+                output.emit("log", job=name, message=f"Skipped: {e}")
+                continue
+            jobs.append(BatchJob(name=name, kwargs=kwargs))
+    except (ConfigError, FileNotFoundError, ValueError) as e:
+        output.emit("result", status="config_error", message=str(e))
+        return EXIT_CONFIG
+
+    from src.core.batch import BuildBudget, run_batch
+
+    cancel = threading.Event()
+    _install_cancel_handlers(cancel)
+    results = run_batch(
+        jobs,
+        concurrency=args.concurrency or get_batch_concurrency(cfg),
+        budget=BuildBudget(),
+        on_log=lambda job, msg: output.emit("log", job=job, message=msg),
+        on_event=lambda job, event: output.emit("progress", job=job, **event.to_dict()),
+        on_status=lambda status: output.emit("batch", **asdict(status)),
+        on_check_cancel=cancel.is_set,
+    )
+    for r in results:
+        output.emit("result", job=r.name, status=r.status, outputs=[str(p) for p in r.outputs],
+                    message=r.message, seconds=round(r.seconds, 3))
+    if cancel.is_set():
+        return EXIT_CANCELED
+    return EXIT_OK if all(r.status == "ok" for r in results) else EXIT_FAILED
+
+
+def _add_common_flags(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--use-ignore-files", action="store_true", help="also apply the project's .gitignore/.p4ignore")
+    p.add_argument("--seven-zip", help="7-Zip executable (default: app config, else built-in writer)")
+    p.add_argument("--no-7z", action="store_true", help="always use the built-in writer")
+    p.add_argument("--workers", type=int, help="compression / assembly threads (default: app config)")
+    p.add_argument("--no-incremental", action="store_true", help="rebuild the base zip from scratch")
+    p.add_argument("--force", action="store_true", help="rebuild outputs even if they are up to date")
+    p.add_argument("--no-cache", action="store_true", help="do not use the compressed-entry cache")
+    p.add_argument("--preset", help="compression preset: fast, balanced, release or auto (default: the profile's)")
+    p.add_argument("--shards", type=int, help="7-Zip processes compressing the base zip at once (default: app config)")
+    p.add_argument("--shard-by", choices=("size", "folder"), help="split the files into size-balanced bins or by "
+                                                                  "top-level folder (default: app config)")
+    p.add_argument("--debug-memory", action="store_true",
+                   help="log read buffers allocated / reused and the peak RSS after each build")
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="UE Fab zip builder (headless)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="build the version zips of a profile or of explicit arguments")
+    b.add_argument("--profile", help="profile name from configs/profiles")
+    b.add_argument("--project", help="UE project folder (overrides the profile)")
+    b.add_argument("--versions", action="append", help='versions by id or label, e.g. "UE 5.4,ue55"')
+    b.add_argument("--out", help="output folder (overrides the profile)")
+    b.add_argument("--pattern", help="zip name pattern, e.g. {project}_{ueversion}")
+    b.add_argument("--strip-plugin", action="append", help="plugin(s) to remove from the .uproject")
+    b.add_argument("--exclude", action="append", help="extra exclude rule (gitignore syntax), repeatable")
+    _add_common_flags(b)
+    b.set_defaults(func=cmd_build)
+
+    m = sub.add_parser("batch", help="build several profiles sharing one CPU / disk budget")
+    group = m.add_mutually_exclusive_group(required=True)
+    group.add_argument("--profiles", action="append", help='profile names, e.g. "A,B" (repeatable)')
+    group.add_argument("--all", action="store_true", help="every profile in configs/profiles that is set up")
+    m.add_argument("--concurrency", type=int, help="builds in flight (default: app config, 2)")
+    _add_common_flags(m)
+    m.set_defaults(func=cmd_batch)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    # stdout carries the JSON lines only
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr,
+                        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    args = make_parser().parse_args(argv)
+    if args.command == "build" and not (args.profile or args.project):
+        print("build: --profile or --project is required", file=sys.stderr)
+        return EXIT_USAGE
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+# batch.py
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Sequence
+
+from src.core.compression_presets import PRESET_NAMES
+from src.core.progress import ProgressEvent
+from src.core.utils import human_size
+
+logger = logging.getLogger(__name__)
+
+# Builds running at once: one can compress (CPU) while another scans or assembles (disk)
+DEFAULT_BATCH_CONCURRENCY = 2
+
+# How often a build waiting for a budget slot checks for cancellation
+_BUDGET_POLL_INTERVAL = 0.1
+
+# Stages measured in bytes (the scan counts files)
+_BYTE_STAGES = frozenset({"compress", "assemble", "verify"})
+
+
+class ProfileError(ValueError):
+    """A profile cannot be turned into a build (missing, no project, no version...)."""
+
+
+# --------------------------- Shared budget -------------------------- #
+
+@dataclass
+class BuildBudget:
+    """
+    Global CPU / IO budget shared by the builds of a batch.
+    "cpu" covers compression (it already uses every core), "io" covers the scan and the per-version
+    assembly / verification (disk bound). A build holds one slot of the matching kind per stage, so
+    with one slot each, project B compresses while project A copies its version zips.
+    """
+    cpu_slots: int = 1
+    io_slots: int = 1
+
+    def __post_init__(self):
+        self._slots = {"cpu": threading.Semaphore(max(1, self.cpu_slots)),
+                       "io": threading.Semaphore(max(1, self.io_slots))}
+
+    @contextmanager
+    def hold(self, kind: str, on_check_cancel: Optional[Callable[[], bool]] = None) -> Iterator[None]:
+        """Hold one `kind` slot for the duration of a stage; waiting stays cancellable."""
+        slot = self._slots[kind]
+        while not slot.acquire(timeout=_BUDGET_POLL_INTERVAL):
+            if on_check_cancel and on_check_cancel():
+                raise RuntimeError("Canceled")
+        try:
+            yield
+        finally:
+            slot.release()
+
+
+# --------------------------- Profiles -> jobs ----------------------- #
+
+def profile_build_kwargs(name: str, cfg: dict) -> dict:
+    """
+    build_zip_set keyword arguments for a saved profile (callbacks excluded).
+    `cfg` is the app config (7-Zip path, concurrency, incremental / ignore-file switches, entry cache,
+    auto compression target, base zip shards).
+    Raises ProfileError when the profile is missing, incomplete or names an unknown compression preset.
+    """
+    from src.core.compression_presets import compression_from_config
+    from src.core.config import get_build_concurrency, resolve_seven_zip_path
+    from src.core.path_helpers import profile_path
+    from src.core.profiles import catalog_by_id, load_profile, load_versions_catalog
+
+    if not profile_path(name).exists():
+        raise ProfileError(f"Profile not found: {name}")
+    prof = load_profile(name)
+    if prof.compression_preset not in PRESET_NAMES:
+        raise ProfileError(f"Unknown compression preset: {prof.compression_preset}")
+    by_id = catalog_by_id(load_versions_catalog())
+    selections = [(by_id[ref.version_id].id, by_id[ref.version_id].label,
+                   ref.engine_path or by_id[ref.version_id].engine_path)
+                  for ref in prof.versions if ref.checked and ref.version_id in by_id]
+    seven_zip = resolve_seven_zip_path(cfg)
+    workers, disk = get_build_concurrency(cfg)
+    return dict(
+        project_root=Path(prof.template_dir) if prof.template_dir else None,
+        out_dir=Path(prof.output_dir) if prof.output_dir else None,
+        pattern=prof.zip_pattern or "{project}_{ueversion}",
+        selections=selections,
+        # not found: the builder falls back to its own multi-core writer
+        seven_zip=seven_zip if seven_zip.exists() else None,
+        # root entries ticked in the profile are anchored, as in the GUI
+        excludes=[f"/{n}" for n in prof.root_excludes or ()] or None,
+        use_ignore_files=bool(cfg.get("use_ignore_files", False)),
+        plugins_to_strip=set(prof.plugins_to_strip or ()),
+        max_workers=workers,
+        disk_parallelism=disk,
+        incremental=bool(cfg.get("incremental_build", True)),
+        compression=compression_from_config(cfg, prof.compression_preset),
+        debug_memory=bool(cfg.get("debug_memory_stats", False)),
+    )
+
+
+def get_batch_concurrency(cfg: dict) -> int:
+    """Builds in flight for a batch, from the app config."""
+    try:
+        return max(1, int(cfg.get("batch_concurrency", DEFAULT_BATCH_CONCURRENCY)))
+    except (TypeError, ValueError):
+        return DEFAULT_BATCH_CONCURRENCY
+
+
+def validate_build_kwargs(kwargs: dict) -> None:
+    """Raise ProfileError if a build request cannot start (checked before queuing it)."""
+    project, out = kwargs.get("project_root"), kwargs.get("out_dir")
+    if project is None or not project.is_dir():
+        raise ProfileError(f"Invalid project directory: {project}")
+    if out is None:
+        raise ProfileError("No output directory")
+    if not kwargs.get("selections"):
+        raise ProfileError("No version selected")
+
+
+# --------------------------- Scheduler ------------------------------ #
+
+@dataclass
+class BatchJob:
+    """One queued build: a display name (usually the profile) and its build_zip_set arguments."""
+    name: str
+    kwargs: dict
+
+
+@dataclass
+class BatchResult:
+    name: str
+    status: str  # "ok" | "failed" | "canceled"
+    outputs: list[Path] = field(default_factory=list)
+    message: str = ""
+    seconds: float = 0.0
+
+
+@dataclass(frozen=True)
+class BatchStatus:
+    """Aggregate view over the whole batch."""
+    jobs_total: int
+    jobs_done: int
+    percent: float  # mean of the jobs' percentages
+    bytes_done: int  # compressed + copied + verified bytes, all jobs
+    rate: float  # aggregate bytes/s since the batch started
+
+
+def run_batch(
+        jobs: Sequence[BatchJob],
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        budget: Optional[BuildBudget] = None,
+        on_log: Optional[Callable[[str, str], None]] = None,
+        on_event: Optional[Callable[[str, ProgressEvent], None]] = None,
+        on_status: Optional[Callable[[BatchStatus], None]] = None,
+        on_check_cancel: Optional[Callable[[], bool]] = None,
+) -> list[BatchResult]:
+    """
+    Build several profiles with `concurrency` builds in flight sharing one BuildBudget, so the
+    CPU-bound stage of one project overlaps the disk-bound stages of another.
+    A failing job does not stop the others; cancellation stops all of them.
+    Returns one BatchResult per job, in the order of `jobs`.
+    """
+    from src.core.builder import build_zip_set
+
+    budget = budget or BuildBudget()
+    lock = threading.Lock()
+    started = time.perf_counter()
+    percents = {job.name: 0.0 for job in jobs}
+    last_pos: dict[str, tuple[str, int]] = {}
+    bytes_done = 0
+    jobs_done = 0
+
+    def _status() -> BatchStatus:
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        return BatchStatus(jobs_total=len(jobs), jobs_done=jobs_done,
+                           percent=sum(percents.values()) / max(1, len(jobs)),
+                           bytes_done=bytes_done, rate=bytes_done / elapsed)
+
+    def _on_event(name: str, event: ProgressEvent) -> None:
+        nonlocal bytes_done
+        with lock:
+            percents[name] = event.percent
+            stage, done = last_pos.get(name, ("", 0))
+            if event.stage in _BYTE_STAGES:
+                bytes_done += event.stage_done - (done if stage == event.stage else 0)
+            last_pos[name] = (event.stage, event.stage_done)
+            status = _status()
+        if on_event:
+            on_event(name, event)
+        if on_status:
+            on_status(status)
+
+    def _run(job: BatchJob) -> BatchResult:
+        nonlocal jobs_done
+        t0 = time.perf_counter()
+        log = (lambda msg: on_log(job.name, msg)) if on_log else (lambda msg: None)
+        try:
+            outputs = build_zip_set(
+                **job.kwargs,
+                budget=budget,
+                on_log=log,
+                on_progress=lambda _percent: None,
+                on_event=lambda event: _on_event(job.name, event),
+                on_check_cancel=on_check_cancel,
+            )
+            result = BatchResult(job.name, "ok", outputs=outputs)
+        except RuntimeError as e:
+            # Convention: builder raises RuntimeError("Canceled") on cancel
+            status = "canceled" if "Canceled" in str(e) else "failed"
+            result = BatchResult(job.name, status, message=str(e))
+        except Exception as e:
+            logger.exception("Batch job %s failed", job.name)
+            result = BatchResult(job.name, "failed", message=f"{type(e).__name__}: {e}")
+        result.seconds = time.perf_counter() - t0
+        with lock:
+            jobs_done += 1
+            percents[job.name] = 100.0
+            status = _status()
+        log(f"{result.status} in {result.seconds:.1f} s" + (f": {result.message}" if result.message else ""))
+        if on_status:
+            on_status(status)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch") as pool:
+        results = list(pool.map(_run, jobs))
+
+    final = _status()
+    if on_log:
+        ok = sum(1 for r in results if r.status == "ok")
+        on_log("batch", f"{ok}/{len(results)} build(s) ok, {human_size(final.bytes_done)} processed "
+                        f"in {time.perf_counter() - started:.1f} s ({human_size(final.rate)}/s)")
+    return results
@@ -0,0 +1,207 @@
+# buffers.py
+from __future__ import annotations
+
+import mmap
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from src.core.utils import human_size
+
+# Free buffers kept per size; more are allocated when needed and dropped on release
+_MAX_FREE_PER_POOL = 32
+
+# Files at least this large are read through mmap by the built-in writer (0 = never)
+DEFAULT_MMAP_THRESHOLD = 4 * 1024 * 1024
+
+
+@dataclass
+class PoolStats:
+    allocated: int = 0  # bytearrays created
+    allocated_bytes: int = 0
+    reused: int = 0  # acquisitions served from the free list
+
+
+class BufferPool:
+    """
+    Preallocated bytearrays of one size, handed out with acquire() and given back with release(),
+    so the read paths fill the same memory again (readinto) instead of allocating per chunk.
+    Thread-safe.
+    """
+
+    def __init__(self, size: int, max_free: int = _MAX_FREE_PER_POOL):
+        self.size = size
+        self.max_free = max_free
+        self.stats = PoolStats()
+        self._free: list[bytearray] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bytearray:
+        with self._lock:
+            if self._free:
+                self.stats.reused += 1
+                return self._free.pop()
+            self.stats.allocated += 1
+            self.stats.allocated_bytes += self.size
+        return bytearray(self.size)
+
+    def release(self, buf: bytearray) -> None:
+        with self._lock:
+            if len(self._free) < self.max_free:
+                self._free.append(buf)
+
+
+_pools: dict[int, BufferPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(size: int) -> BufferPool:
+    """The process-wide pool of `size`-byte buffers."""
+    with _pools_lock:
+        pool = _pools.get(size)
+        if pool is None:
+            pool = _pools[size] = BufferPool(size)
+        return pool
+
+
+def iter_readinto(src: BinaryIO, size: int, limit: Optional[int] = None) -> Iterator[memoryview]:
+    """
+    Read src in chunks of up to `size` bytes into one pooled buffer (at most `limit` bytes in total).
+    Each yielded view is only valid until the next one is requested: consume it (write, hash,
+    compress) before moving on.
+    """
+    pool = get_pool(size)
+    buf = pool.acquire()
+    try:
+        view = memoryview(buf)
+        remaining = limit
+        while remaining is None or remaining > 0:
+            want = size if remaining is None else min(size, remaining)
+            n = src.readinto(view[:want])
+            if not n:
+                break
+            if remaining is not None:
+                remaining -= n
+            yield view[:n]
+        view.release()
+    finally:
+        pool.release(buf)
+
+
+def readinto_full(src: BinaryIO, buf: bytearray) -> int:
+    """Fill buf from src (short only at the end of src); returns the number of bytes read."""
+    view = memoryview(buf)
+    filled = 0
+    while filled < len(buf):
+        n = src.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    view.release()
+    return filled
+
+
+# --------------------------- Memory-mapped reads -------------------- #
+
+def map_view(path: Path, size: int, threshold: int = DEFAULT_MMAP_THRESHOLD) -> Optional[memoryview]:
+    """
+    Read-only mapping of a file of at least `threshold` bytes, as a memoryview: its slices go to zlib,
+    hashlib or the output without a copy, and the kernel does the readahead.
+    None when the file is smaller, cannot be mapped (special or network file, no address space left...)
+    or no longer has the `size` it was scanned with: read it the usual way then.
+    The file is unmapped once the view and every slice of it are released.
+    """
+    if threshold <= 0 or size < threshold:
+        return None
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size != size:
+                return None
+            mapping = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, OverflowError):
+        return None
+    if hasattr(mapping, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+        mapping.madvise(mmap.MADV_SEQUENTIAL)
+    return memoryview(mapping)
+
+
+@contextmanager
+def mapped_file(path: Path, size: int, threshold: int = DEFAULT_MMAP_THRESHOLD) -> Iterator[Optional[memoryview]]:
+    """map_view() unmapped on exit (or when collected, if a slice is still referenced after an abort)."""
+    view = map_view(path, size, threshold)
+    try:
+        yield view
+    finally:
+        if view is not None:
+            mapping = view.obj
+            view.release()
+            try:
+                mapping.close()
+            except BufferError:
+                pass
+
+
+# --------------------------- Debug instrumentation ------------------- #
+
+def peak_rss() -> Optional[int]:
+    """Peak resident set size of this process in bytes, or None when the platform does not tell."""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class _Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = _Counters()
+        counters.cb = ctypes.sizeof(counters)
+        psapi = ctypes.WinDLL("psapi")
+        if not psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                          ctypes.byref(counters), counters.cb):
+            return None
+        return int(counters.PeakWorkingSetSize)
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryProbe:
+    """
+    Debug instrumentation of one build (the "debug_memory_stats" switch): buffers allocated vs reused
+    by the pools since the probe was created, and the peak RSS of the process (since it started).
+    Pool counters are process-wide: builds running at once in a batch are counted together.
+    """
+
+    def __init__(self):
+        self._start = self._pool_totals()
+
+    @staticmethod
+    def _pool_totals() -> PoolStats:
+        total = PoolStats()
+        with _pools_lock:
+            pools = list(_pools.values())
+        for pool in pools:
+            total.allocated += pool.stats.allocated
+            total.allocated_bytes += pool.stats.allocated_bytes
+            total.reused += pool.stats.reused
+        return total
+
+    def summary(self) -> str:
+        now = self._pool_totals()
+        allocated_bytes = now.allocated_bytes - self._start.allocated_bytes
+        rss = peak_rss()
+        return (f"{now.allocated - self._start.allocated} buffer(s) allocated ({human_size(allocated_bytes)}), "
+                f"{now.reused - self._start.reused} reused, "
+                f"peak RSS {human_size(rss) if rss is not None else 'n/a'}")
@@ -0,0 +1,67 @@
+# build_report.py
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from src.core.path_helpers import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+REPORT_FORMAT = 1
+
+
+def report_path(key: str) -> Path:
+    """<cache>/reports/<key>.json (key: progress.profile_key)"""
+    folder = get_cache_dir() / "reports"
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder / f"{key}.json"
+
+
+@dataclass
+class BuildReport:
+    """What the last build of a profile did, saved as JSON for CI and for the next build."""
+    project: str
+    finished: str = ""  # local time, ISO 8601
+    seconds: float = 0.0
+    outputs: list[str] = field(default_factory=list)
+    backend: str = ""  # "7z" | "deflate"
+    # CompressionSettings.to_dict(), plus the auto tuning trials and target when the preset is "auto"
+    compression: dict = field(default_factory=dict)
+    trials: list[dict] = field(default_factory=list)
+    target_rate: Optional[float] = None
+    source_bytes: int = 0  # uncompressed size of the base archive's entries
+    compressed_bytes: int = 0  # ... and their compressed size
+    store_policy: str = ""
+    entry_cache: str = ""
+    memory: str = ""  # buffers.MemoryProbe summary, with the debug_memory_stats switch
+
+    @property
+    def ratio(self) -> float:
+        return self.compressed_bytes / self.source_bytes if self.source_bytes else 1.0
+
+    def save(self, key: str) -> Path:
+        self.finished = time.strftime("%Y-%m-%dT%H:%M:%S")
+        data = {"format": REPORT_FORMAT, **asdict(self), "ratio": round(self.ratio, 4)}
+        path = report_path(key)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+
+def load_report(key: str) -> Optional[dict]:
+    """The last saved report of a profile, or None."""
+    try:
+        data = json.loads(report_path(key).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Ignoring unreadable build report %s: %s", key, e)
+        return None
+    return data if data.get("format") == REPORT_FORMAT else None
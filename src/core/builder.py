@@ -2,15 +2,40 @@
 from __future__ import annotations
 
 import json
+import os
 import shutil
-import subprocess
 import tempfile
+import threading
+import time
 import zipfile
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Callable
 from typing import Iterable, Optional, Sequence, Tuple
 
+from src.core.batch import BuildBudget
+from src.core.buffers import MemoryProbe
+from src.core.build_report import BuildReport, load_report
+from src.core.compression_policy import POLICY_VERSION, CompressionPolicy
+from src.core.compression_presets import (
+    DEFAULT_PRESET, PRESETS, CompressionSettings, pick_sample, preset_settings, tune_deflate, tune_seven_zip,
+)
+from src.core.entry_cache import EntryCache
+from src.core.exclude_rules import ExcludeRules, merge_rules
+from src.core.fastcopy import CopyResult, clone_prefix
+from src.core.file_index import ProjectIndex
+from src.core.fingerprint import BuildInputs, discard_fingerprint, is_up_to_date, save_fingerprint, tree_digest
+from src.core.progress import BuildProgress, ProgressEvent, profile_key
+from src.core.manifest import ManifestRow, PreviousArchive, manifest_path, save_manifest
+from src.core.utils import human_size
+from src.core.scanner import walk_project
+from src.core.seven_zip import run_7z, write_listfile
+from src.core.zip_merge import SHARD_MODES, merge_archives, shard_files
+from src.core.zip_parallel import SourceFile, append_stored_files, write_zip_parallel
+from src.core.zip_stream import ArchiveLayout, ZipEntry, ZipStreamWriter, read_archive_layout
+
 
 # --------------------------- Data models --------------------------- #
 
@@ -30,6 +55,10 @@ DEFAULT_EXCLUDES: tuple[str, ...] = (
 )
 
 
+# Mode recorded for archived files (the walker and the index keep no st_mode): a regular 0o644 file
+_DEFAULT_FILE_MODE = 0o100644
+
+
 def _is_7z_available(explicit_path: Optional[Path]) -> Optional[Path]:
     """Return a 7-Zip executable path if available."""
     if explicit_path and explicit_path.exists():
@@ -70,22 +99,178 @@ def _format_zip_basename(pattern: str, template_dir: Path, version_label: str) -
     return base
 
 
-def _iter_project_files(src_root: Path, excludes: Iterable[str]) -> Iterable[Path]:
-    """Yield files under src_root excluding top-level folders in `excludes`."""
-    exclude_set = set(excludes)
-    for child in src_root.iterdir():
-        if child.name in exclude_set:
-            continue
-        # Always skip hidden VCS metadata at root if not already excluded
-        if child.name.startswith(".") and child.name not in (".config",):
-            if child.name not in exclude_set:
-                continue
-        if child.is_dir():
-            for p in child.rglob("*"):
-                if p.is_file():
-                    yield p
-        elif child.is_file():
-            yield child
+def _iter_project_files(src_root: Path, rules: ExcludeRules) -> Iterable[SourceFile]:
+    """Yield files under src_root that the exclude rules keep (see ExcludeRules)."""
+    for rel, size, mtime_ns in walk_project(src_root, rules):
+        yield SourceFile(path=src_root / rel, arcname=rel, size=size, mtime_ns=mtime_ns, mode=_DEFAULT_FILE_MODE)
+
+
+def _iter_indexed_files(index: ProjectIndex, rules: ExcludeRules) -> Iterable[SourceFile]:
+    """Same selection as _iter_project_files, answered from the project index (no tree walk)."""
+    for f in index.files():
+        if not rules.excludes_path(f.relpath):
+            yield SourceFile(path=index.root / f.relpath, arcname=f.relpath, size=f.size,
+                             mtime_ns=f.mtime_ns, mode=_DEFAULT_FILE_MODE, digest=f.hash)
+
+
+def _remove_partial_7z_output(zip_path: Path) -> None:
+    """Delete what an interrupted 7-Zip run left behind: the archive and its temp files."""
+    for leftover in [zip_path, *zip_path.parent.glob(f"{zip_path.name}.tmp*")]:
+        try:
+            leftover.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def _hold(budget: Optional[BuildBudget], kind: str, on_check_cancel: Optional[Callable[[], bool]]):
+    """Hold a batch budget slot for one stage; no-op outside of a batch."""
+    return budget.hold(kind, on_check_cancel) if budget else nullcontext()
+
+
+def _pick_7z(seven_zip: Optional[Path], cache: Optional[EntryCache]) -> Optional[Path]:
+    """7-Zip to compress the base archive with, or None for the built-in writer."""
+    if cache and cache.shared:
+        # a shared cache mostly turns compression into copying, which 7-Zip cannot do
+        return None
+    return _is_7z_available(seven_zip)
+
+
+def _base_7z(seven_zip: Optional[Path], cache: Optional[EntryCache],
+             previous: Optional[PreviousArchive]) -> Optional[Path]:
+    """7-Zip that writes the base archive, or None: reusing a previous archive always takes the built-in writer."""
+    return None if previous else _pick_7z(seven_zip, cache)
+
+
+def _compression_settings(seven: Optional[Path], settings: CompressionSettings) -> tuple[str, ...]:
+    """
+    Backend (`seven`, see _base_7z) and settings the base archive is compressed with, as recorded in build
+    fingerprints. "auto" is recorded as such (with the untuned settings): re-tuning alone does not rebuild
+    the outputs.
+    """
+    if seven:
+        return "7z", settings.preset, *settings.seven_zip_switches(), f"store-policy-{POLICY_VERSION}"
+    return "deflate", settings.preset, str(settings.deflate_level), f"store-policy-{POLICY_VERSION}"
+
+
+def _auto_settings(
+        files: Sequence[SourceFile],
+        seven: Optional[Path],
+        project_root: Path,
+        target_rate: float,
+        workers: Optional[int],
+        last_report: Optional[dict],
+        force: bool,
+        policy: Optional[CompressionPolicy],
+        on_log: Callable[[str], None],
+        on_check_cancel: Optional[Callable[[], bool]],
+) -> tuple[CompressionSettings, list[dict]]:
+    """
+    Settings of the "auto" preset: the last build's choice when it was tuned for the same backend and
+    target (unless `force`), else trial-compress a sample of the project and keep the smallest output
+    reaching `target_rate`. Returns the settings and the trials (as recorded in the build report).
+    """
+    backend = "7z" if seven else "deflate"
+    if (not force and last_report and last_report.get("compression", {}).get("preset") == "auto"
+            and last_report.get("backend") == backend and last_report.get("target_rate") == target_rate):
+        settings = CompressionSettings.from_dict(last_report["compression"])
+        on_log(f"Auto compression: keeping {settings.describe(bool(seven))}, tuned on {last_report['finished']}")
+        return settings, list(last_report.get("trials", []))
+
+    sample = pick_sample(files, policy)
+    if not sample:
+        return preset_settings("auto"), []
+    start = time.perf_counter()
+    if seven:
+        settings, trials = tune_seven_zip(seven, project_root, sample, target_rate, on_check_cancel=on_check_cancel)
+    else:
+        settings, trials = tune_deflate(sample, workers or os.cpu_count() or 1, target_rate,
+                                        on_check_cancel=on_check_cancel)
+    on_log(f"Auto compression: {len(trials)} trial(s) on {len(sample)} file(s) "
+           f"({human_size(sum(f.size for f in sample))}) in {time.perf_counter() - start:.1f} s, "
+           f"target {human_size(target_rate)}/s -> {settings.describe(bool(seven))}")
+    return settings, [t.to_dict() for t in trials]
+
+
+def _run_7z_shards(
+        seven: Path,
+        project_root: Path,
+        base_zip: Path,
+        shards: Sequence[Sequence[SourceFile]],
+        settings: CompressionSettings,
+        on_log: Optional[Callable[[str], None]] = None,
+        progress: Optional[BuildProgress] = None,
+        on_check_cancel: Optional[Callable[[], bool]] = None,
+) -> None:
+    """
+    Compress each shard with its own 7-Zip process, all at once, then merge the partial archives
+    into base_zip by copying their data raw (see zip_merge.py). The cores are split between the
+    processes (-mmt). A single shard is compressed straight into base_zip.
+    On failure or cancel every process is stopped and the partial archives removed.
+    """
+    parts = [base_zip] if len(shards) == 1 else \
+        [base_zip.with_name(f"{base_zip.name}.shard{i}.zip") for i in range(len(shards))]
+    threads = max(1, (settings.seven_zip_threads or os.cpu_count() or 1) // len(shards))
+    switches = settings.seven_zip_switches() if len(shards) == 1 \
+        else [f"-mx={settings.seven_zip_level}", f"-mmt={threads}"]
+    totals = [sum(f.size for f in shard) for shard in shards]
+    percents = [0] * len(shards)
+    lock = threading.Lock()
+    abort = threading.Event()  # set when one shard fails, so the other processes stop too
+    last_logged = -1
+
+    def _cancelled() -> bool:
+        return abort.is_set() or bool(on_check_cancel and on_check_cancel())
+
+    def _compress(i: int) -> None:
+        def _on_7z_progress(percent: int, current: str) -> None:
+            nonlocal last_logged
+            with lock:
+                percents[i] = percent
+                done = sum(t * p // 100 for t, p in zip(totals, percents))
+                overall = done * 100 // max(1, sum(totals))
+                log_it = current and overall // 10 > last_logged // 10
+                if log_it:
+                    last_logged = overall
+            if progress:
+                progress.update("compress", done)
+            if on_log and log_it:
+                on_log(f"7-Zip {overall}%: {current}")
+
+        # 7z 'a' would append to a leftover archive from a previous run
+        parts[i].unlink(missing_ok=True)
+        # Archive exactly the scanned list; names in it are relative to project_root
+        with tempfile.TemporaryDirectory() as td:
+            listfile = Path(td) / "files.txt"
+            write_listfile(listfile, (f.arcname for f in shards[i]))
+            args = [str(seven), "a", "-tzip", *switches, "-y", "-scsUTF-8", str(parts[i]), f"@{listfile}"]
+            run_7z(args, project_root, on_progress=_on_7z_progress, on_check_cancel=_cancelled)
+
+    try:
+        if len(shards) == 1:
+            _compress(0)
+            return
+        if on_log:
+            on_log(f"7-Zip: {len(shards)} shard(s) of {', '.join(human_size(t) for t in totals)}, "
+                   f"{threads} thread(s) each")
+        with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="7z-shard") as pool:
+            futures = [pool.submit(_compress, i) for i in range(len(shards))]
+            try:
+                for f in futures:
+                    f.result()
+            except BaseException:
+                abort.set()
+                raise
+        merge_start = time.perf_counter()
+        merge_archives(parts, base_zip, on_chunk=lambda _n: check_cancel(on_check_cancel))
+        if on_log:
+            on_log(f"Merged {len(shards)} shard(s) in {time.perf_counter() - merge_start:.2f} s")
+    except BaseException:
+        _remove_partial_7z_output(base_zip)
+        raise
+    finally:
+        if len(shards) > 1:
+            for part in parts:
+                _remove_partial_7z_output(part)
 
 
 def _relative_to_root(path: Path, root: Path) -> str:
@@ -99,31 +284,113 @@ def create_base_zip(
         out_dir: Path,
         base_name: str,
         seven_zip: Optional[Path],
-        excludes: Sequence[str] = DEFAULT_EXCLUDES,
+        rules: Optional[ExcludeRules] = None,
+        skip_relpaths: Sequence[str] = (),
+        workers: Optional[int] = None,
+        previous: Optional[PreviousArchive] = None,
+        index: Optional[ProjectIndex] = None,
+        settings: Optional[CompressionSettings] = None,
+        on_log: Optional[Callable[[str], None]] = None,
+        progress: Optional[BuildProgress] = None,
+        budget: Optional[BuildBudget] = None,
+        on_check_cancel: Optional[Callable[[], bool]] = None,
 ) -> Path:
     """
-    Create a base ZIP of the project root excluding heavy/dev folders.
-    Returns the path to the created base ZIP (without engine association tweaks).
+    Create a base ZIP of the files `rules` select (default: DEFAULT_EXCLUDES), minus `skip_relpaths`.
+    The tree is scanned once (or read from an up-to-date `index`) and that list is compressed by 7-Zip
+    or, without it, on `workers` threads; with a `previous` archive + manifest, unchanged files are
+    raw-copied from it. `settings` carries the codec, store policy, entry cache and 7-Zip shards
+    (default: the "balanced" preset). A manifest is saved next to the result for the next run.
     """
     out_dir.mkdir(parents=True, exist_ok=True)
     base_zip = out_dir / f"{base_name}_BASE.zip"
 
-    seven = _is_7z_available(seven_zip)
-    if seven:
-        # Use 7-Zip with exclude rules (-xr!) for each top-level folder
-        # We run from project_root so patterns like * match relative content.
-        args = [str(seven), "a", "-tzip", "-mx=5", "-y", str(base_zip)]
-        for ex in excludes:
-            args += [f"-xr!{ex}"]
-        # Add everything under project root
-        args += ["*"]
-        subprocess.run(args, cwd=str(project_root), check=True)
-    else:
-        # Python fallback using zipfile
-        with zipfile.ZipFile(base_zip, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-            for file in _iter_project_files(project_root, excludes):
-                arc = _relative_to_root(file, project_root)
-                zf.write(file, arc)
+    # Stat everything up-front: the manifest must describe the files as they were before archiving
+    rules = rules or ExcludeRules(DEFAULT_EXCLUDES)
+    settings = settings or PRESETS["balanced"]
+    cache, policy = settings.cache, settings.policy
+    skip = {rel.replace("\\", "/") for rel in skip_relpaths}
+    scan_start = time.perf_counter()
+    with _hold(budget, "io", on_check_cancel):
+        if index:
+            files = [f for f in _iter_indexed_files(index, rules) if f.arcname not in skip]
+        else:
+            files = [f for f in _iter_project_files(project_root, rules) if f.arcname not in skip]
+    if on_log:
+        on_log(f"Scan: {len(files)} file(s), {human_size(sum(f.size for f in files))} "
+               f"in {time.perf_counter() - scan_start:.2f} s")
+    if progress:
+        progress.update("scan", len(files))
+        progress.finish("scan")
+
+    def _on_chunk(n: int) -> None:
+        if progress:
+            progress.advance("compress", n)
+
+    seven = _base_7z(seven_zip, cache, previous)
+    # compression is the CPU-bound stage of a batch build
+    with _hold(budget, "cpu", on_check_cancel):
+        if previous:
+            unchanged = [f for f in files
+                         if (row := previous.manifest.get(f.arcname))
+                         and row.size == f.size and row.mtime_ns == f.mtime_ns]
+            if on_log:
+                on_log(f"Incremental base zip: reusing {len(unchanged)} of {len(files)} entries "
+                       f"from the previous build")
+            if progress:
+                progress.start("compress", sum(f.size for f in files) - sum(f.size for f in unchanged))
+            entries = write_zip_parallel(base_zip, files, workers=workers, level=settings.deflate_level,
+                                         previous=previous, on_chunk=_on_chunk, on_check_cancel=on_check_cancel,
+                                         cache=cache, policy=policy)
+        elif seven:
+            # 7z 'a' would append to a leftover archive from a previous run
+            base_zip.unlink(missing_ok=True)
+            # 7-Zip has one level for the whole archive: the files to store are kept out of its list
+            deflated, stored = list(files), []
+            if policy:
+                is_stored = [policy.decide_file(f.path, f.arcname, f.size).compress_type == zipfile.ZIP_STORED
+                             for f in files]
+                deflated = [f for f, s in zip(files, is_stored) if not s]
+                stored = [f for f, s in zip(files, is_stored) if s]
+            total = sum(f.size for f in deflated)
+            if progress:
+                progress.start("compress", total + sum(f.size for f in stored))
+            try:
+                if deflated:
+                    shards = shard_files(deflated, settings.shards, settings.shard_by)
+                    _run_7z_shards(seven, project_root, base_zip, shards, settings,
+                                   on_log=on_log, progress=progress, on_check_cancel=on_check_cancel)
+                if stored or not deflated:
+                    if progress:
+                        progress.update("compress", total)
+                    append_stored_files(base_zip, stored, on_chunk=_on_chunk, on_check_cancel=on_check_cancel)
+            except BaseException:
+                _remove_partial_7z_output(base_zip)
+                raise
+            with zipfile.ZipFile(base_zip, "r") as zf:
+                entries = [ZipEntry.from_zipinfo(info) for info in zf.infolist()]
+        else:
+            # Python fallback: multi-core deflate with a single ordered writer
+            if progress:
+                progress.start("compress", sum(f.size for f in files))
+            entries = write_zip_parallel(base_zip, files, workers=workers, level=settings.deflate_level,
+                                         on_chunk=_on_chunk, on_check_cancel=on_check_cancel, cache=cache,
+                                         policy=policy)
+        if progress:
+            progress.finish("compress")
+
+    # Only files whose archived size matches what we stat'ed are trusted for the next run
+    by_name = {e.name: e for e in entries}
+    rows = [
+        (f.arcname, ManifestRow(f.size, f.mtime_ns, by_name[f.arcname].crc))
+        for f in files
+        if f.arcname in by_name and by_name[f.arcname].file_size == f.size
+    ]
+    save_manifest(manifest_path(base_zip), rows, compression=settings.to_dict())
+    if index:
+        index.record_compressed_sizes((e.name, e.compress_size) for e in entries)
+        # digests the entry cache computed, so the next build does not read those files just to hash them
+        index.record_hashes((f.arcname, f.size, f.mtime_ns, f.digest) for f in files if f.digest)
     return base_zip
 
 
@@ -160,65 +427,97 @@ def build_mutated_uproject_bytes(
 
 # --------------------------- Apply version to ZIP ------------------- #
 
-def update_zip_uproject_with_7z(
+def update_zip_uproject_python(
         src_zip: Path,
         dst_zip: Path,
         uproject_relpath: str,
         new_uproject_bytes: bytes,
-        seven_zip: Path,
 ) -> None:
     """
-    Copy src_zip to dst_zip and replace the .uproject entry using 7-Zip 'u' (update).
-    We write the modified .uproject to a temp file and update the archive.
+    Copy src_zip to dst_zip while replacing the .uproject entry.
+    Every other entry is copied raw (compressed bytes, CRC and sizes untouched), so nothing
+    is re-inflated or re-deflated and memory stays flat whatever the entry size.
     """
-    shutil.copy2(src_zip, dst_zip)
-    with tempfile.TemporaryDirectory() as td:
-        tmp_uproject = Path(td) / Path(uproject_relpath).name
-        tmp_uproject.write_bytes(new_uproject_bytes)
-        # Update the entry at path uproject_relpath; 7z requires a relative path, so we pass the file
-        # and use -up0q3r2x2y2z0!pattern to control; simpler approach: run from temp and target rel path
-        # Easiest: use 7z u dst_zip tmp_uproject -spf2 and specify archive path with -ir!<arcpath>
-        # But -ir is for include; 7z can't directly map a different file path to arc path without -si/-so.
-        # So we do: 7z u dst_zip <tmp_path> -snl -spf2, then rename entry if necessary.
-        # Simpler robust route: extract the original .uproject to temp path with the same name, then update it.
-        # However, most 7z builds will update by filename only (no folder). We'll instead use python fallback if arc path differs.
-        # For reliable behavior, we fallback to Python replace when arc path != file name:
-        if Path(uproject_relpath).name != uproject_relpath:
-            # Fallback to Python replace to preserve exact arc path
-            update_zip_uproject_python(src_zip, dst_zip, uproject_relpath, new_uproject_bytes)
-            return
-        # If the .uproject sits at archive root, we can update by filename:
-        subprocess.run([str(seven_zip), "u", "-y", str(dst_zip), str(tmp_uproject)], check=True)
+    target = uproject_relpath.replace("\\", "/")
+    # Write next to the destination then rename, to avoid partial files on error
+    tmp_zip = dst_zip.with_name(dst_zip.name + ".part")
+    try:
+        with zipfile.ZipFile(src_zip, "r") as zin, open(src_zip, "rb") as fin, open(tmp_zip, "wb") as fout:
+            writer = ZipStreamWriter(fout)
+            # Copy all entries except the .uproject we are replacing
+            for item in zin.infolist():
+                if item.filename.replace("\\", "/") == target:
+                    continue
+                writer.copy_raw(fin, item)
+            # Add the new .uproject
+            writer.write_bytes(target, new_uproject_bytes)
+            writer.close()
+        os.replace(tmp_zip, dst_zip)
+    except BaseException:
+        tmp_zip.unlink(missing_ok=True)
+        raise
 
 
-def update_zip_uproject_python(
-        src_zip: Path,
+def assemble_version_zip(
+        base: ArchiveLayout,
         dst_zip: Path,
         uproject_relpath: str,
         new_uproject_bytes: bytes,
-) -> None:
+        on_chunk: Optional[Callable[[int], None]] = None,
+) -> CopyResult:
     """
-    Copy src_zip to dst_zip while replacing the .uproject entry using Python's zipfile.
+    Produce dst_zip as: the base archive's data region, cloned (reflink when the filesystem
+    supports it, kernel-side copy otherwise), followed by one new local entry for the .uproject
+    and a regenerated central directory.
+    The base must have been created without the .uproject (see create_base_zip's skip_relpaths).
+    `on_chunk(n)` reports cloned bytes and may raise to abort (the partial file is removed).
+    Returns how the data region was cloned.
     """
-    # Write to a temp then move to dst_zip to avoid partial files on error
-    with tempfile.TemporaryDirectory() as td:
-        tmp_zip = Path(td) / "new.zip"
-        with zipfile.ZipFile(src_zip, "r") as zin, zipfile.ZipFile(tmp_zip, "w",
-                                                                   compression=zipfile.ZIP_DEFLATED) as zout:
-            # Copy all entries except the .uproject we are replacing
-            for item in zin.infolist():
-                arcname = item.filename
-                if arcname.replace("\\", "/") == uproject_relpath.replace("\\", "/"):
-                    continue
-                # Preserve original compression/mtime when possible
-                data = zin.read(item.filename)
-                zout.writestr(item, data)
-            # Add the new .uproject
-            zout.writestr(uproject_relpath, new_uproject_bytes)
-        shutil.copy2(tmp_zip, dst_zip)
+    tmp_zip = dst_zip.with_name(dst_zip.name + ".part")
+    try:
+        with open(base.path, "rb") as fin, open(tmp_zip, "wb") as fout:
+            copied = clone_prefix(fin, fout, base.data_end, on_chunk=on_chunk)
+            writer = ZipStreamWriter(fout, entries=list(base.entries))
+            writer.write_bytes(uproject_relpath.replace("\\", "/"), new_uproject_bytes)
+            writer.close()
+        os.replace(tmp_zip, dst_zip)
+    except BaseException:
+        tmp_zip.unlink(missing_ok=True)
+        raise
+    return copied
+
+
+def verify_version_zip(dst_zip: Path, expected_entries: int, uproject_relpath: str, uproject_bytes: bytes) -> None:
+    """
+    Check a finished version zip: the central directory reads back with the expected entry count
+    and the .uproject entry decompresses to the mutated bytes (zipfile checks its CRC).
+    Raises RuntimeError on mismatch.
+    """
+    with zipfile.ZipFile(dst_zip, "r") as zf:
+        count = len(zf.infolist())
+        if count != expected_entries:
+            raise RuntimeError(f"{dst_zip.name}: {count} entries, expected {expected_entries}")
+        if zf.read(uproject_relpath) != uproject_bytes:
+            raise RuntimeError(f"{dst_zip.name}: {uproject_relpath} does not match the mutated .uproject")
 
 
 # --------------------------- Orchestrator --------------------------- #
+
+DEFAULT_DISK_PARALLELISM = 4
+
+# Hidden folder in the output directory holding the base zip between incremental builds: on the outputs'
+# filesystem, so assembling a version can clone the base data region (reflink / copy_file_range)
+BUILD_CACHE_DIRNAME = ".ue_fab_cache"
+
+
+def resolve_worker_count(max_workers: Optional[int], disk_parallelism: Optional[int], jobs: int) -> int:
+    """Workers for per-version assembly: CPU count by default, capped by disk parallelism and job count."""
+    workers = max_workers or os.cpu_count() or 1
+    if disk_parallelism:
+        workers = min(workers, disk_parallelism)
+    return max(1, min(workers, jobs))
+
+
 def check_cancel(on_check_cancel: Optional[Callable[[], bool]], on_log: Optional[Callable[[str], None]] = None):
     """Raise RuntimeError('Canceled') if cancel was requested."""
     if on_check_cancel and on_check_cancel():
@@ -234,22 +533,37 @@ def build_zip_set(
         selections: Sequence[Tuple[str, str, str]],
         # selections: list of (version_id, version_label, engine_path)
         seven_zip: Optional[Path] = None,
-        excludes: set[str] | None = None,  # default None,
-        plugins_to_strip=set[str],
+        excludes: Optional[Sequence[str]] = None,  # default None,
+        use_ignore_files: bool = False,
+        plugins_to_strip: Optional[set[str]] = None,
         on_log: Optional[Callable[[str], None]] = None,
         on_progress: Optional[Callable[[int], None]] = None,
         on_check_cancel: Optional[Callable[[], bool]] = None,
+        on_event: Optional[Callable[[ProgressEvent], None]] = None,
+        budget: Optional[BuildBudget] = None,
+        max_workers: Optional[int] = None,
+        disk_parallelism: Optional[int] = DEFAULT_DISK_PARALLELISM,
+        incremental: bool = True,
+        force: bool = False,
+        compression: Optional[CompressionSettings] = None,
+        debug_memory: bool = False,
 ) -> list[Path]:
     """
-    End-to-end build:
-      1) Create a base ZIP once from project_root (excluding heavy/dev folders).
-      2) For each selected version, produce a final ZIP by replacing the .uproject inside with a mutated one.
-
+    End-to-end build: create a base ZIP once (without the .uproject), then assemble each selected
+    version from its data region plus a mutated .uproject, on up to `max_workers` / `disk_parallelism`
+    threads. Outputs whose fingerprint is current are kept unless `force`; with `incremental` the base
+    is kept in <out_dir>/.ue_fab_cache, next to the outputs it is cloned into. `compression` is a preset
+    with its build options (default: "balanced").
     Returns list of final zip paths.
     """
     # Start Progress 0%
     on_log("Starting build...")
     on_progress(0)
+    build_start = time.perf_counter()
+    memory_probe = MemoryProbe() if debug_memory else None
+    settings = compression or preset_settings(DEFAULT_PRESET)
+    if settings.shard_by not in SHARD_MODES:
+        raise ValueError(f"Unknown shard mode '{settings.shard_by}' (expected one of: {', '.join(SHARD_MODES)})")
 
     # Log build parameters
     version_labels = [label for _, label, _ in selections]
@@ -259,34 +573,45 @@ def build_zip_set(
 
     project_root = project_root.resolve()
     out_dir = out_dir.resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
     uproject_path = _find_uproject(project_root)
     uproject_relpath = _relative_to_root(uproject_path, project_root)
 
     check_cancel(on_check_cancel, on_log)
 
-    on_log("Creating base zip (excluding heavy/dev folders)...")
-
     if excludes is None:
         # caller did not override, use defaults only
         excludes = DEFAULT_EXCLUDES
     else:
-        # caller provided something → merge with defaults
-        excludes = tuple(set(DEFAULT_EXCLUDES) | set(excludes))
-
-    # Create base archive once
-    base_zip = create_base_zip(project_root, out_dir, base_name="__UE_BASE__", seven_zip=seven_zip, excludes=excludes)
-
-    check_cancel(on_check_cancel, on_log)
-
-    seven = _is_7z_available(seven_zip)
-    results: list[Path] = []
-
-    # For progression
-    total = len(selections)
-
-    for idx, (version_id, version_label, _engine_path) in enumerate(selections, 1):
-
-        check_cancel(on_check_cancel, on_log)
+        # caller provided something → appended to the defaults, in order (the last matching rule wins)
+        excludes = merge_rules(DEFAULT_EXCLUDES, excludes)
+    rules = ExcludeRules.for_project(project_root, excludes, use_ignore_files=use_ignore_files)
+    on_log(f"Exclude rules: {len(rules.rules)} compiled"
+           + (" (including .gitignore/.p4ignore)" if use_ignore_files else ""))
+
+    # Progress over scan / compress / assemble / verify, estimated from this profile's last run
+    key = profile_key(project_root, out_dir)
+
+    # Create base archive once, without the .uproject: each version appends its own
+    base_dir = out_dir / BUILD_CACHE_DIRNAME if incremental else out_dir
+    previous = PreviousArchive.load(base_dir / "__UE_BASE___BASE.zip") if incremental else None
+    # known up front except for "auto", which is compared once tuned
+    if previous and settings.preset != "auto" and previous.compression != settings.to_dict():
+        on_log("Compression settings changed since the last build: recompressing every file")
+        previous = None
+
+    def _on_event(event: ProgressEvent) -> None:
+        on_progress(int(event.percent))
+        if on_event:
+            on_event(event)
+
+    progress = BuildProgress(on_event=_on_event, history_key=key, versions=len(selections))
+    progress.start("scan")
+
+    # Prepare every version up-front (cheap), then assemble them concurrently
+    # (version_label, mutated .uproject, dst_zip, engine association)
+    jobs: list[tuple[str, bytes, Path, str]] = []
+    for version_id, version_label, _engine_path in selections:
         on_log(f"[{version_label}] Mutating .uproject (EngineAssociation)...")
 
         # Prepare mutated .uproject bytes
@@ -299,32 +624,155 @@ def build_zip_set(
         )
         # Compute final name from pattern (with dots -> underscores already handled)
         final_base = _format_zip_basename(pattern, project_root, version_label)
-        dst_zip = out_dir / f"{final_base}.zip"
+        jobs.append((version_label, mutated, out_dir / f"{final_base}.zip", engine_association))
+    outputs = [dst_zip for _label, _mutated, dst_zip, _assoc in jobs]
+
+    with ProjectIndex(project_root) as index:
+        refresh_start = time.perf_counter()
+        with _hold(budget, "io", on_check_cancel):
+            stats = index.refresh(prune=rules)
+        on_log(f"Project index: {stats.dirs_listed} folder(s) re-listed, {stats.dirs_reused} unchanged, "
+               f"{stats.files_changed} file(s) changed, {stats.files_removed} removed "
+               f"in {time.perf_counter() - refresh_start:.2f} s")
+
+        # Outputs written from the same inputs are kept as they are
+        inputs = BuildInputs(
+            tree=tree_digest((f.relpath, f.size, f.mtime_ns) for f in index.files()
+                             if not rules.excludes_path(f.relpath)),
+            rules=tuple(rule.line for rule in rules.rules),
+            plugins_to_strip=tuple(plugins_to_strip or ()),
+            uproject_relpath=uproject_relpath,
+            compression=_compression_settings(_base_7z(seven_zip, settings.cache, previous), settings),
+        )
+        fingerprints = {dst_zip: inputs.output_fingerprint(assoc) for _label, _mutated, dst_zip, assoc in jobs}
+        fresh = set() if force else {dst for dst, fp in fingerprints.items() if is_up_to_date(dst, fp)}
+        for version_label, _mutated, dst_zip, _assoc in jobs:
+            if dst_zip in fresh:
+                on_log(f"[{version_label}] Up to date: {dst_zip.name}")
+        jobs = [job for job in jobs if job[2] not in fresh]
+        if not jobs:
+            on_log("All outputs are up to date, nothing to build.")
+            if memory_probe:
+                on_log(f"Memory: {memory_probe.summary()}")
+            on_progress(100)
+            return outputs
+        progress.versions = len(jobs)
+
+        on_log("Creating base zip (excluding heavy/dev folders)...")
+        # own stats for this build, even when the cache object is shared by a batch
+        cache = settings.cache.session() if settings.cache else None
+        last_report = load_report(key)
+        policy = CompressionPolicy(level=settings.deflate_level)
+        trials: list[dict] = []
+        if settings.preset == "auto":
+            with _hold(budget, "cpu", on_check_cancel):
+                tuned, trials = _auto_settings(list(_iter_indexed_files(index, rules)),
+                                               _base_7z(seven_zip, settings.cache, previous), project_root,
+                                               settings.auto_target_rate, max_workers, last_report, force, policy,
+                                               on_log, on_check_cancel)
+            settings = settings.with_codec(tuned)
+            policy = CompressionPolicy(level=settings.deflate_level)
+        settings = replace(settings, policy=policy, cache=cache)
+        if previous and previous.compression != settings.to_dict():
+            on_log("Compression settings changed since the last build: recompressing every file")
+            previous = None
+        # what create_base_zip writes with, and so what the report records
+        seven = _base_7z(seven_zip, cache, previous)
+        on_log(f"Compression: {settings.describe(bool(seven))}")
+        base_zip = create_base_zip(project_root, base_dir, base_name="__UE_BASE__", seven_zip=seven_zip,
+                                   rules=rules, skip_relpaths=(uproject_relpath,), workers=max_workers,
+                                   previous=previous, index=index, settings=settings, on_log=on_log,
+                                   progress=progress, budget=budget, on_check_cancel=on_check_cancel)
+    on_log(f"Store policy: {policy.stats.summary()}")
+    base = read_archive_layout(base_zip)
+    # Safety net if the backend still picked the .uproject up: drop it from the directory
+    base.entries = [e for e in base.entries if e.name.replace("\\", "/") != uproject_relpath]
 
-        check_cancel(on_check_cancel, on_log)
-        on_log(f"[{version_label}] Writing final zip: {dst_zip.name}")
+    check_cancel(on_check_cancel, on_log)
 
-        if seven:
-            # Use 7-Zip update when the .uproject sits at archive root; otherwise fallback to Python replace
+    workers = resolve_worker_count(max_workers, disk_parallelism, len(jobs))
+    on_log(f"Assembling {len(jobs)} version zip(s) with {workers} worker(s)...")
+
+    # Assembly and verification are the disk-bound stages of a batch build
+    with _hold(budget, "io", on_check_cancel):
+        # Each version copies the whole base data region
+        progress.start("assemble", len(jobs) * base.data_end)
+        abort = threading.Event()  # set when one worker fails, so the others stop too
+
+        def _on_chunk(n: int) -> None:
+            if abort.is_set():
+                raise RuntimeError("Canceled")
+            check_cancel(on_check_cancel)
+            progress.advance("assemble", n)
+
+        def _assemble(job: tuple[str, bytes, Path, str]) -> Path:
+            version_label, mutated, dst_zip, _assoc = job
+            check_cancel(on_check_cancel)
+            on_log(f"[{version_label}] Writing final zip: {dst_zip.name}")
+            discard_fingerprint(dst_zip)
+
+            # Base data region + new .uproject entry + regenerated central directory
+            copied = assemble_version_zip(base, dst_zip, uproject_relpath, mutated, on_chunk=_on_chunk)
+            on_log(f"[{version_label}] Base data cloned via {copied.strategy} "
+                   f"({human_size(copied.bytes_copied)} copied of {human_size(base.data_end)})")
+            return dst_zip
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zip-assemble") as pool:
+            futures = [pool.submit(_assemble, job) for job in jobs]
             try:
-                update_zip_uproject_with_7z(base_zip, dst_zip, uproject_relpath, mutated, seven)
-            except Exception:
-                update_zip_uproject_python(base_zip, dst_zip, uproject_relpath, mutated)
-        else:
-            update_zip_uproject_python(base_zip, dst_zip, uproject_relpath, mutated)
+                results: list[Path] = [f.result() for f in futures]
+            except BaseException:
+                # stop running workers at their next chunk and drop the ones not started yet
+                abort.set()
+                for f in futures:
+                    f.cancel()
+                raise
+        progress.finish("assemble")
 
-        percent = int(idx / total * 100)
-        on_progress(percent)
-
-        results.append(dst_zip)
-
-    # Optionally remove the base zip to keep output clean
-    try:
-        base_zip.unlink(missing_ok=True)
-    except Exception:
-        pass
+        check_cancel(on_check_cancel, on_log)
 
+        # Cheap sanity check of every output before reporting success
+        progress.start("verify", sum(p.stat().st_size for p in results))
+        for (_label, mutated, _dst, _assoc), dst_zip in zip(jobs, results):
+            verify_version_zip(dst_zip, len(base.entries) + 1, uproject_relpath, mutated)
+            save_fingerprint(dst_zip, fingerprints[dst_zip])
+            progress.advance("verify", dst_zip.stat().st_size)
+        progress.finish("verify")
+        on_log(f"Verified {len(results)} zip(s).")
+
+    # Remove the base zip to keep output clean, unless it is kept for the next incremental build
+    if not incremental:
+        try:
+            base_zip.unlink(missing_ok=True)
+            manifest_path(base_zip).unlink(missing_ok=True)
+        except Exception:
+            pass
+
+    if cache:
+        cache.trim()
+        on_log(f"Entry cache: {cache.stats.summary()}")
+
+    report = BuildReport(
+        project=str(project_root),
+        seconds=round(time.perf_counter() - build_start, 3),
+        outputs=[str(p) for p in outputs],
+        backend="7z" if seven else "deflate",
+        compression=settings.to_dict(),
+        trials=trials,
+        target_rate=settings.auto_target_rate if settings.preset == "auto" else None,
+        source_bytes=sum(e.file_size for e in base.entries),
+        compressed_bytes=sum(e.compress_size for e in base.entries),
+        store_policy=policy.stats.summary(),
+        entry_cache=cache.stats.summary() if cache else "",
+        memory=memory_probe.summary() if memory_probe else "",
+    )
+    if memory_probe:
+        on_log(f"Memory: {report.memory}")
+    on_log(f"Compression ratio: {report.ratio:.3f} ({human_size(report.compressed_bytes)} of "
+           f"{human_size(report.source_bytes)}), report saved to {report.save(key)}")
+
+    progress.save_history()
     on_log("All done.")
     on_progress(100)
 
-    return results
+    return outputs
@@ -0,0 +1,148 @@
+# compression_policy.py
+from __future__ import annotations
+
+import threading
+import time
+import zipfile
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from src.core.utils import human_size
+from src.core.zip_stream import DEFAULT_COMPRESS_LEVEL
+
+# Bump when decisions change for the same input (part of the build fingerprint)
+POLICY_VERSION = 1
+
+# Formats that are already compressed: deflating them costs CPU for a gain of a few bytes
+STORE_EXTENSIONS: frozenset[str] = frozenset({
+    # images
+    ".png", ".jpg", ".jpeg", ".webp", ".gif",
+    # audio / video (Bink, Ogg, MP3, MP4...)
+    ".bk2", ".ogg", ".mp3", ".opus", ".mp4", ".m4a", ".mov", ".webm", ".avi",
+    # archives
+    ".zip", ".7z", ".rar", ".gz", ".bz2", ".xz", ".zst",
+})
+
+# Head of a file trial-compressed to decide for files not in the table
+DEFAULT_SAMPLE_SIZE = 256 * 1024
+# Trial level: fast, and close enough to the real level to judge compressibility
+_SAMPLE_LEVEL = 1
+# Store when deflate saves less than this fraction of the size
+DEFAULT_MIN_GAIN = 0.05
+# Below this gain, deflate at level 1: barely larger output, several times faster
+LOW_GAIN = 0.2
+LOW_GAIN_LEVEL = 1
+# Deflate throughput assumed when the build compressed too little to measure it (bytes per CPU second)
+DEFAULT_DEFLATE_RATE = 30 * 1024 * 1024
+
+
+@dataclass
+class PolicyStats:
+    stored_files: int = 0
+    stored_bytes: int = 0
+    by_extension: int = 0  # stored files decided from the table
+    by_sample: int = 0  # ... from the trial compression of their head
+    by_result: int = 0  # ... after deflating them (small files) gave nothing
+    by_result_bytes: int = 0  # those were deflated anyway: no time saved on them
+    sampled_files: int = 0
+    sample_seconds: float = 0.0  # CPU time spent sampling
+    deflated_bytes: int = 0
+    deflate_seconds: float = 0.0  # CPU time spent deflating (to estimate the time saved)
+
+    def cpu_seconds_saved(self) -> float:
+        """Estimated CPU time deflate would have taken on the stored files, minus the sampling cost."""
+        if self.deflate_seconds > 0 and self.deflated_bytes >= DEFAULT_SAMPLE_SIZE:
+            rate = self.deflated_bytes / self.deflate_seconds
+        else:
+            rate = DEFAULT_DEFLATE_RATE
+        return (self.stored_bytes - self.by_result_bytes) / rate - self.sample_seconds
+
+    def summary(self) -> str:
+        return (f"{self.stored_files} file(s) stored uncompressed ({human_size(self.stored_bytes)}: "
+                f"{self.by_extension} by type, {self.by_sample} by sample, {self.by_result} after trying), "
+                f"~{max(0.0, self.cpu_seconds_saved()):.1f} CPU s saved")
+
+
+@dataclass(frozen=True)
+class Decision:
+    compress_type: int  # zipfile.ZIP_STORED or zipfile.ZIP_DEFLATED
+    level: int
+
+
+@dataclass
+class CompressionPolicy:
+    """
+    Chooses STORE or DEFLATE, and the deflate level, for each archived file:
+      1) extensions of already-compressed formats (STORE_EXTENSIONS) are stored;
+      2) files larger than `sample_size` are decided from a fast trial compression of their head:
+         stored below `min_gain`, deflated at LOW_GAIN_LEVEL below LOW_GAIN, else at `level`;
+      3) smaller files are deflated, and stored instead if that did not save `min_gain` (keep_deflated).
+    Thread-safe; `stats` accumulate over the build.
+    """
+    level: int = DEFAULT_COMPRESS_LEVEL
+    sample_size: int = DEFAULT_SAMPLE_SIZE
+    min_gain: float = DEFAULT_MIN_GAIN
+    store_extensions: frozenset[str] = STORE_EXTENSIONS
+    stats: PolicyStats = field(default_factory=PolicyStats, init=False)
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    def by_extension(self, arcname: str) -> Optional[Decision]:
+        """STORE decision from the name alone, or None if the content has to be looked at."""
+        dot = arcname.rfind(".")
+        if dot > arcname.rfind("/") and arcname[dot:].lower() in self.store_extensions:
+            return Decision(zipfile.ZIP_STORED, 0)
+        return None
+
+    def decide(self, arcname: str, size: int, head: bytes) -> Decision:
+        """Decision for a file of `size` bytes starting with `head` (at least sample_size bytes if that large)."""
+        decision = self.by_extension(arcname)
+        if decision:
+            self._record_store(size, "by_extension")
+            return decision
+        if size <= self.sample_size or not head:
+            return Decision(zipfile.ZIP_DEFLATED, self.level)
+        start = time.thread_time()
+        sample = head[:self.sample_size]
+        gain = 1.0 - len(zlib.compress(sample, _SAMPLE_LEVEL)) / len(sample)
+        with self._lock:
+            self.stats.sampled_files += 1
+            self.stats.sample_seconds += time.thread_time() - start
+        if gain < self.min_gain:
+            self._record_store(size, "by_sample")
+            return Decision(zipfile.ZIP_STORED, 0)
+        if gain < LOW_GAIN:
+            return Decision(zipfile.ZIP_DEFLATED, LOW_GAIN_LEVEL)
+        return Decision(zipfile.ZIP_DEFLATED, self.level)
+
+    def decide_file(self, path: Path, arcname: str, size: int) -> Decision:
+        """decide() for a file on disk, reading its head only when the sample is needed."""
+        head = b""
+        if size > self.sample_size and not self.by_extension(arcname):
+            with open(path, "rb") as f:
+                head = f.read(self.sample_size)
+        return self.decide(arcname, size, head)
+
+    def keep_deflated(self, size: int, compressed_size: int) -> bool:
+        """After deflating a (small) file: False if storing it is as good."""
+        if compressed_size <= size * (1.0 - self.min_gain):
+            return True
+        self._record_store(size, "by_result")
+        with self._lock:
+            self.stats.by_result_bytes += size
+        return False
+
+    def record_deflate(self, nbytes: int, cpu_seconds: float) -> None:
+        """Measured deflate cost, used to estimate what storing saved."""
+        with self._lock:
+            self.stats.deflated_bytes += nbytes
+            self.stats.deflate_seconds += cpu_seconds
+
+    def _record_store(self, size: int, reason: str) -> None:
+        with self._lock:
+            self.stats.stored_files += 1
+            self.stats.stored_bytes += size
+            setattr(self.stats, reason, getattr(self.stats, reason) + 1)
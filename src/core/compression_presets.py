@@ -0,0 +1,229 @@
+# compression_presets.py
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+from src.core.compression_policy import CompressionPolicy
+from src.core.config import get_shard_settings
+from src.core.entry_cache import EntryCache
+from src.core.seven_zip import run_7z, write_listfile
+from src.core.zip_parallel import SourceFile
+from src.core.zip_stream import DEFAULT_COMPRESS_LEVEL
+
+PRESET_NAMES: tuple[str, ...] = ("fast", "balanced", "release", "auto")
+DEFAULT_PRESET = "balanced"
+
+# Auto: source bytes per second the chosen settings must sustain (whole machine)
+DEFAULT_TARGET_RATE = 40 * 1024 * 1024
+# Auto: the trial archives at most this much of the project, in files of at most _SAMPLE_MAX_FILE
+AUTO_SAMPLE_BYTES = 16 * 1024 * 1024
+_SAMPLE_MAX_FILE = 4 * 1024 * 1024
+# Auto: levels tried for each backend (7-Zip's -mx, zlib's level)
+AUTO_SEVEN_ZIP_LEVELS: tuple[int, ...] = (1, 3, 5, 7, 9)
+AUTO_DEFLATE_LEVELS: tuple[int, ...] = (1, 3, 6, 9)
+
+
+@dataclass(frozen=True)
+class CompressionSettings:
+    """
+    How the base archive is compressed: the codec parameters (what to_dict() records in manifests and
+    build reports) and the options of one build that do not change them.
+    """
+    preset: str
+    deflate_level: int  # built-in writer (zlib level)
+    seven_zip_level: int  # 7-Zip -mx
+    seven_zip_threads: Optional[int] = None  # 7-Zip -mmt, None = 7-Zip's default (every core)
+    auto_target_rate: float = DEFAULT_TARGET_RATE  # "auto": source bytes/s the tuned settings must sustain
+    # stores already-compressed files (None = deflate everything); build_zip_set makes its own
+    policy: Optional[CompressionPolicy] = field(default=None, compare=False)
+    # compressed-entry cache shared with other builds (None = off)
+    cache: Optional[EntryCache] = field(default=None, compare=False)
+    # 7-Zip processes compressing at once, and how the files are split between them (zip_merge.shard_files)
+    shards: int = 1
+    shard_by: str = "size"
+
+    def seven_zip_switches(self) -> list[str]:
+        switches = [f"-mx={self.seven_zip_level}"]
+        if self.seven_zip_threads:
+            switches.append(f"-mmt={self.seven_zip_threads}")
+        return switches
+
+    def describe(self, seven_zip: bool) -> str:
+        if seven_zip:
+            return f"{self.preset} (7-Zip {' '.join(self.seven_zip_switches())})"
+        level = "default" if self.deflate_level == zlib.Z_DEFAULT_COMPRESSION else self.deflate_level
+        return f"{self.preset} (deflate level {level})"
+
+    def to_dict(self) -> dict:
+        return {"preset": self.preset, "deflate_level": self.deflate_level, "seven_zip_level": self.seven_zip_level,
+                "seven_zip_threads": self.seven_zip_threads}
+
+    def with_codec(self, codec: CompressionSettings) -> CompressionSettings:
+        """These build options with the preset and codec parameters of `codec`."""
+        return replace(self, preset=codec.preset, deflate_level=codec.deflate_level,
+                       seven_zip_level=codec.seven_zip_level, seven_zip_threads=codec.seven_zip_threads)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> CompressionSettings:
+        return cls(preset=str(data["preset"]), deflate_level=int(data["deflate_level"]),
+                   seven_zip_level=int(data["seven_zip_level"]),
+                   seven_zip_threads=int(data["seven_zip_threads"]) if data.get("seven_zip_threads") else None)
+
+
+PRESETS: dict[str, CompressionSettings] = {
+    # quick iteration builds: several times faster, noticeably larger
+    "fast": CompressionSettings("fast", deflate_level=1, seven_zip_level=1),
+    "balanced": CompressionSettings("balanced", deflate_level=DEFAULT_COMPRESS_LEVEL, seven_zip_level=5),
+    # Fab uploads: smallest archive, compression time does not matter much
+    "release": CompressionSettings("release", deflate_level=9, seven_zip_level=9),
+}
+
+
+def preset_settings(name: str, **options) -> CompressionSettings:
+    """
+    Fixed settings of a named preset ("auto" starts from "balanced" until tuned), with the build
+    `options` given (auto_target_rate, cache, shards...).
+    """
+    if name not in PRESET_NAMES:
+        raise ValueError(f"Unknown compression preset '{name}' (expected one of: {', '.join(PRESET_NAMES)})")
+    return replace(PRESETS["balanced"] if name == "auto" else PRESETS[name], **options, preset=name)
+
+
+def get_auto_target_rate(cfg: dict) -> float:
+    """Target throughput of the "auto" preset in bytes/s, from the app config (MB/s)."""
+    try:
+        mb_s = float(cfg.get("auto_compression_target_mb_s", 0) or 0)
+    except (TypeError, ValueError):
+        mb_s = 0.0
+    return mb_s * 1024 * 1024 if mb_s > 0 else DEFAULT_TARGET_RATE
+
+
+def compression_from_config(cfg: dict, preset: str = DEFAULT_PRESET) -> CompressionSettings:
+    """`preset` with the build options of the app config: entry cache, "auto" target rate, base zip shards."""
+    shards, shard_by = get_shard_settings(cfg)
+    return preset_settings(preset, auto_target_rate=get_auto_target_rate(cfg), cache=EntryCache.from_config(cfg),
+                           shards=shards, shard_by=shard_by)
+
+
+# --------------------------- Auto tuning ---------------------------- #
+
+@dataclass(frozen=True)
+class Trial:
+    """One trial compression of the sample."""
+    level: int
+    threads: int
+    in_bytes: int
+    out_bytes: int
+    seconds: float  # wall time (7-Zip) or CPU time of one thread (built-in writer)
+    rate: float  # estimated source bytes/s of the whole build with these settings
+
+    @property
+    def ratio(self) -> float:
+        return self.out_bytes / self.in_bytes if self.in_bytes else 1.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "ratio": round(self.ratio, 4)}
+
+
+def pick_sample(files: Sequence[SourceFile], policy: Optional[CompressionPolicy] = None,
+                budget: int = AUTO_SAMPLE_BYTES) -> list[SourceFile]:
+    """
+    Files spread evenly over the (sorted) project, up to `budget` bytes. Files the store policy keeps
+    uncompressed by extension are left out: their level does not matter.
+    """
+    candidates = sorted((f for f in files
+                         if 0 < f.size <= _SAMPLE_MAX_FILE and not (policy and policy.by_extension(f.arcname))),
+                        key=lambda f: f.arcname)
+    total = sum(f.size for f in candidates)
+    if total <= budget:
+        return candidates
+    # one byte in `stride` along the sorted tree, so each part of it (maps, textures, configs...) is represented
+    stride = total / budget
+    sample: list[SourceFile] = []
+    pos = used = 0
+    next_pos = 0.0
+    for f in candidates:
+        if pos >= next_pos and used + f.size <= budget:
+            sample.append(f)
+            used += f.size
+            next_pos = pos + f.size * stride
+        pos += f.size
+    return sample
+
+
+def _best(trials: Sequence[Trial], target_rate: float) -> Trial:
+    """Smallest output among the trials fast enough (fewest threads on a tie), else the fastest one."""
+    fast_enough = [t for t in trials if t.rate >= target_rate]
+    if not fast_enough:
+        return max(trials, key=lambda t: t.rate)
+    return min(fast_enough, key=lambda t: (t.out_bytes, t.threads, t.level))
+
+
+def tune_deflate(
+        sample: Sequence[SourceFile],
+        workers: int,
+        target_rate: float,
+        levels: Sequence[int] = AUTO_DEFLATE_LEVELS,
+        on_check_cancel: Optional[Callable[[], bool]] = None,
+) -> tuple[CompressionSettings, list[Trial]]:
+    """
+    Built-in writer: deflate the sample at each level on one thread and extrapolate to `workers`
+    threads (files are compressed independently, so it scales with the cores).
+    """
+    data = [f.path.read_bytes() for f in sample]
+    in_bytes = sum(len(d) for d in data)
+    trials: list[Trial] = []
+    for level in levels:
+        if on_check_cancel and on_check_cancel():
+            raise RuntimeError("Canceled")
+        start = time.thread_time()
+        out_bytes = sum(len(zlib.compress(d, level)) for d in data)
+        seconds = max(time.thread_time() - start, 1e-6)
+        trials.append(Trial(level, workers, in_bytes, out_bytes, seconds, in_bytes / seconds * workers))
+    best = _best(trials, target_rate)
+    return replace(PRESETS["balanced"], preset="auto", deflate_level=best.level), trials
+
+
+def _thread_counts() -> tuple[int, ...]:
+    cpus = os.cpu_count() or 1
+    return tuple(sorted({cpus, max(1, cpus // 2)}))
+
+
+def tune_seven_zip(
+        seven_zip: Path,
+        project_root: Path,
+        sample: Sequence[SourceFile],
+        target_rate: float,
+        levels: Sequence[int] = AUTO_SEVEN_ZIP_LEVELS,
+        thread_counts: Optional[Sequence[int]] = None,
+        on_check_cancel: Optional[Callable[[], bool]] = None,
+) -> tuple[CompressionSettings, list[Trial]]:
+    """7-Zip: archive the sample for real at each level and -mmt thread count, timing each run."""
+    in_bytes = sum(f.size for f in sample)
+    trials: list[Trial] = []
+    td = Path(tempfile.mkdtemp(prefix="ue_fab_tune_"))
+    try:
+        listfile = td / "files.txt"
+        write_listfile(listfile, (src.arcname for src in sample))
+        for threads in thread_counts or _thread_counts():
+            for level in levels:
+                out = td / f"trial-{level}-{threads}.zip"
+                args = [str(seven_zip), "a", "-tzip", f"-mx={level}", f"-mmt={threads}", "-y", "-scsUTF-8",
+                        str(out), f"@{listfile}"]
+                start = time.perf_counter()
+                run_7z(args, project_root, on_check_cancel=on_check_cancel)
+                seconds = max(time.perf_counter() - start, 1e-6)
+                trials.append(Trial(level, threads, in_bytes, out.stat().st_size, seconds, in_bytes / seconds))
+                out.unlink()
+    finally:
+        shutil.rmtree(td, ignore_errors=True)
+    best = _best(trials, target_rate)
+    return replace(PRESETS["balanced"], preset="auto", seven_zip_level=best.level,
+                   seven_zip_threads=best.threads), trials
@@ -4,11 +4,24 @@ import logging
 import shutil
 import sys
 from pathlib import Path
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_APP_CONFIG = {
-    "seven_zip_path": "7z"  # default: rely on PATH
+    "seven_zip_path": "7z",  # default: rely on PATH
+    "build_workers": 0,  # 0 = one per CPU core
+    "disk_parallelism": 4,  # max concurrent version zips written to the output disk
+    "incremental_build": True,  # keep the base zip to only recompress changed files next time
+    "use_ignore_files": False,  # also apply the project's .gitignore / .p4ignore rules
+    "batch_concurrency": 2,  # profiles built at once by "Build all profiles" / `cli batch`
+    "entry_cache_dir": "",  # compressed-entry cache shared by all builds ("" = <app>/cache/entries)
+    "entry_cache_max_mb": 4096,  # size cap of that cache (least recently used entries go first), 0 = off
+    "entry_cache_shared": False,  # the cache dir is shared by several machines: prefer it over 7-Zip
+    "auto_compression_target_mb_s": 40,  # "auto" preset: smallest output compressing at least this fast
+    "base_zip_shards": 1,  # 7-Zip processes compressing the base zip at once (merged afterwards), 1 = off
+    "base_zip_shard_by": "size",  # split the file list into balanced bins by "size" or by top-level "folder"
+    "debug_memory_stats": False,  # log read buffers allocated / reused and the peak RSS after each build
 }
 
 
@@ -53,7 +66,12 @@ def load_app_config() -> dict:
 
 def get_seven_zip_path(context) -> Path:
     """Return the 7z executable path configured by the user (or resolve via PATH)."""
-    raw = context.ui.cfg.get("seven_zip_path", "7z")
+    return resolve_seven_zip_path(context.ui.cfg)
+
+
+def resolve_seven_zip_path(cfg: dict) -> Path:
+    """Resolve the app config's seven_zip_path (file path, or a name looked up on PATH); no GUI needed."""
+    raw = cfg.get("seven_zip_path", "7z")
     p = Path(raw)
 
     # If user provided a real file path, use it
@@ -67,3 +85,19 @@ def get_seven_zip_path(context) -> Path:
 
     # Fall back to raw (guard clause will show the error)
     return p
+
+
+def get_shard_settings(cfg: dict) -> tuple[int, str]:
+    """Return (shards, shard_by) for the base zip from app config."""
+    try:
+        shards = max(1, int(cfg.get("base_zip_shards", 1) or 1))
+    except (TypeError, ValueError):
+        shards = 1
+    return shards, str(cfg.get("base_zip_shard_by", "size") or "size")
+
+
+def get_build_concurrency(cfg: dict) -> tuple[Optional[int], Optional[int]]:
+    """Return (max_workers, disk_parallelism) from app config; 0/missing means automatic."""
+    workers = int(cfg.get("build_workers", 0) or 0) or None
+    disk = int(cfg.get("disk_parallelism", DEFAULT_APP_CONFIG["disk_parallelism"]) or 0) or None
+    return workers, disk
@@ -0,0 +1,415 @@
+# entry_cache.py
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import socket
+import struct
+import itertools
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from src.core.buffers import iter_readinto
+from src.core.path_helpers import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached payload layout changes (old entries are then simply never hit)
+CACHE_FORMAT = 1
+
+DEFAULT_CACHE_MAX_BYTES = 4 * 1024 * 1024 * 1024
+# Smaller files are compressed again rather than looked up: hashing, the lookup and a new entry's
+# temp file + link cost more than deflating them (the same size as the writer's small-file batches)
+DEFAULT_MIN_ENTRY_SIZE = 64 * 1024
+
+# Each cached payload starts with: magic, crc32 and size of the source, size and crc32 of the payload.
+# The payload crc catches entries torn by a power loss (they are renamed into place without fsync); it is
+# checked while the payload is read, so a hit is read once.
+_HEADER = struct.Struct("<4sLQQL")
+_MAGIC = b"UEFC"
+
+CONTENT_HASH_CHUNK_SIZE = 1024 * 1024
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+# Temp files older than this were left by a crashed build and are removed by trim()
+STALE_TEMP_SECONDS = 24 * 3600
+# Entries used more recently than this are never evicted: another build (maybe on another host)
+# may be streaming them right now
+EVICT_MIN_IDLE_SECONDS = 10 * 60
+# Only one process trims a cache at a time; a lock older than this was left by a crashed one
+TRIM_LOCK_NAME = "trim.lock"
+TRIM_LOCK_STALE_SECONDS = 10 * 60
+
+_temp_ids = itertools.count()
+_HOST = "".join(c if c.isalnum() or c in "-_" else "_" for c in socket.gethostname()) or "host"
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file, read in chunks into a pooled buffer (for files too large to hold in memory)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter_readinto(f, CONTENT_HASH_CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    hit_bytes: int = 0  # source bytes served from the cache (not compressed again)
+    stored: int = 0
+    stored_bytes: int = 0  # compressed bytes added
+    evicted: int = 0
+    evicted_bytes: int = 0
+
+    def summary(self) -> str:
+        from src.core.utils import human_size
+
+        looked_up = self.hits + self.misses
+        rate = 100.0 * self.hits / looked_up if looked_up else 0.0
+        return (f"{self.hits} hit(s) / {self.misses} miss(es) ({rate:.0f}%), {human_size(self.hit_bytes)} not "
+                f"recompressed, {self.stored} stored ({human_size(self.stored_bytes)}), {self.evicted} evicted")
+
+
+@dataclass
+class CachedPayload:
+    """
+    A cache hit: entry values plus the open payload file (positioned at the payload).
+    Reading it checks the payload crc and raises ValueError on a mismatch (see EntryCache.discard).
+    """
+    crc: int
+    file_size: int
+    compress_size: int
+    fp: BinaryIO
+    payload_crc: int
+
+    def read(self) -> bytes:
+        data = self.fp.read(self.compress_size)
+        if len(data) != self.compress_size or zlib.crc32(data) != self.payload_crc:
+            raise ValueError("payload does not match its header")
+        return data
+
+    def iter_chunks(self) -> Iterator[memoryview]:
+        """The payload in chunks of one reused buffer: write each one before asking for the next."""
+        left = self.compress_size
+        check = 0
+        for chunk in iter_readinto(self.fp, _COPY_CHUNK_SIZE, limit=left):
+            left -= len(chunk)
+            check = zlib.crc32(chunk, check)
+            yield chunk
+        if left or check != self.payload_crc:
+            raise ValueError("payload does not match its header")
+
+    def close(self) -> None:
+        self.fp.close()
+
+
+@dataclass
+class EntryCache:
+    """
+    Content-addressed store of DEFLATE payloads: <root>/<2 hex>/<sha256>-<settings>.
+    Keys combine the source content hash with the compression settings, so archives of different
+    profiles (or forks of a template) reuse each other's compressed bytes. Files under `min_entry_size`
+    are not cached.
+    Entries are written to a temp file and renamed into place (a crash never leaves a partial entry)
+    and checked against their payload crc when read. The file mtime records the last use, and trim()
+    evicts the least recently used entries above `max_bytes`.
+    Thread-safe. Stats count this instance's lookups: use session() for per-build numbers.
+
+    The root may be a directory shared by several build machines (NFS / SMB mount). Nothing is ever
+    modified in place: temp names are unique per host and process, an entry is published with a
+    no-clobber hard link (first writer wins, a reader never sees a half-written or replaced file),
+    trim() runs under a lock file and, for a `shared` cache, leaves recently used entries alone.
+    With `shared`, the builder prefers this cache over 7-Zip, so a machine that never built a
+    template mostly copies compressed bytes.
+    """
+    root: Path
+    max_bytes: int = DEFAULT_CACHE_MAX_BYTES
+    shared: bool = False
+    min_entry_size: int = DEFAULT_MIN_ENTRY_SIZE
+    stats: CacheStats = field(default_factory=CacheStats, init=False)
+
+    def __post_init__(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: dict) -> Optional["EntryCache"]:
+        """Cache described by the app config, or None when disabled (entry_cache_max_mb = 0)."""
+        max_mb = int(cfg.get("entry_cache_max_mb", DEFAULT_CACHE_MAX_BYTES // (1024 * 1024)) or 0)
+        if max_mb <= 0:
+            return None
+        raw = str(cfg.get("entry_cache_dir") or "").strip()
+        return cls(Path(raw) if raw else get_cache_dir() / "entries", max_bytes=max_mb * 1024 * 1024,
+                   shared=bool(cfg.get("entry_cache_shared", False)))
+
+    def session(self) -> "EntryCache":
+        """Same cache, with its own stats (e.g. one per build of a batch)."""
+        return EntryCache(self.root, self.max_bytes, self.shared, self.min_entry_size)
+
+    def wants(self, file_size: int) -> bool:
+        """Whether a file of this size is worth looking up / storing (see DEFAULT_MIN_ENTRY_SIZE)."""
+        return file_size >= self.min_entry_size
+
+    @staticmethod
+    def key(digest: str, level: int) -> str:
+        return f"{digest}-deflate{level}-v{CACHE_FORMAT}"
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    # -------- Lookup -------- #
+
+    def open_payload(self, key: str, file_size: int) -> Optional[CachedPayload]:
+        """
+        Return the cached payload for `key` (caller closes it), or None on a miss.
+        Only the header and the file size are checked here; the payload crc is checked as it is read.
+        """
+        path = self.path_for(key)
+        try:
+            fp = open(path, "rb")
+        except OSError:
+            self._count_miss()
+            return None
+        try:
+            magic, crc, size, compress_size, payload_crc = _HEADER.unpack(fp.read(_HEADER.size))
+            if magic != _MAGIC or size != file_size:
+                raise ValueError("bad header")
+            if os.fstat(fp.fileno()).st_size != _HEADER.size + compress_size:
+                raise ValueError("payload does not match its header")
+        except (OSError, struct.error, ValueError) as e:
+            fp.close()
+            logger.warning("Dropping corrupt cache entry %s: %s", path.name, e)
+            self._unlink(path)
+            self._count_miss()
+            return None
+        try:
+            os.utime(path)  # last use, for LRU eviction
+        except OSError:
+            pass
+        with self._lock:
+            self.stats.hits += 1
+            self.stats.hit_bytes += file_size
+        return CachedPayload(crc=crc, file_size=size, compress_size=compress_size, fp=fp, payload_crc=payload_crc)
+
+    def get(self, key: str, file_size: int) -> Optional[tuple[int, bytes]]:
+        """(crc, payload) for a small entry, or None on a miss."""
+        hit = self.open_payload(key, file_size)
+        if hit is None:
+            return None
+        try:
+            payload = hit.read()
+        except (OSError, ValueError) as e:
+            hit.close()  # before discarding: Windows does not delete open files
+            self.discard(key, file_size, e)
+            return None
+        hit.close()
+        return hit.crc, payload
+
+    def discard(self, key: str, file_size: int, error: Exception) -> None:
+        """Drop an entry whose payload failed its check while being read (closed by now); its hit becomes a miss."""
+        logger.warning("Dropping corrupt cache entry %s: %s", key, error)
+        self._unlink(self.path_for(key))
+        with self._lock:
+            self.stats.hits -= 1
+            self.stats.hit_bytes -= file_size
+            self.stats.misses += 1
+
+    def _count_miss(self) -> None:
+        with self._lock:
+            self.stats.misses += 1
+
+    # -------- Insertion -------- #
+
+    def put(self, key: str, crc: int, file_size: int, payload: bytes) -> None:
+        """Store a payload; failures (disk full, permissions) are logged and ignored."""
+        pending = self.begin()
+        pending.write(payload)
+        pending.commit(key, crc, file_size)
+
+    def begin(self) -> "PendingEntry":
+        """Start storing a payload produced in chunks; its key is given on commit (see PendingEntry)."""
+        return PendingEntry(self)
+
+    def _stored(self, compress_size: int) -> None:
+        with self._lock:
+            self.stats.stored += 1
+            self.stats.stored_bytes += compress_size
+
+    # -------- Maintenance -------- #
+
+    def trim(self) -> None:
+        """
+        Evict least recently used entries until the cache fits in max_bytes (in a shared cache, entries used
+        in the last EVICT_MIN_IDLE_SECONDS are kept). Skipped while another process holds the trim lock.
+        """
+        lock = self.root / TRIM_LOCK_NAME
+        if not _try_lock(lock, TRIM_LOCK_STALE_SECONDS):
+            logger.info("Cache %s is being trimmed by another process", self.root)
+            return
+        try:
+            self._trim()
+        finally:
+            self._unlink(lock)
+
+    def _trim(self) -> None:
+        entries: list[tuple[int, int, str]] = []  # (mtime_ns, size, path)
+        total = 0
+        now = time.time_ns()
+        for bucket in os.scandir(self.root):
+            if not bucket.is_dir():
+                if bucket.name.endswith(".tmp") and _mtime_ns(bucket) < now - STALE_TEMP_SECONDS * 10 ** 9:
+                    self._unlink(Path(bucket.path))
+                continue
+            for e in os.scandir(bucket.path):
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, e.path))
+                total += st.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        # only another host can be streaming an entry we would evict; locally an open entry is not deleted
+        # (Windows) or stays readable (POSIX)
+        idle_before = now - EVICT_MIN_IDLE_SECONDS * 10 ** 9 if self.shared else None
+        for mtime, size, path in entries:
+            if total <= self.max_bytes or (idle_before is not None and mtime >= idle_before):
+                break
+            if self._unlink(Path(path)):
+                total -= size
+                with self._lock:
+                    self.stats.evicted += 1
+                    self.stats.evicted_bytes += size
+
+    @staticmethod
+    def _unlink(path: Path) -> bool:
+        try:
+            path.unlink(missing_ok=True)
+            return True
+        except OSError:
+            # e.g. open by a reader on Windows: evicted on a later trim
+            return False
+
+
+def _mtime_ns(entry: os.DirEntry) -> int:
+    try:
+        return entry.stat().st_mtime_ns
+    except OSError:
+        return time.time_ns()
+
+
+def _try_lock(path: Path, stale_seconds: float) -> bool:
+    """Create a lock file exclusively (works across hosts on NFS / SMB); break it once it is stale."""
+    for _attempt in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                age = time.time() - path.stat().st_mtime
+            except FileNotFoundError:
+                continue  # released meanwhile
+            if age < stale_seconds:
+                return False
+            logger.warning("Breaking stale lock %s (%.0f s old)", path, age)
+            EntryCache._unlink(path)
+            continue
+        except OSError as e:
+            logger.warning("Could not create lock %s: %s", path, e)
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(f"{socket.gethostname()} {os.getpid()}\n")
+        return True
+    return False
+
+
+def _publish(tmp: Path, path: Path) -> bool:
+    """
+    Move a finished temp file to its final name unless that name already exists.
+    A hard link fails atomically on an existing name (also over NFS), so concurrent writers of the
+    same key cannot replace a file someone is reading; where links are unsupported, fall back to
+    a rename. Returns False if another writer published the entry first.
+    """
+    try:
+        os.link(tmp, path)
+    except FileExistsError:
+        EntryCache._unlink(tmp)
+        return False
+    except OSError:
+        if path.exists():
+            EntryCache._unlink(tmp)
+            return False
+        os.replace(tmp, path)
+        return True
+    EntryCache._unlink(tmp)
+    return True
+
+
+class PendingEntry:
+    """
+    A payload being written to a temp file in the cache root; commit() renames it to its key.
+    The key is only needed at the end, so it can hash the very bytes that were compressed.
+    Write errors disable the entry instead of failing the build.
+    """
+
+    def __init__(self, cache: EntryCache):
+        self._cache = cache
+        # unique across the hosts sharing the cache
+        self._tmp = cache.root / f"pending-{_HOST}-{os.getpid()}-{next(_temp_ids)}.tmp"
+        self._size = self._crc = 0
+        self._fp: Optional[BinaryIO] = None
+        try:
+            self._fp = open(self._tmp, "wb")
+            self._fp.write(_HEADER.pack(_MAGIC, 0, 0, 0, 0))
+        except OSError as e:
+            self._fail(e)
+
+    def write(self, chunk: bytes) -> None:
+        if self._fp is None:
+            return
+        try:
+            self._fp.write(chunk)
+        except OSError as e:
+            self._fail(e)
+            return
+        self._size += len(chunk)
+        self._crc = zlib.crc32(chunk, self._crc)
+
+    def commit(self, key: str, crc: int, file_size: int) -> None:
+        """Publish the entry under `key` for a source of `file_size` bytes and CRC `crc` (see _publish)."""
+        if self._fp is None:
+            return
+        try:
+            self._fp.seek(0)
+            self._fp.write(_HEADER.pack(_MAGIC, crc, file_size, self._size, self._crc))
+            self._fp.close()
+            self._fp = None
+            path = self._cache.path_for(key)
+            path.parent.mkdir(exist_ok=True)
+            published = _publish(self._tmp, path)
+        except OSError as e:
+            self._fail(e)
+            return
+        if published:
+            self._cache._stored(self._size)
+
+    def discard(self) -> None:
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+        EntryCache._unlink(self._tmp)
+
+    def _fail(self, e: OSError) -> None:
+        logger.warning("Could not store cache entry %s: %s", self._tmp.name, e)
+        self.discard()
@@ -0,0 +1,227 @@
+# exclude_rules.py
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Ignore files that can be imported from the project root
+IGNORE_FILE_NAMES: tuple[str, ...] = (".gitignore", ".p4ignore")
+
+# Hidden entries at the project root (.vs, .git, ...) are always skipped, except .config
+BUILTIN_RULES: tuple[str, ...] = ("/.*", "!/.config")
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One gitignore-style rule, already split into its flags."""
+    pattern: str  # without the leading '!', leading '/' or trailing '/'
+    negated: bool = False  # '!pattern' re-includes what earlier rules excluded
+    dir_only: bool = False  # 'pattern/' only matches folders
+    anchored: bool = False  # '/pattern' or 'a/b': relative to the project root, else any depth
+
+    @property
+    def is_glob(self) -> bool:
+        return any(c in _GLOB_CHARS for c in self.pattern)
+
+    @property
+    def line(self) -> str:
+        """Normalized gitignore form ('!/Content/Temp/'), e.g. for build fingerprints."""
+        prefix = ("!" if self.negated else "") + ("/" if self.anchored else "")
+        return f"{prefix}{self.pattern}{'/' if self.dir_only else ''}"
+
+
+def parse_rule(line: str) -> Optional[Rule]:
+    """Parse one gitignore line; blank lines and comments give None."""
+    line = line.rstrip("\r\n")
+    if line.endswith(" ") and not line.endswith("\\ "):
+        line = line.rstrip(" ")
+    if not line or line.startswith("#"):
+        return None
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith("\\#") or line.startswith("\\!"):
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    anchored = "/" in line
+    line = line.lstrip("/")
+    if not line:
+        return None
+    return Rule(pattern=line, negated=negated, dir_only=dir_only, anchored=anchored)
+
+
+def load_ignore_file(path: Path) -> list[str]:
+    """Raw lines of a .gitignore / .p4ignore (empty if missing)."""
+    try:
+        return path.read_text(encoding="utf-8", errors="replace").splitlines()
+    except FileNotFoundError:
+        return []
+
+
+def merge_rules(*groups: Iterable[str]) -> tuple[str, ...]:
+    """
+    Concatenate rule lists in order, dropping a rule only where the same line comes again later
+    (the later copy matches the same entries and wins over it anyway).
+    """
+    lines = [line for group in groups for line in group]
+    last = {line: i for i, line in enumerate(lines)}
+    return tuple(line for i, line in enumerate(lines) if last[line] == i)
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore glob: '*' and '?' stop at '/', '**' spans folders."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i) and i + 2 == n and (i == 0 or pattern[i - 1] == "/"):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 2)
+            if end < 0:
+                out.append(re.escape("["))
+                i += 1
+                continue
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+@dataclass
+class _TrieNode:
+    children: dict[str, "_TrieNode"] = field(default_factory=dict)
+    rules: list[int] = field(default_factory=list)
+
+
+class ExcludeRules:
+    """
+    Ordered gitignore-style rules compiled for fast matching; the last matching rule wins.
+    Supported: negation (!), anchored paths (/a or a/b), folder-only rules (a/), '*', '?', '[..]'
+    and '**'. Rules are compiled once into:
+      - a dict of literal names (match at any depth) and of extensions ('*.pdb');
+      - a trie of literal root-anchored paths ('Content/Developers');
+      - one combined regex per kind for the remaining globs, ordered so the match is the last rule.
+    Excluding a folder excludes everything below it, as with git.
+    """
+
+    def __init__(self, lines: Iterable[str], builtin: bool = True):
+        self.rules: list[Rule] = [parse_rule(line) for line in BUILTIN_RULES] if builtin else []
+        for line in lines:
+            rule = parse_rule(line)
+            if rule:
+                self.rules.append(rule)
+
+        self._names: dict[str, list[int]] = {}
+        self._exts: dict[str, list[int]] = {}
+        self._trie = _TrieNode()
+        name_globs: list[tuple[int, str]] = []
+        path_globs: list[tuple[int, str]] = []
+        for idx, rule in enumerate(self.rules):
+            pattern = rule.pattern
+            if not rule.anchored:
+                ext = pattern[2:]
+                if pattern.startswith("*.") and ext and not any(c in _GLOB_CHARS or c == "." for c in ext):
+                    self._exts.setdefault(ext, []).append(idx)
+                elif not rule.is_glob:
+                    self._names.setdefault(pattern, []).append(idx)
+                else:
+                    name_globs.append((idx, pattern))
+            elif not rule.is_glob:
+                node = self._trie
+                for part in pattern.split("/"):
+                    node = node.children.setdefault(part, _TrieNode())
+                node.rules.append(idx)
+            else:
+                path_globs.append((idx, pattern))
+
+        # dir_only rules never apply to files, so files get their own regex without them
+        self._name_re = {is_dir: self._compile(name_globs, is_dir) for is_dir in (False, True)}
+        self._path_re = {is_dir: self._compile(path_globs, is_dir) for is_dir in (False, True)}
+
+    @classmethod
+    def for_project(
+            cls,
+            project_root: Path,
+            excludes: Iterable[str],
+            use_ignore_files: bool = False,
+    ) -> "ExcludeRules":
+        """Rules from the exclude list, then (optionally) the project's .gitignore / .p4ignore."""
+        lines = [e.replace("\\", "/") for e in excludes]
+        if use_ignore_files:
+            for name in IGNORE_FILE_NAMES:
+                imported = load_ignore_file(project_root / name)
+                if imported:
+                    logger.info("Imported %d line(s) from %s", len(imported), name)
+                lines += imported
+        return cls(lines)
+
+    def _compile(self, globs: list[tuple[int, str]], is_dir: bool) -> Optional[re.Pattern]:
+        # highest rule first: re tries alternatives in order, so the match is the last matching rule
+        parts = [f"(?P<r{idx}>{_glob_to_regex(p)})" for idx, p in reversed(globs)
+                 if is_dir or not self.rules[idx].dir_only]
+        return re.compile(rf"(?:{'|'.join(parts)})\Z") if parts else None
+
+    def _last_rule(self, relpath: str, name: str, is_dir: bool) -> int:
+        """Index of the last rule matching this entry itself, or -1."""
+        best = -1
+
+        def consider(indices: Iterable[int]):
+            nonlocal best
+            for idx in indices:
+                if idx > best and (is_dir or not self.rules[idx].dir_only):
+                    best = idx
+
+        consider(self._names.get(name, ()))
+        if "." in name:
+            consider(self._exts.get(name.rpartition(".")[2], ()))
+        node = self._trie
+        for part in relpath.split("/"):
+            node = node.children.get(part)
+            if node is None:
+                break
+        else:
+            consider(node.rules)
+        for regex, subject in ((self._name_re[is_dir], name), (self._path_re[is_dir], relpath)):
+            m = regex.match(subject) if regex else None
+            if m:
+                consider((int(m.lastgroup[1:]),))
+        return best
+
+    def excludes(self, relpath: str, name: str, is_dir: bool) -> bool:
+        """True if the entry itself is excluded (its parent folders are not checked)."""
+        idx = self._last_rule(relpath, name, is_dir)
+        return idx >= 0 and not self.rules[idx].negated
+
+    def excludes_path(self, relpath: str) -> bool:
+        """True if the file at relpath, or any of its parent folders, is excluded."""
+        parts = relpath.split("/")
+        for i in range(1, len(parts) + 1):
+            if self.excludes("/".join(parts[:i]), parts[i - 1], is_dir=i < len(parts)):
+                return True
+        return False
@@ -0,0 +1,137 @@
+# fastcopy.py
+from __future__ import annotations
+
+import errno
+import os
+import sys
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Optional
+
+from src.core.zip_stream import copy_exact
+
+# Linux ioctl number: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+# Kernel-side copies are issued in slices so a single call never blocks for too long
+_KERNEL_COPY_SLICE = 64 * 1024 * 1024
+
+# errno values meaning "this strategy is not available here", try the next one
+_UNSUPPORTED_ERRNOS = {
+    errno.EOPNOTSUPP, errno.ENOTSUP, errno.EXDEV, errno.EINVAL, errno.ENOTTY,
+    errno.ENOSYS, errno.EBADF, errno.EPERM,
+}
+
+
+@dataclass
+class CopyResult:
+    """How a byte range was cloned and how many bytes were physically moved."""
+    strategy: str  # "reflink", "copy_file_range", "sendfile" or "buffered"
+    bytes_copied: int  # 0 for a reflink (blocks are shared, nothing is written)
+
+
+def _try_reflink(src: BinaryIO, dst: BinaryIO, length: int) -> bool:
+    """Share src's blocks with dst (btrfs, XFS, ...), then cut dst to `length`."""
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    try:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        os.ftruncate(dst.fileno(), length)
+    except OSError as e:
+        if e.errno in _UNSUPPORTED_ERRNOS:
+            return False
+        raise
+    return True
+
+
+def _try_kernel_copy(
+        src: BinaryIO,
+        dst: BinaryIO,
+        length: int,
+        use_sendfile: bool,
+        on_chunk: Optional[Callable[[int], None]] = None,
+        dst_offset: int = 0,
+) -> bool:
+    """Copy src's [0, length) to dst at `dst_offset` without going through user space (copy_file_range or sendfile)."""
+    func = getattr(os, "sendfile" if use_sendfile else "copy_file_range", None)
+    if func is None or sys.platform == "win32":
+        return False
+    in_fd, out_fd = src.fileno(), dst.fileno()
+    offset = 0
+    while offset < length:
+        count = min(_KERNEL_COPY_SLICE, length - offset)
+        try:
+            if use_sendfile:
+                os.lseek(out_fd, dst_offset + offset, os.SEEK_SET)
+                done = os.sendfile(out_fd, in_fd, offset, count)
+            else:
+                done = os.copy_file_range(in_fd, out_fd, count, offset, dst_offset + offset)
+        except OSError as e:
+            if offset == 0 and e.errno in _UNSUPPORTED_ERRNOS:
+                return False
+            raise
+        if done == 0:
+            if offset == 0:
+                return False
+            raise OSError(errno.EIO, f"Source ended after {offset} of {length} bytes")
+        offset += done
+        if on_chunk:
+            on_chunk(done)
+    return True
+
+
+def clone_prefix(
+        src: BinaryIO,
+        dst: BinaryIO,
+        length: int,
+        on_chunk: Optional[Callable[[int], None]] = None,
+) -> CopyResult:
+    """
+    Make dst start with the first `length` bytes of src, using the cheapest available strategy:
+    reflink (FICLONE), then copy_file_range, then sendfile, then a buffered copy.
+    dst must be freshly opened and empty; on return its position is `length`.
+    `on_chunk(n)` reports progress in bytes and may raise to abort the copy.
+    """
+    dst.flush()
+    if _try_reflink(src, dst, length):
+        result = CopyResult("reflink", 0)
+        if on_chunk:
+            on_chunk(length)
+    elif _try_kernel_copy(src, dst, length, use_sendfile=False, on_chunk=on_chunk):
+        result = CopyResult("copy_file_range", length)
+    elif _try_kernel_copy(src, dst, length, use_sendfile=True, on_chunk=on_chunk):
+        result = CopyResult("sendfile", length)
+    else:
+        src.seek(0)
+        dst.seek(0)
+        dst.truncate()
+        copy_exact(src, dst, length, on_chunk=on_chunk)
+        return CopyResult("buffered", length)
+    dst.seek(length)
+    return result
+
+
+def append_prefix(
+        src: BinaryIO,
+        dst: BinaryIO,
+        length: int,
+        on_chunk: Optional[Callable[[int], None]] = None,
+) -> CopyResult:
+    """
+    Append the first `length` bytes of src at dst's current position: copy_file_range, then sendfile,
+    then a buffered copy (a reflink needs block-aligned offsets, which archive parts never are).
+    On return dst's position is right after the appended bytes.
+    """
+    dst.flush()
+    start = dst.tell()
+    if _try_kernel_copy(src, dst, length, use_sendfile=False, on_chunk=on_chunk, dst_offset=start):
+        result = CopyResult("copy_file_range", length)
+    elif _try_kernel_copy(src, dst, length, use_sendfile=True, on_chunk=on_chunk, dst_offset=start):
+        result = CopyResult("sendfile", length)
+    else:
+        src.seek(0)
+        dst.seek(start)
+        copy_exact(src, dst, length, on_chunk=on_chunk)
+        return CopyResult("buffered", length)
+    dst.seek(start + length)
+    return result
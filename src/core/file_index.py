@@ -0,0 +1,249 @@
+# file_index.py
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from src.core.path_helpers import get_cache_dir
+from src.core.exclude_rules import ExcludeRules
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    hash TEXT,
+    compressed_size INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+"""
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# A directory modified this close to its listing may change again within the same mtime tick (FAT keeps
+# 2 s, some network filesystems 1 s): it is listed again on the next refresh instead of being trusted
+RACY_MTIME_WINDOW_NS = 2 * 10 ** 9
+
+
+@dataclass(frozen=True)
+class IndexedFile:
+    """One file row of the project index (relpath uses '/' separators)."""
+    relpath: str
+    size: int
+    mtime_ns: int
+    inode: int
+    hash: Optional[str]
+    compressed_size: Optional[int]
+
+
+@dataclass
+class RefreshStats:
+    dirs_listed: int = 0  # directories whose mtime changed and were re-listed
+    dirs_reused: int = 0  # directories whose listing came from the index
+    files_changed: int = 0
+    files_removed: int = 0
+
+
+def default_index_path(project_root: Path) -> Path:
+    """<cache>/index/<project name>-<hash of its path>.sqlite"""
+    key = hashlib.sha1(str(project_root.resolve()).lower().encode("utf-8")).hexdigest()[:16]
+    folder = get_cache_dir() / "index"
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder / f"{project_root.name or 'project'}-{key}.sqlite"
+
+
+def _join(parent: str, name: str) -> str:
+    return f"{parent}/{name}" if parent else name
+
+
+class ProjectIndex:
+    """
+    Persistent index of a project tree, stored in a local SQLite file.
+    Holds (path, size, mtime_ns, inode, content hash, last compressed size) per file and is
+    refreshed incrementally: only directories whose mtime changed (or was too recent to trust, see
+    RACY_MTIME_WINDOW_NS) are listed again.
+    The one tree API of the app: the builder reads the file list from it, the plugin list its .uproject
+    (uproject_path) and the folder list the root entries (root_entries). Open one instance per thread.
+    """
+
+    def __init__(self, project_root: Path, db_path: Optional[Path] = None):
+        self.root = project_root.resolve()
+        self.db_path = db_path or default_index_path(self.root)
+        self._db = sqlite3.connect(str(self.db_path), timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA case_sensitive_like=ON")
+        self._db.executescript(_SCHEMA)
+
+    @classmethod
+    def for_project(cls, project_root: Path) -> Optional["ProjectIndex"]:
+        """Open the index only if project_root looks like a UE project (has a .uproject), else None."""
+        if not project_root.is_dir() or next(project_root.glob("*.uproject"), None) is None:
+            return None
+        return cls(project_root)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "ProjectIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -------- Refresh -------- #
+
+    def refresh(self, prune: Optional[ExcludeRules] = None) -> RefreshStats:
+        """
+        Bring the index up to date with the disk.
+        Folders matched by `prune` (e.g. Intermediate, Saved) are never descended into.
+        """
+        stats = RefreshStats()
+        stack = [""]
+        with self._db:
+            while stack:
+                rel = stack.pop()
+                for sub in self._refresh_dir(rel, stats):
+                    if not (prune and prune.excludes(sub, sub.rpartition("/")[2], is_dir=True)):
+                        stack.append(sub)
+        return stats
+
+    def _refresh_dir(self, rel: str, stats: RefreshStats) -> list[str]:
+        """Update one directory's direct children; return its subdirectories (relpaths)."""
+        db = self._db
+        try:
+            st = os.stat(self.root / rel)
+        except FileNotFoundError:
+            self._drop_subtree(rel, stats)
+            return []
+        row = db.execute("SELECT mtime_ns FROM dirs WHERE path=?", (rel,)).fetchone()
+
+        if row and row[0] == st.st_mtime_ns:
+            # Listing unchanged: only re-stat the files we already know about
+            stats.dirs_reused += 1
+            for path, size, mtime_ns in db.execute(
+                    "SELECT path, size, mtime_ns FROM files WHERE dir=?", (rel,)).fetchall():
+                try:
+                    fst = os.stat(self.root / path)
+                except FileNotFoundError:
+                    db.execute("DELETE FROM files WHERE path=?", (path,))
+                    stats.files_removed += 1
+                    continue
+                if (fst.st_size, fst.st_mtime_ns) != (size, mtime_ns):
+                    self._upsert_file(path, rel, fst)
+                    stats.files_changed += 1
+            return [p for (p,) in db.execute("SELECT path FROM dirs WHERE parent=?", (rel,))]
+
+        # Listing changed (or first visit): list it and diff against the index.
+        # The mtime taken *before* listing is stored, so a change during the listing triggers a rescan.
+        stats.dirs_listed += 1
+        racy = time.time_ns() - st.st_mtime_ns < RACY_MTIME_WINDOW_NS
+        files: dict[str, os.stat_result] = {}
+        subdirs: list[str] = []
+        with os.scandir(self.root / rel) as it:
+            for entry in it:
+                child = _join(rel, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(child)
+                elif entry.is_file():
+                    files[child] = entry.stat()
+
+        known = {p: (s, m) for p, s, m in db.execute(
+            "SELECT path, size, mtime_ns FROM files WHERE dir=?", (rel,))}
+        for path, fst in files.items():
+            # inode is informative only: DirEntry.stat() leaves it at 0 on Windows
+            if known.get(path) != (fst.st_size, fst.st_mtime_ns):
+                self._upsert_file(path, rel, fst)
+                stats.files_changed += 1
+        for path in known.keys() - files.keys():
+            db.execute("DELETE FROM files WHERE path=?", (path,))
+            stats.files_removed += 1
+        for (path,) in db.execute("SELECT path FROM dirs WHERE parent=?", (rel,)).fetchall():
+            if path not in subdirs:
+                self._drop_subtree(path, stats)
+        for sub in subdirs:
+            # placeholder mtime forces a listing on the first visit
+            db.execute("INSERT OR IGNORE INTO dirs(path, parent, mtime_ns) VALUES (?, ?, -1)", (sub, rel))
+        # a racy mtime is stored as the placeholder, which never matches: listed again next time
+        db.execute("INSERT OR REPLACE INTO dirs(path, parent, mtime_ns) VALUES (?, ?, ?)",
+                   (rel, rel.rpartition("/")[0] if rel else None, -1 if racy else st.st_mtime_ns))
+        return subdirs
+
+    def _upsert_file(self, path: str, parent: str, st: os.stat_result) -> None:
+        # content changed: the cached hash and compressed size no longer apply
+        self._db.execute(
+            "INSERT OR REPLACE INTO files(path, dir, size, mtime_ns, inode, hash, compressed_size) "
+            "VALUES (?, ?, ?, ?, ?, NULL, NULL)",
+            (path, parent, st.st_size, st.st_mtime_ns, st.st_ino),
+        )
+
+    def _drop_subtree(self, rel: str, stats: RefreshStats) -> None:
+        pattern = rel.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "/%"
+        cur = self._db.execute("DELETE FROM files WHERE dir=? OR dir LIKE ? ESCAPE '\\'", (rel, pattern))
+        stats.files_removed += cur.rowcount
+        self._db.execute("DELETE FROM dirs WHERE path=? OR path LIKE ? ESCAPE '\\'", (rel, pattern))
+
+    # -------- Queries -------- #
+
+    def files(self) -> list[IndexedFile]:
+        """Every indexed file, sorted by path."""
+        rows = self._db.execute(
+            "SELECT path, size, mtime_ns, inode, hash, compressed_size FROM files ORDER BY path")
+        return [IndexedFile(*r) for r in rows]
+
+    def root_entries(self) -> list[tuple[str, bool]]:
+        """(name, is_dir) of the project root's direct children; refreshes the root level only."""
+        with self._db:
+            self._refresh_dir("", RefreshStats())
+        dirs = [(p, True) for (p,) in self._db.execute("SELECT path FROM dirs WHERE parent=''")]
+        files = [(p, False) for (p,) in self._db.execute("SELECT path FROM files WHERE dir=''")]
+        return dirs + files
+
+    def uproject_path(self) -> Optional[Path]:
+        """The first .uproject at the project root, if any."""
+        for name, is_dir in sorted(self.root_entries()):
+            if not is_dir and name.endswith(".uproject"):
+                return self.root / name
+        return None
+
+    def file_hash(self, relpath: str) -> str:
+        """SHA-256 of a file's content, computed once and cached until the file changes."""
+        row = self._db.execute("SELECT hash FROM files WHERE path=?", (relpath,)).fetchone()
+        if row and row[0]:
+            return row[0]
+        h = hashlib.sha256()
+        with open(self.root / relpath, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._db:
+            self._db.execute("UPDATE files SET hash=? WHERE path=?", (digest, relpath))
+        return digest
+
+    def record_hashes(self, hashes: Iterable[tuple[str, int, int, str]]) -> None:
+        """
+        Store content hashes computed elsewhere, as (relpath, size, mtime_ns, sha256): only for rows
+        still describing that size and mtime, so a file changed meanwhile is not given a wrong hash.
+        """
+        with self._db:
+            self._db.executemany("UPDATE files SET hash=? WHERE path=? AND size=? AND mtime_ns=? AND hash IS NULL",
+                                 [(digest, rel, size, mtime_ns) for rel, size, mtime_ns, digest in hashes])
+
+    def record_compressed_sizes(self, sizes: Iterable[tuple[str, int]]) -> None:
+        """Store the compressed size each file had in the last archive."""
+        with self._db:
+            self._db.executemany("UPDATE files SET compressed_size=? WHERE path=?",
+                                 [(size, rel) for rel, size in sizes])
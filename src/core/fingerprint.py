@@ -0,0 +1,91 @@
+# fingerprint.py
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from src.core.version import APP_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Bump when the builder changes what it writes for the same inputs (invalidates every sidecar)
+BUILDER_FORMAT = 1
+SIDECAR_FORMAT = 1
+
+
+def fingerprint_path(zip_path: Path) -> Path:
+    """Sidecar next to an output archive: <name>.zip.fingerprint.json."""
+    return zip_path.with_name(zip_path.name + ".fingerprint.json")
+
+
+def tree_digest(files: Iterable[tuple[str, int, int]]) -> str:
+    """Digest of the archived file list as (relpath, size, mtime_ns), in any order."""
+    h = hashlib.sha256()
+    for rel, size, mtime_ns in sorted(files):
+        h.update(f"{rel}\0{size}\0{mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+@dataclass(frozen=True)
+class BuildInputs:
+    """Everything an output zip depends on, except its version (see output_fingerprint)."""
+    tree: str  # tree_digest of the files kept by the exclude rules
+    rules: tuple[str, ...]  # exclude rule lines, in order
+    plugins_to_strip: tuple[str, ...]
+    uproject_relpath: str
+    compression: tuple[str, ...]  # backend and its settings, e.g. ("7z", "-mx=5")
+
+    def output_fingerprint(self, engine_association: str) -> str:
+        data = {
+            "builder": [BUILDER_FORMAT, APP_VERSION],
+            "tree": self.tree,
+            "rules": list(self.rules),
+            "plugins_to_strip": sorted(self.plugins_to_strip),
+            "uproject": self.uproject_relpath,
+            "engine_association": engine_association,
+            "compression": list(self.compression),
+        }
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def is_up_to_date(zip_path: Path, fingerprint: str) -> bool:
+    """
+    True if `zip_path` was produced from the same inputs and was not touched since:
+    the sidecar holds the same fingerprint and the archive's size and mtime_ns.
+    """
+    try:
+        st = zip_path.stat()
+        data = json.loads(fingerprint_path(zip_path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        logger.warning("Ignoring unreadable fingerprint for %s: %s", zip_path, e)
+        return False
+    return (data.get("format") == SIDECAR_FORMAT
+            and data.get("fingerprint") == fingerprint
+            and data.get("size") == st.st_size
+            and data.get("mtime_ns") == st.st_mtime_ns)
+
+
+def save_fingerprint(zip_path: Path, fingerprint: str) -> None:
+    """Record the fingerprint of a finished output (temp file + rename)."""
+    st = zip_path.stat()
+    data = {"format": SIDECAR_FORMAT, "fingerprint": fingerprint, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    path = fingerprint_path(zip_path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def discard_fingerprint(zip_path: Path) -> None:
+    """Forget an output's fingerprint before rewriting it (a failed build never looks up to date)."""
+    try:
+        fingerprint_path(zip_path).unlink(missing_ok=True)
+    except OSError:
+        pass
+
@@ -0,0 +1,78 @@
+# manifest.py
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class ManifestRow:
+    """What a file looked like when it was archived."""
+    size: int
+    mtime_ns: int
+    crc: int
+
+
+def manifest_path(zip_path: Path) -> Path:
+    """Sidecar manifest next to an archive: <name>.zip.manifest.json."""
+    return zip_path.with_name(zip_path.name + ".manifest.json")
+
+
+def _read_manifest(path: Path) -> dict:
+    """Raw manifest data; missing, unreadable or other-format files give an empty dict."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning("Ignoring unreadable manifest %s: %s", path, e)
+        return {}
+    return data if data.get("format") == MANIFEST_FORMAT else {}
+
+
+def _rows(data: dict) -> dict[str, ManifestRow]:
+    return {rel: ManifestRow(*row) for rel, row in data.get("files", {}).items()}
+
+
+def load_manifest(path: Path) -> dict[str, ManifestRow]:
+    """Load a manifest (relpath -> ManifestRow); missing or unreadable files give an empty one."""
+    return _rows(_read_manifest(path))
+
+
+def save_manifest(path: Path, rows: Iterable[tuple[str, ManifestRow]], compression: Optional[dict] = None) -> None:
+    """Write a manifest atomically (temp file + rename), with the compression settings the archive was made with."""
+    data = {
+        "format": MANIFEST_FORMAT,
+        "compression": compression,
+        "files": {rel: [row.size, row.mtime_ns, row.crc] for rel, row in rows},
+    }
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@dataclass
+class PreviousArchive:
+    """A previous build's archive and its manifest, used to reuse unchanged compressed entries."""
+    zip_path: Path
+    manifest: dict[str, ManifestRow]
+    compression: Optional[dict] = None  # CompressionSettings.to_dict() of the archive, if recorded
+
+    @classmethod
+    def load(cls, zip_path: Path) -> Optional["PreviousArchive"]:
+        """Return the previous archive if both it and its manifest exist, else None."""
+        if not zip_path.is_file():
+            return None
+        data = _read_manifest(manifest_path(zip_path))
+        manifest = _rows(data)
+        if not manifest:
+            return None
+        return cls(zip_path=zip_path, manifest=manifest, compression=data.get("compression"))
@@ -50,3 +50,10 @@ def profile_path(name: str) -> Path:
     """Return path for a given profile JSON file."""
     safe = name.strip().replace("/", "_").replace("\\", "_")
     return get_profiles_dir() / f"{safe}.json"
+
+
+def get_cache_dir() -> Path:
+    """Return <project_root>/cache (project indexes and other rebuildable data)."""
+    p = get_project_root() / "cache"
+    p.mkdir(parents=True, exist_ok=True)
+    return p
@@ -38,6 +38,7 @@ class Profile:
     versions: List[ProfileVersionRef]
     plugins_to_strip: List[str] = None
     root_excludes: List[str] = None
+    compression_preset: str = "balanced"  # fast | balanced | release | auto (see compression_presets.py)
 
 
 # ---------- Catalog API ----------
@@ -116,6 +117,7 @@ def load_profile(name: str) -> Profile:
         versions=refs,
         plugins_to_strip=list(data.get("plugins_to_strip", []) or []),
         root_excludes=list(data.get("root_excludes", []) or []),
+        compression_preset=str(data.get("compression_preset", "balanced") or "balanced"),
     )
 
 
@@ -0,0 +1,226 @@
+# progress.py
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.core.path_helpers import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# Build stages in order; each one counts its own work units (files for the scan, bytes otherwise)
+STAGES: tuple[str, ...] = ("scan", "compress", "assemble", "verify")
+
+# Units per second assumed for a stage when no previous run of the profile is known
+DEFAULT_STAGE_RATES: dict[str, float] = {
+    "scan": 20_000.0,  # files
+    "compress": 40 * 1024 * 1024.0,  # source bytes
+    "assemble": 400 * 1024 * 1024.0,  # base bytes copied (all versions)
+    "verify": 1024 * 1024 * 1024.0,  # output bytes checked
+}
+
+# Until the base zip exists, its size is guessed from the source bytes
+COMPRESSED_RATIO_GUESS = 0.7
+
+# Smoothing of the measured throughput (exponential moving average over ~1 s samples)
+RATE_SMOOTHING = 0.3
+RATE_SAMPLE_INTERVAL = 1.0
+# Stages shorter than this keep their previous rate estimate
+MIN_MEASURED_DURATION = 0.1
+# Minimum delay between two events with the same whole percentage
+EVENT_INTERVAL = 0.25
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """Snapshot of the build progress, emitted to the UI / CLI."""
+    stage: str
+    stage_done: int
+    stage_total: int
+    percent: float  # 0..100 over all stages, weighted by their expected duration
+    rate: float  # smoothed units/s of the current stage (bytes/s except during the scan)
+    eta: Optional[float]  # seconds left for the whole build, None until it can be estimated
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def history_path(key: str) -> Path:
+    """<cache>/history/<key>.json"""
+    folder = get_cache_dir() / "history"
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder / f"{key}.json"
+
+
+def profile_key(project_root: Path, out_dir: Path) -> str:
+    """Identify a build profile by its project and output folder."""
+    digest = hashlib.sha1(f"{project_root.resolve()}|{out_dir.resolve()}".lower().encode("utf-8")).hexdigest()
+    return f"{project_root.name or 'project'}-{digest[:12]}"
+
+
+@dataclass
+class _Stage:
+    total: int = 0
+    done: int = 0
+    rate: float = 0.0  # units/s: previous run's measurement, then smoothed live measurement
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    sample_time: float = 0.0
+    sample_done: int = 0
+
+
+@dataclass
+class BuildProgress:
+    """
+    Byte-weighted progress over STAGES.
+    Each stage is worth its expected duration (units left / rate), so a slow compression weighs more
+    than a fast copy of the same size. Rates and totals start from the previous run of the same
+    profile (history file in the cache folder), then follow live measurements.
+    Thread-safe: advance() may be called from worker threads; events are sent one at a time, and their
+    percentage never goes back when a new measurement makes the rest of the build look longer.
+    """
+    on_event: Optional[Callable[[ProgressEvent], None]] = None
+    history_key: Optional[str] = None
+    versions: int = 1  # number of version zips assembled from the base
+    stages: dict[str, _Stage] = field(default_factory=dict, init=False)
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+        self._emit_lock = threading.Lock()  # held while an event is computed and sent, so they stay in order
+        self._current = STAGES[0]
+        self._sent_percent = 0.0
+        self._last_percent = -1
+        self._last_emit = 0.0
+        history = self._load_history()
+        self._seeded = bool(history)  # estimates start from a previous run
+        for name in STAGES:
+            seed = history.get(name, {})
+            self.stages[name] = _Stage(total=int(seed.get("total", 0)),
+                                       rate=float(seed.get("rate") or DEFAULT_STAGE_RATES[name]))
+
+    # -------- Feeding -------- #
+
+    def start(self, stage: str, total: Optional[int] = None) -> None:
+        with self._lock:
+            st = self.stages[stage]
+            if total is not None:
+                st.total = max(0, total)
+            st.done = 0
+            st.started = st.sample_time = time.perf_counter()
+            st.sample_done = 0
+            self._current = stage
+            if stage == "compress" and not self._seeded:
+                # nothing remembered: size the later stages from the source bytes
+                self.stages["assemble"].total = int(self.versions * st.total * COMPRESSED_RATIO_GUESS)
+                self.stages["verify"].total = self.stages["assemble"].total
+        self._emit(force=True)
+
+    def advance(self, stage: str, units: int) -> None:
+        with self._lock:
+            st = self.stages[stage]
+            st.done += units
+            self._sample(st)
+        self._emit()
+
+    def update(self, stage: str, done: int) -> None:
+        """Set a stage's absolute progress (for sources that report a position, like 7-Zip)."""
+        with self._lock:
+            st = self.stages[stage]
+            st.done = max(st.done, done)
+            self._sample(st)
+        self._emit()
+
+    def finish(self, stage: str) -> None:
+        with self._lock:
+            st = self.stages[stage]
+            st.finished = time.perf_counter()
+            # a stage may end up smaller than planned (e.g. reused entries): it is complete anyway
+            st.total = st.done = max(st.done, st.total)
+            # too short to be measured reliably: keep the previous estimate
+            if st.started is not None and st.done and st.finished - st.started >= MIN_MEASURED_DURATION:
+                st.rate = st.done / (st.finished - st.started)
+        self._emit(force=True)
+
+    def _sample(self, st: _Stage) -> None:
+        now = time.perf_counter()
+        elapsed = now - st.sample_time
+        if elapsed < RATE_SAMPLE_INTERVAL:
+            return
+        instant = (st.done - st.sample_done) / elapsed
+        st.rate = instant if st.sample_done == 0 else RATE_SMOOTHING * instant + (1 - RATE_SMOOTHING) * st.rate
+        st.sample_time, st.sample_done = now, st.done
+
+    # -------- Reporting -------- #
+
+    def snapshot(self) -> ProgressEvent:
+        with self._lock:
+            spent = left = 0.0
+            for st in self.stages.values():
+                rate = max(st.rate, 1e-9)
+                total = max(st.total, st.done)
+                spent += (total if st.finished else st.done) / rate
+                left += 0.0 if st.finished else (total - st.done) / rate
+            cur = self.stages[self._current]
+            percent = 100.0 * spent / (spent + left) if spent + left > 0 else 0.0
+            # no ETA until something was measured or remembered
+            known = any(st.finished or st.sample_done for st in self.stages.values()) or self._seeded
+            return ProgressEvent(stage=self._current, stage_done=cur.done, stage_total=max(cur.total, cur.done),
+                                 percent=percent, rate=cur.rate, eta=left if known else None)
+
+    def _emit(self, force: bool = False) -> None:
+        if not self.on_event:
+            return
+        with self._emit_lock:
+            event = self.snapshot()
+            if event.percent < self._sent_percent:
+                event = replace(event, percent=self._sent_percent)
+            self._sent_percent = event.percent
+            now = time.perf_counter()
+            whole = int(event.percent)
+            if not force and whole == self._last_percent and now - self._last_emit < EVENT_INTERVAL:
+                return
+            self._last_percent, self._last_emit = whole, now
+            self.on_event(event)
+
+    # -------- History -------- #
+
+    def _load_history(self) -> dict:
+        if not self.history_key:
+            return {}
+        try:
+            data = json.loads(history_path(self.history_key).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning("Ignoring unreadable build history %s: %s", self.history_key, e)
+            return {}
+        return data.get("stages", {})
+
+    def save_history(self) -> None:
+        """Remember this run's totals and rates to seed the next run's estimates."""
+        if not self.history_key:
+            return
+        with self._lock:
+            data = {"stages": {name: {"total": st.total, "rate": st.rate}
+                               for name, st in self.stages.items() if st.finished}}
+        path = history_path(self.history_key)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    """'1:02:03', '4:05', or '--:--' when unknown."""
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds + 0.5)
+    h, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
@@ -0,0 +1,35 @@
+# scanner.py
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterator
+
+from src.core.exclude_rules import ExcludeRules
+
+
+def walk_project(root: Path, rules: ExcludeRules) -> Iterator[tuple[str, int, int]]:
+    """
+    Yield (relpath, size, mtime_ns) for every non-excluded file under root; within each folder,
+    files come first, then subfolders, both in name order (stable archive layout).
+    Iterative os.scandir walk: stat data comes from the DirEntry, and excluded folders are
+    pruned before being descended into.
+    """
+    stack = [""]
+    while stack:
+        rel = stack.pop()
+        with os.scandir(root / rel if rel else root) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        subdirs: list[str] = []
+        for entry in entries:
+            child = f"{rel}/{entry.name}" if rel else entry.name
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if rules.excludes(child, entry.name, is_dir):
+                continue
+            if is_dir:
+                subdirs.append(child)
+            elif entry.is_file():
+                st = entry.stat()
+                yield child, st.st_size, st.st_mtime_ns
+        # reversed so the stack pops them in name order
+        stack.extend(reversed(subdirs))
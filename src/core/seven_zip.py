@@ -0,0 +1,135 @@
+# seven_zip.py
+from __future__ import annotations
+
+import os
+import queue
+import re
+import signal
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Sequence
+
+# How often the cancel flag is polled while 7-Zip runs
+CANCEL_POLL_INTERVAL = 0.05
+# Grace period between terminate and kill when canceling
+TERMINATE_TIMEOUT = 0.15
+
+# "-bsp1 -bso1": progress and messages on stdout, "-sccUTF-8": console output in UTF-8
+PROGRESS_SWITCHES: tuple[str, ...] = ("-bsp1", "-bso1", "-sccUTF-8")
+
+# Progress updates look like " 42% 118 + Content/Maps/m1.uasset" and are redrawn in place with
+# backspaces, so they are split on \b as well as on line breaks
+_PROGRESS_RE = re.compile(r"^\s*(\d{1,3})%(?:\s+\d+)?(?:\s+[+U=]\s+(.+?))?\s*$")
+_SPLIT_RE = re.compile(rb"[\r\n\b]+")
+
+
+def parse_progress(line: str) -> Optional[tuple[int, str]]:
+    """(percent, current file or '') from one 7-Zip progress update, else None."""
+    m = _PROGRESS_RE.match(line)
+    if not m:
+        return None
+    return min(100, int(m.group(1))), m.group(2) or ""
+
+
+def write_listfile(path: Path, arcnames: Iterable[str]) -> None:
+    """7-Zip listfile (@listfile): one root-relative name per line, read back with -scsUTF-8."""
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for name in arcnames:
+            f.write(f"{name}\n")
+
+
+def _read_output(stream, out: queue.Queue) -> None:
+    """Reader thread: push each decoded output segment, then None at EOF."""
+    pending = b""
+    try:
+        while chunk := stream.read1(64 * 1024):
+            parts = _SPLIT_RE.split(pending + chunk)
+            pending = parts.pop()
+            for part in parts:
+                if part.strip():
+                    out.put(part.decode("utf-8", errors="replace"))
+        if pending.strip():
+            out.put(pending.decode("utf-8", errors="replace"))
+    finally:
+        out.put(None)
+
+
+def _popen_group_kwargs() -> dict:
+    """Start 7-Zip in its own process group so cancel can stop it with anything it spawned."""
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.CREATE_NO_WINDOW}
+    return {"start_new_session": True}
+
+
+def _terminate_group(proc: subprocess.Popen) -> None:
+    """Terminate the process group, then kill it if it is still alive after TERMINATE_TIMEOUT."""
+    if sys.platform == "win32":
+        proc.terminate()  # TerminateProcess: immediate, 7z.exe does not spawn children
+    else:
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+    try:
+        proc.wait(timeout=TERMINATE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        if sys.platform == "win32":
+            proc.kill()
+        else:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        proc.wait()
+
+
+def run_7z(
+        args: Sequence[str],
+        cwd: Path,
+        on_progress: Optional[Callable[[int, str], None]] = None,
+        on_check_cancel: Optional[Callable[[], bool]] = None,
+) -> None:
+    """
+    Run a 7-Zip command with live progress.
+    `args` is the full command line; PROGRESS_SWITCHES are added after the command word.
+    on_progress(percent, current_file) is called for each progress update.
+    Cancellation is polled every CANCEL_POLL_INTERVAL: the process group is then terminated and
+    RuntimeError("Canceled") raised. A non-zero exit raises CalledProcessError with the last output lines.
+    """
+    cmd = [args[0], args[1], *PROGRESS_SWITCHES, *args[2:]]
+    proc = subprocess.Popen(cmd, cwd=str(cwd), stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, **_popen_group_kwargs())
+    lines: queue.Queue = queue.Queue()
+    reader = threading.Thread(target=_read_output, args=(proc.stdout, lines), name="7z-output", daemon=True)
+    reader.start()
+    tail: list[str] = []
+    last_percent = -1
+    try:
+        while True:
+            if on_check_cancel and on_check_cancel():
+                _terminate_group(proc)
+                raise RuntimeError("Canceled")
+            try:
+                line = lines.get(timeout=CANCEL_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if line is None:
+                break
+            progress = parse_progress(line)
+            if progress is None:
+                tail = (tail + [line.strip()])[-20:]
+            elif on_progress and (progress[0] != last_percent or progress[1]):
+                last_percent = progress[0]
+                on_progress(*progress)
+        returncode = proc.wait()
+    except BaseException:
+        if proc.poll() is None:
+            _terminate_group(proc)
+        raise
+    finally:
+        reader.join(timeout=1)
+        proc.stdout.close()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, output="\n".join(tail))
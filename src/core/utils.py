@@ -47,3 +47,12 @@ def build_zip_preview(pattern: str, template_dir: str, version_label: str) -> st
         # safe fallback if user typed a wrong placeholder
         base = f"{project}_{ueversion}"
     return f"{base}.zip"
+
+
+def human_size(num_bytes: float) -> str:
+    """Format a byte count for logs, e.g. 1536 -> '1.5 KB'."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num_bytes) < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
@@ -0,0 +1,74 @@
+# zip_merge.py
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+from src.core.fastcopy import append_prefix
+from src.core.zip_parallel import SourceFile
+from src.core.zip_stream import ZipEntry, ZipStreamWriter, read_archive_layout
+
+# How create_base_zip splits the file list into shards
+SHARD_MODES: tuple[str, ...] = ("size", "folder")
+
+
+def shard_files(files: Sequence[SourceFile], shards: int, mode: str = "size") -> list[list[SourceFile]]:
+    """
+    Split `files` into at most `shards` non-empty lists of similar total size.
+    "size" balances single files, "folder" keeps each top-level folder in one shard (root files together).
+    Groups are placed largest first onto the lightest shard; each shard keeps the order of `files`.
+    """
+    if mode not in SHARD_MODES:
+        raise ValueError(f"Unknown shard mode '{mode}' (expected one of: {', '.join(SHARD_MODES)})")
+    order = {f.arcname: i for i, f in enumerate(files)}
+    if mode == "folder":
+        by_top: dict[str, list[SourceFile]] = {}
+        for f in files:
+            top = f.arcname.split("/", 1)[0] if "/" in f.arcname else ""
+            by_top.setdefault(top, []).append(f)
+        groups = list(by_top.values())
+    else:
+        groups = [[f] for f in files]
+    groups.sort(key=lambda g: (-sum(f.size for f in g), order[g[0].arcname]))
+
+    bins: list[list[SourceFile]] = [[] for _ in range(max(1, shards))]
+    loads = [0] * len(bins)
+    for group in groups:
+        lightest = loads.index(min(loads))
+        bins[lightest].extend(group)
+        loads[lightest] += sum(f.size for f in group)
+    return [sorted(b, key=lambda f: order[f.arcname]) for b in bins if b]
+
+
+def merge_archives(
+        parts: Sequence[Path],
+        dst: Path,
+        on_chunk: Optional[Callable[[int], None]] = None,
+) -> list[ZipEntry]:
+    """
+    Merge archives with distinct entry names into `dst` without recompressing anything:
+    the data regions (local headers + payloads) are copied one after another, kernel-side when possible,
+    and one central directory is written for all of them with the shifted offsets.
+    `on_chunk(n)` reports copied bytes and may raise to abort (the partial file is removed).
+    Returns the entries of `dst`.
+    """
+    tmp = dst.with_name(dst.name + ".part")
+    try:
+        entries: list[ZipEntry] = []
+        with open(tmp, "wb") as fout:
+            for part in parts:
+                layout = read_archive_layout(part)
+                shift = fout.tell()
+                with open(part, "rb") as fin:
+                    append_prefix(fin, fout, layout.data_end, on_chunk=on_chunk)
+                for entry in layout.entries:
+                    entry.header_offset += shift
+                    entries.append(entry)
+            writer = ZipStreamWriter(fout, entries=entries)
+            writer.close()
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return writer.entries
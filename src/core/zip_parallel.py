@@ -0,0 +1,567 @@
+# zip_parallel.py
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Sequence, Union
+
+from src.core.buffers import DEFAULT_MMAP_THRESHOLD, get_pool, map_view, mapped_file, readinto_full
+from src.core.compression_policy import CompressionPolicy, Decision
+from src.core.entry_cache import EntryCache, content_digest, file_digest
+from src.core.manifest import PreviousArchive
+from src.core.zip_stream import (
+    DEFAULT_COMPRESS_LEVEL, PackedEntries, ZipEntry, ZipStreamWriter, deflate_bytes, read_archive_layout,
+)
+
+# RAM cap for file contents + compressed payloads waiting to be written
+DEFAULT_MAX_INFLIGHT_BYTES = 256 * 1024 * 1024
+
+# Files above this size are split into blocks deflated on several cores (pigz-style)
+DEFAULT_SPLIT_THRESHOLD = 16 * 1024 * 1024
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+
+# Files up to this size are read, compressed and written in batches: one pool job and one write per batch
+DEFAULT_SMALL_FILE_THRESHOLD = 64 * 1024
+# A batch is closed at this many source bytes or files (small enough to keep every worker busy)
+SMALL_BATCH_BYTES = 1024 * 1024
+SMALL_BATCH_FILES = 256
+
+# DEFLATE window: each block is primed with this much of the data preceding it
+_DEFLATE_WINDOW = 32 * 1024
+
+
+@dataclass
+class SourceFile:
+    """One file to archive: where it lives, its name in the archive and its stat data."""
+    path: Path
+    arcname: str
+    size: int
+    mtime_ns: int
+    mode: int
+    # SHA-256 of the content when known (project index), so the entry cache does not hash it again;
+    # set by the writer when it had to compute it
+    digest: Optional[str] = None
+
+
+def _entry_for(src: SourceFile) -> ZipEntry:
+    """ZipEntry with the same metadata zipfile.ZipFile.write would record."""
+    return ZipEntry(
+        name=src.arcname,
+        crc=0,
+        compress_size=0,
+        file_size=src.size,
+        compress_type=zipfile.ZIP_DEFLATED,
+        date_time=time.localtime(src.mtime_ns / 1e9)[:6],
+        external_attr=(src.mode & 0xFFFF) << 16,
+    )
+
+
+def _compress_file(
+        src: SourceFile,
+        level: int,
+        cache: Optional[EntryCache] = None,
+        policy: Optional[CompressionPolicy] = None,
+        mmap_threshold: int = 0,
+) -> tuple[ZipEntry, Union[bytes, memoryview]]:
+    """
+    Worker job: read and deflate one whole file (zlib releases the GIL while compressing).
+    With a `cache`, a payload already compressed from the same content is reused, and new ones are stored.
+    With a `policy`, the file may be stored instead, or deflated at another level.
+    Files of at least `mmap_threshold` bytes are mapped rather than read (a stored payload is then the
+    mapping itself, unmapped once written).
+    """
+    data = map_view(src.path, src.size, mmap_threshold)
+    return _compress_data(src, src.path.read_bytes() if data is None else data, level, cache, policy)
+
+
+def _compress_data(
+        src: SourceFile,
+        data: Union[bytes, memoryview],
+        level: int,
+        cache: Optional[EntryCache] = None,
+        policy: Optional[CompressionPolicy] = None,
+) -> tuple[ZipEntry, bytes]:
+    """Entry and payload of `src` from its content (see _compress_file)."""
+    entry = _entry_for(src)
+    entry.file_size = len(data)
+    if cache and not cache.wants(len(data)):
+        cache = None
+    decision = policy.decide(src.arcname, len(data), data) if policy else Decision(zipfile.ZIP_DEFLATED, level)
+    if decision.compress_type == zipfile.ZIP_DEFLATED:
+        # the index's digest describes the scanned file: only trusted if that is what was read
+        known = src.digest if len(data) == src.size else None
+        digest = (known or content_digest(data)) if cache else ""
+        if cache and not src.digest and len(data) == src.size:
+            src.digest = digest
+        cached = cache.get(cache.key(digest, decision.level), len(data)) if cache else None
+        if cached:
+            entry.crc, payload = cached
+        else:
+            start = time.thread_time()
+            payload = deflate_bytes(data, decision.level)
+            if policy:
+                policy.record_deflate(len(data), time.thread_time() - start)
+            entry.crc = zlib.crc32(data)
+            if cache:
+                # keyed by the bytes compressed, should the file have changed since the index refresh
+                cache.put(cache.key(content_digest(data) if known else digest, decision.level),
+                          entry.crc, len(data), payload)
+        if not policy or policy.keep_deflated(len(data), len(payload)):
+            entry.compress_size = len(payload)
+            return entry, payload
+    entry.compress_type = zipfile.ZIP_STORED
+    entry.crc = zlib.crc32(data)
+    entry.compress_size = len(data)
+    return entry, data
+
+
+def _read_small(path: Path, size: int) -> bytes:
+    """Whole content of a small file with plain os.read calls (no buffered file object, no extra fstat)."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        # one byte more than the scanned size, so a file that grew since is read to its end
+        chunks = [os.read(fd, size + 1)]
+        while chunks[-1]:
+            chunks.append(os.read(fd, max(size, DEFAULT_BLOCK_SIZE)))
+    finally:
+        os.close(fd)
+    return chunks[0] if len(chunks) == 2 else b"".join(chunks)
+
+
+def _compress_batch(
+        files: Sequence[SourceFile],
+        level: int,
+        cache: Optional[EntryCache] = None,
+        policy: Optional[CompressionPolicy] = None,
+) -> PackedEntries:
+    """
+    Worker job: read and compress a batch of small files and lay their entries out back to back,
+    so the writer appends the whole batch with one write instead of three per file.
+    """
+    packed = PackedEntries()
+    for src in files:
+        packed.add(*_compress_data(src, _read_small(src.path, src.size), level, cache, policy))
+    return packed
+
+
+class _HashingReader:
+    """Read-through wrapper hashing what is read, so a cache key matches the bytes actually compressed."""
+
+    def __init__(self, fp: BinaryIO):
+        self._fp = fp
+        self.sha256 = hashlib.sha256()
+
+    def read(self, n: int = -1) -> bytes:
+        data = self._fp.read(n)
+        self.sha256.update(data)
+        return data
+
+    def readinto(self, buf) -> int:
+        n = self._fp.readinto(buf)
+        with memoryview(buf) as view:
+            self.sha256.update(view[:n])
+        return n
+
+
+# --------------------------- CRC32 combine -------------------------- #
+# Port of zlib's crc32_combine (GF(2) matrix method), which Python's zlib does not expose.
+# A matrix is a list of 32 column vectors; the operator for a given length is cached since
+# every block but the last has the same size.
+
+def _gf2_times(mat: Sequence[int], vec: int) -> int:
+    out = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            out ^= mat[i]
+        vec >>= 1
+        i += 1
+    return out
+
+
+def _gf2_mult(a: Sequence[int], b: Sequence[int]) -> list[int]:
+    return [_gf2_times(a, col) for col in b]
+
+
+@lru_cache(maxsize=16)
+def _crc32_zeros_operator(nbytes: int) -> tuple[int, ...]:
+    """Matrix advancing a CRC32 over `nbytes` zero bytes."""
+    # operator for one zero bit, then squared up to one zero byte (8 bits)
+    op = [0xEDB88320] + [1 << n for n in range(31)]
+    for _ in range(3):
+        op = _gf2_mult(op, op)
+    result = [1 << n for n in range(32)]  # identity
+    while nbytes:
+        if nbytes & 1:
+            result = _gf2_mult(op, result)
+        nbytes >>= 1
+        if nbytes:
+            op = _gf2_mult(op, op)
+    return tuple(result)
+
+
+def crc32_combine(crc1: int, crc2: int, len2: int) -> int:
+    """CRC32 of A+B given crc1 = crc32(A), crc2 = crc32(B) and len2 = len(B)."""
+    if len2 <= 0:
+        return crc1
+    return _gf2_times(_crc32_zeros_operator(len2), crc1) ^ crc2
+
+
+# --------------------------- Block-parallel deflate ----------------- #
+
+def _deflate_block(block: memoryview, dictionary: bytes, last: bool, level: int) -> tuple[bytes, int, int, float]:
+    """
+    Worker job: deflate one block of a large file, primed with the preceding 32 KB.
+    Non-final blocks end on a sync flush (byte aligned, BFINAL=0) so the pieces concatenate
+    into one valid DEFLATE stream. Returns (payload, crc32(block), len(block), CPU seconds).
+    """
+    start = time.thread_time()
+    if dictionary:
+        comp = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=dictionary)
+    else:
+        comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+    payload = comp.compress(block) + comp.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return payload, zlib.crc32(block), len(block), time.thread_time() - start
+
+
+def _read_blocks(src: BinaryIO, block_size: int) -> Iterator[tuple[memoryview, Optional[bytearray]]]:
+    """Blocks of src read (readinto) into pooled buffers, each with its buffer, to release once deflated."""
+    buffers = get_pool(block_size)
+    while True:
+        buf = buffers.acquire()
+        length = readinto_full(src, buf)
+        if not length:
+            buffers.release(buf)
+            return
+        yield memoryview(buf)[:length], buf
+
+
+def _slice_blocks(data: memoryview, block_size: int) -> Iterator[tuple[memoryview, Optional[bytearray]]]:
+    """Blocks of a mapped file: slices of it, with no buffer to release."""
+    for start in range(0, len(data), block_size):
+        yield data[start:start + block_size], None
+
+
+def _deflate_blocks(
+        blocks: Iterable[tuple[memoryview, Optional[bytearray]]],
+        entry: ZipEntry,
+        pool: ThreadPoolExecutor,
+        level: int,
+        max_pending: int,
+        check_cancel: Callable[[], None],
+        on_chunk: Optional[Callable[[int], None]] = None,
+        policy: Optional[CompressionPolicy] = None,
+) -> Iterator[bytes]:
+    """
+    Deflate the blocks of one file (_read_blocks or _slice_blocks) on the pool and yield the payloads
+    in order. entry.crc / entry.file_size are combined from the per-block values along the way.
+    The blocks are handed to the workers as views; a pooled buffer goes back to its pool once its
+    block is collected.
+    """
+    pending: deque[tuple[Future, Optional[bytearray]]] = deque()
+    entry.crc = entry.file_size = 0
+
+    def _collect():
+        future, buf = pending.popleft()
+        payload, crc, length, cpu_seconds = future.result()
+        if buf is not None:
+            get_pool(len(buf)).release(buf)
+        if policy:
+            policy.record_deflate(length, cpu_seconds)
+        entry.crc = crc32_combine(entry.crc, crc, length)
+        entry.file_size += length
+        if on_chunk:
+            on_chunk(length)
+        return payload
+
+    try:
+        dictionary = b""
+        blocks = iter(blocks)
+        current = next(blocks, (memoryview(b""), None))
+        while True:
+            check_cancel()
+            # read ahead one block to know whether this one is the last
+            following = next(blocks, None)
+            last = following is None
+            block, buf = current
+            pending.append((pool.submit(_deflate_block, block, dictionary, last, level), buf))
+            # copied from a pooled buffer: it is refilled once this block is collected
+            dictionary = bytes(block[-_DEFLATE_WINDOW:]) if buf is not None else block[-_DEFLATE_WINDOW:]
+            while len(pending) >= max_pending or (last and pending):
+                yield _collect()
+            if last:
+                return
+            current = following
+    finally:
+        # buffers of blocks still queued are not released: a worker may be reading them
+        for future, _buf in pending:
+            future.cancel()
+
+
+def _write_stored(
+        writer: ZipStreamWriter,
+        entry: ZipEntry,
+        src: SourceFile,
+        view: Optional[memoryview],
+        on_chunk: Optional[Callable[[int], None]] = None,
+) -> None:
+    """Append src uncompressed, from its mapping when there is one."""
+    entry.compress_type = zipfile.ZIP_STORED
+    if view is not None:
+        writer.write_view(entry, view, on_chunk=on_chunk)
+        return
+    with open(src.path, "rb") as fin:
+        writer.write_stream(entry, fin, on_chunk=on_chunk)
+
+
+def _tee(chunks: Iterable[bytes], sink: Callable[[bytes], None]) -> Iterator[bytes]:
+    for chunk in chunks:
+        sink(chunk)
+        yield chunk
+
+
+def write_zip_parallel(
+        zip_path: Path,
+        files: Iterable[SourceFile],
+        workers: Optional[int] = None,
+        level: int = DEFAULT_COMPRESS_LEVEL,
+        max_inflight_bytes: int = DEFAULT_MAX_INFLIGHT_BYTES,
+        split_threshold: int = DEFAULT_SPLIT_THRESHOLD,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        previous: Optional[PreviousArchive] = None,
+        on_chunk: Optional[Callable[[int], None]] = None,
+        on_check_cancel: Optional[Callable[[], bool]] = None,
+        cache: Optional[EntryCache] = None,
+        policy: Optional[CompressionPolicy] = None,
+        small_file_threshold: int = DEFAULT_SMALL_FILE_THRESHOLD,
+        mmap_threshold: int = DEFAULT_MMAP_THRESHOLD,
+) -> list[ZipEntry]:
+    """
+    Write a deflated ZIP of `files` using several cores.
+
+    The caller's iterable acts as the scanner; a thread pool reads and compresses whole files;
+    this thread is the single writer and appends finished entries in scan order.
+    Files waiting in the pipeline never exceed `max_inflight_bytes`.
+    Files above `split_threshold` (or a quarter of the budget) are cut into `block_size` blocks
+    deflated in parallel and stitched into a single entry, once everything before them is written.
+    Files up to `small_file_threshold` (0 = off) are grouped into batches of consecutive files, each
+    read and compressed by one pool job and written with a single write (see _compress_batch).
+    Files of at least `mmap_threshold` bytes (0 = off) are memory-mapped (see buffers.map_view): CRC32,
+    zlib and hashlib work on slices of the mapping, with no copy into Python buffers. Files that cannot
+    be mapped, or changed size since the scan, are read as usual.
+
+    With `previous`, files whose size and mtime_ns match its manifest are raw-copied from the
+    previous archive (compressed bytes and CRC reused) instead of being read and compressed.
+    on_chunk(n) reports the source bytes of each compressed file (or block) once it is written;
+    raw-copied entries are not reported.
+    With a `cache` (see entry_cache.py), files whose content was compressed before, by any build,
+    reuse the cached payload; the others are compressed and added to it.
+    With a `policy` (see compression_policy.py), already-compressed files are stored and the deflate
+    level may vary per file; `level` is then only used where the policy does not decide.
+    Returns the written entries, one per file, in the order of `files`.
+    """
+    workers = workers or os.cpu_count() or 1
+    split_threshold = max(1, min(split_threshold, max_inflight_bytes // 4))
+    # each pending block holds its input and (at most) its output
+    max_pending_blocks = max(1, min(2 * workers, max_inflight_bytes // (2 * block_size)))
+    # (compress future or None, budget cost, previous entry to raw-copy or None), in scan order
+    pending: deque[tuple[Optional[Future], int, Optional[zipfile.ZipInfo]]] = deque()
+    inflight = 0
+    # consecutive small files not submitted yet, and their size
+    batch: list[SourceFile] = []
+    batch_bytes = 0
+
+    def _check_cancel():
+        if on_check_cancel and on_check_cancel():
+            raise RuntimeError("Canceled")
+
+    tmp_zip = zip_path.with_name(zip_path.name + ".part")
+    try:
+        with ExitStack() as stack:
+            fout = stack.enter_context(open(tmp_zip, "wb"))
+            pool = stack.enter_context(ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zip-deflate"))
+            writer = ZipStreamWriter(fout)
+
+            reusable: dict[str, zipfile.ZipInfo] = {}
+            if previous:
+                prev_zip = stack.enter_context(zipfile.ZipFile(previous.zip_path, "r"))
+                prev_fp = stack.enter_context(open(previous.zip_path, "rb"))
+                for info in prev_zip.infolist():
+                    row = previous.manifest.get(info.filename)
+                    if row and row.crc == info.CRC and row.size == info.file_size:
+                        reusable[info.filename] = info
+
+            def _write_next():
+                nonlocal inflight
+                future, cost, reused = pending.popleft()
+                if reused is not None:
+                    writer.copy_raw(prev_fp, reused)
+                    return
+                result = future.result()
+                if isinstance(result, PackedEntries):
+                    writer.write_packed(result)
+                    written = result.file_bytes
+                else:
+                    entry, payload = result
+                    writer.write_entry(entry, payload)
+                    written = entry.file_size
+                inflight -= cost
+                if on_chunk:
+                    on_chunk(written)
+
+            def _submit(cost: int, fn, *args):
+                nonlocal inflight
+                # in-memory cost: the files themselves plus (at most) their compressed copy
+                while pending and inflight + cost > max_inflight_bytes:
+                    _write_next()
+                pending.append((pool.submit(fn, *args), cost, None))
+                inflight += cost
+
+            def _flush_batch():
+                nonlocal batch, batch_bytes
+                if batch:
+                    _submit(2 * batch_bytes, _compress_batch, batch, level, cache, policy)
+                    batch, batch_bytes = [], 0
+
+            def _write_large(src: SourceFile):
+                with mapped_file(src.path, src.size, mmap_threshold) as view:
+                    _write_large_from(src, view)
+
+            def _write_large_from(src: SourceFile, view: Optional[memoryview]):
+                # view: the mapped file, or None to read it
+                entry = _entry_for(src)
+                if not policy:
+                    decision = Decision(zipfile.ZIP_DEFLATED, level)
+                elif view is not None:
+                    decision = policy.decide(src.arcname, src.size, view[:policy.sample_size])
+                else:
+                    decision = policy.decide_file(src.path, src.arcname, src.size)
+                if decision.compress_type == zipfile.ZIP_STORED:
+                    _write_stored(writer, entry, src, view, on_chunk)
+                    return
+                file_level = decision.level
+                known = src.digest
+                digest = ""
+                if cache:
+                    # a digest from the project index spares reading an unchanged file just to hash it
+                    digest = known or (content_digest(view) if view is not None else file_digest(src.path))
+                    src.digest = digest
+                hit = cache.open_payload(cache.key(digest, file_level), src.size) if cache else None
+                if hit:
+                    start = writer.tell()
+                    try:
+                        entry.crc, entry.file_size = hit.crc, hit.file_size
+                        writer.write_chunks(entry, hit.iter_chunks())
+                        bad = None
+                    except ValueError as e:
+                        bad = e
+                    finally:
+                        hit.close()
+                    if bad is None:
+                        if on_chunk:
+                            on_chunk(entry.file_size)
+                        return
+                    # torn or damaged entry, noticed while copying it: take it back out and compress the file
+                    writer.truncate(start)
+                    cache.discard(cache.key(digest, file_level), src.size, bad)
+                    entry = _entry_for(src)
+                spool = cache.begin() if cache else None
+                try:
+                    with ExitStack() as source:
+                        if view is not None:
+                            blocks = _slice_blocks(view, block_size)
+                        else:
+                            # hash what is actually compressed, should the file change after the lookup
+                            reader = _HashingReader(source.enter_context(open(src.path, "rb")))
+                            blocks = _read_blocks(reader, block_size)
+                        payloads = _deflate_blocks(blocks, entry, pool, file_level, max_pending_blocks,
+                                                   _check_cancel, on_chunk, policy)
+                        if spool:
+                            payloads = _tee(payloads, spool.write)
+                        writer.write_chunks(entry, payloads)
+                        if view is None:
+                            digest = reader.sha256.hexdigest()
+                        elif known and spool:
+                            # keyed by the bytes compressed, should the file have changed since the index refresh
+                            digest = content_digest(view)
+                except BaseException:
+                    if spool:
+                        spool.discard()
+                    raise
+                if spool:
+                    spool.commit(cache.key(digest, file_level), entry.crc, entry.file_size)
+
+            try:
+                for src in files:
+                    _check_cancel()
+                    reused = reusable.get(src.arcname)
+                    if reused is not None:
+                        row = previous.manifest[src.arcname]
+                        if row.size == src.size and row.mtime_ns == src.mtime_ns:
+                            _flush_batch()
+                            pending.append((None, 0, reused))
+                            continue
+                    if src.size <= small_file_threshold:
+                        batch.append(src)
+                        batch_bytes += src.size
+                        if batch_bytes >= SMALL_BATCH_BYTES or len(batch) >= SMALL_BATCH_FILES:
+                            _flush_batch()
+                        continue
+                    # keep archive order: whatever was scanned before this file goes first
+                    _flush_batch()
+                    if src.size > split_threshold:
+                        while pending:
+                            _write_next()
+                        _write_large(src)
+                        continue
+                    _submit(2 * src.size, _compress_file, src, level, cache, policy, mmap_threshold)
+                _flush_batch()
+                while pending:
+                    _check_cancel()
+                    _write_next()
+            except BaseException:
+                for future, _cost, _reused in pending:
+                    if future:
+                        future.cancel()
+                raise
+            writer.close()
+        os.replace(tmp_zip, zip_path)
+    except BaseException:
+        tmp_zip.unlink(missing_ok=True)
+        raise
+    return writer.entries
+
+
+def append_stored_files(
+        zip_path: Path,
+        files: Iterable[SourceFile],
+        on_chunk: Optional[Callable[[int], None]] = None,
+        on_check_cancel: Optional[Callable[[], bool]] = None,
+) -> list[ZipEntry]:
+    """
+    Add `files` uncompressed (STORED) after the last entry of an existing archive, or to a new one,
+    and rewrite the central directory. Used to store the already-compressed files next to what 7-Zip deflated.
+    The archive is left unusable on failure: callers remove it.
+    """
+    layout = read_archive_layout(zip_path) if zip_path.exists() else None
+    with open(zip_path, "r+b" if layout else "wb") as fp:
+        if layout:
+            fp.seek(layout.data_end)
+        writer = ZipStreamWriter(fp, entries=list(layout.entries) if layout else [])
+        for src in files:
+            if on_check_cancel and on_check_cancel():
+                raise RuntimeError("Canceled")
+            with mapped_file(src.path, src.size) as view:
+                _write_stored(writer, _entry_for(src), src, view, on_chunk)
+        writer.close()
+        fp.truncate()
+    return writer.entries
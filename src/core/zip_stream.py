@@ -0,0 +1,431 @@
+# zip_stream.py
+from __future__ import annotations
+
+import struct
+import sys
+import time
+import zipfile
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional
+
+from src.core.buffers import iter_readinto
+
+# --------------------------- ZIP record layout ---------------------- #
+
+_LOCAL_SIG = b"PK\x03\x04"
+_CENTRAL_SIG = b"PK\x01\x02"
+_EOCD_SIG = b"PK\x05\x06"
+_EOCD64_SIG = b"PK\x06\x06"
+_EOCD64_LOCATOR_SIG = b"PK\x06\x07"
+_DATA_DESCRIPTOR_SIG = b"PK\x07\x08"
+
+_LOCAL_STRUCT = struct.Struct("<4s5H3L2H")  # 30 bytes
+_CENTRAL_STRUCT = struct.Struct("<4s6H3L5H2L")  # 46 bytes
+_EOCD_STRUCT = struct.Struct("<4s4H2LH")  # 22 bytes
+_EOCD64_STRUCT = struct.Struct("<4sQ2H2L4Q")  # 56 bytes
+_EOCD64_LOCATOR_STRUCT = struct.Struct("<4sLQL")  # 20 bytes
+_DATA_DESCRIPTOR_STRUCT = struct.Struct("<4s3L")  # 16 bytes
+_DATA_DESCRIPTOR64_STRUCT = struct.Struct("<4sL2Q")  # 24 bytes
+
+_ZIP64_EXTRA_ID = 0x0001
+# 0xFFFFFFFF / 0xFFFF themselves mean "see the ZIP64 record", so values reaching them need ZIP64
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP_FILECOUNT_LIMIT = 0xFFFF
+
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+
+_VERSION_DEFAULT = 20
+_VERSION_ZIP64 = 45
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+DEFAULT_COMPRESS_LEVEL = zlib.Z_DEFAULT_COMPRESSION
+
+
+@dataclass
+class ZipEntry:
+    """Header fields of one archive entry, enough to (re)write its local and central records."""
+    name: str
+    crc: int
+    compress_size: int
+    file_size: int
+    compress_type: int = zipfile.ZIP_DEFLATED
+    date_time: tuple = (1980, 1, 1, 0, 0, 0)
+    flag_bits: int = 0
+    external_attr: int = 0
+    create_system: int = 0 if sys.platform == "win32" else 3
+    extra: bytes = b""  # central extra fields, without the ZIP64 block (regenerated on write)
+    comment: bytes = b""
+    header_offset: int = 0  # offset of the local header in the archive being written
+
+    @classmethod
+    def from_zipinfo(cls, info: zipfile.ZipInfo) -> "ZipEntry":
+        return cls(
+            name=info.filename,
+            crc=info.CRC,
+            compress_size=info.compress_size,
+            file_size=info.file_size,
+            compress_type=info.compress_type,
+            date_time=tuple(info.date_time),
+            # sizes are known up-front, so a trailing data descriptor is never needed
+            flag_bits=info.flag_bits & ~_FLAG_DATA_DESCRIPTOR,
+            external_attr=info.external_attr,
+            create_system=info.create_system,
+            extra=_strip_zip64_extra(info.extra),
+            comment=info.comment,
+        )
+
+
+# --------------------------- Encoding helpers ----------------------- #
+
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    """Remove ZIP64 blocks from an extra field (they are rebuilt for the new offsets)."""
+    out = bytearray()
+    i = 0
+    while i + 4 <= len(extra):
+        tag, size = struct.unpack_from("<HH", extra, i)
+        if tag != _ZIP64_EXTRA_ID:
+            out += extra[i:i + 4 + size]
+        i += 4 + size
+    return bytes(out)
+
+
+def _encode_name(entry: ZipEntry) -> tuple[bytes, int]:
+    """Return (encoded name, flag bits) following zipfile's ASCII / UTF-8 convention."""
+    try:
+        return entry.name.encode("ascii"), entry.flag_bits & ~_FLAG_UTF8
+    except UnicodeEncodeError:
+        return entry.name.encode("utf-8"), entry.flag_bits | _FLAG_UTF8
+
+
+def _dos_date_time(date_time: tuple) -> tuple[int, int]:
+    year, month, day, hour, minute, second = date_time[:6]
+    dos_date = (max(year, 1980) - 1980) << 9 | month << 5 | day
+    dos_time = hour << 11 | minute << 5 | (second // 2)
+    return dos_date, dos_time
+
+
+def local_header_bytes(entry: ZipEntry, force_zip64: bool = False) -> bytes:
+    """
+    Encode the local file header of an entry.
+    Without the data-descriptor flag the CRC and sizes are final; with it they are written as zero and
+    follow the data (see data_descriptor_bytes). `force_zip64` adds the ZIP64 block even for small sizes,
+    which also announces 8-byte sizes in the data descriptor.
+    """
+    name, flags = _encode_name(entry)
+    dos_date, dos_time = _dos_date_time(entry.date_time)
+    extra = b""
+    crc, file_size, compress_size = entry.crc, entry.file_size, entry.compress_size
+    if flags & _FLAG_DATA_DESCRIPTOR:
+        crc = file_size = compress_size = 0
+    version = _VERSION_DEFAULT
+    if force_zip64 or file_size >= _ZIP64_LIMIT or compress_size >= _ZIP64_LIMIT:
+        extra = struct.pack("<HHQQ", _ZIP64_EXTRA_ID, 16, file_size, compress_size)
+        file_size = compress_size = _ZIP64_LIMIT
+        version = _VERSION_ZIP64
+    header = _LOCAL_STRUCT.pack(
+        _LOCAL_SIG, version, flags, entry.compress_type, dos_time, dos_date,
+        crc, compress_size, file_size, len(name), len(extra),
+    )
+    return header + name + extra
+
+
+def data_descriptor_bytes(entry: ZipEntry, zip64: bool) -> bytes:
+    """Encode the data descriptor following a streamed entry (8-byte sizes if its local header has ZIP64)."""
+    struct_ = _DATA_DESCRIPTOR64_STRUCT if zip64 else _DATA_DESCRIPTOR_STRUCT
+    return struct_.pack(_DATA_DESCRIPTOR_SIG, entry.crc, entry.compress_size, entry.file_size)
+
+
+def central_header_bytes(entry: ZipEntry) -> bytes:
+    """Encode the central directory record of an entry, adding a ZIP64 block when needed."""
+    name, flags = _encode_name(entry)
+    dos_date, dos_time = _dos_date_time(entry.date_time)
+    zip64_fields: list[int] = []
+    file_size, compress_size, offset = entry.file_size, entry.compress_size, entry.header_offset
+    if file_size >= _ZIP64_LIMIT:
+        zip64_fields.append(file_size)
+        file_size = _ZIP64_LIMIT
+    if compress_size >= _ZIP64_LIMIT:
+        zip64_fields.append(compress_size)
+        compress_size = _ZIP64_LIMIT
+    if offset >= _ZIP64_LIMIT:
+        zip64_fields.append(offset)
+        offset = _ZIP64_LIMIT
+    extra = entry.extra
+    version = _VERSION_DEFAULT
+    if zip64_fields:
+        extra = struct.pack(f"<HH{len(zip64_fields)}Q", _ZIP64_EXTRA_ID, 8 * len(zip64_fields),
+                            *zip64_fields) + extra
+        version = _VERSION_ZIP64
+    header = _CENTRAL_STRUCT.pack(
+        _CENTRAL_SIG, version | entry.create_system << 8, version, flags, entry.compress_type,
+        dos_time, dos_date, entry.crc, compress_size, file_size,
+        len(name), len(extra), len(entry.comment), 0, 0, entry.external_attr, offset,
+    )
+    return header + name + extra + entry.comment
+
+
+def end_records_bytes(count: int, cd_offset: int, cd_size: int) -> bytes:
+    """Encode the end-of-central-directory record(s), with ZIP64 variants past the classic limits."""
+    out = b""
+    if count >= _ZIP_FILECOUNT_LIMIT or cd_offset >= _ZIP64_LIMIT or cd_size >= _ZIP64_LIMIT:
+        eocd64_offset = cd_offset + cd_size
+        out += _EOCD64_STRUCT.pack(
+            _EOCD64_SIG, _EOCD64_STRUCT.size - 12, _VERSION_ZIP64, _VERSION_ZIP64,
+            0, 0, count, count, cd_size, cd_offset,
+        )
+        out += _EOCD64_LOCATOR_STRUCT.pack(_EOCD64_LOCATOR_SIG, 0, eocd64_offset, 1)
+        count = min(count, _ZIP_FILECOUNT_LIMIT)
+        cd_offset = min(cd_offset, _ZIP64_LIMIT)
+        cd_size = min(cd_size, _ZIP64_LIMIT)
+    out += _EOCD_STRUCT.pack(_EOCD_SIG, 0, 0, count, count, cd_size, cd_offset, 0)
+    return out
+
+
+def deflate_bytes(data: bytes, level: int = DEFAULT_COMPRESS_LEVEL) -> bytes:
+    """Raw DEFLATE (no zlib header), as stored in ZIP entries."""
+    comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return comp.compress(data) + comp.flush()
+
+
+def local_data_offset(src: BinaryIO, header_offset: int) -> int:
+    """Return the offset of an entry's compressed data, given the offset of its local header."""
+    src.seek(header_offset)
+    header = src.read(_LOCAL_STRUCT.size)
+    if len(header) != _LOCAL_STRUCT.size or header[:4] != _LOCAL_SIG:
+        raise zipfile.BadZipFile(f"Bad local file header at offset {header_offset}")
+    fields = _LOCAL_STRUCT.unpack(header)
+    name_len, extra_len = fields[9], fields[10]
+    return header_offset + _LOCAL_STRUCT.size + name_len + extra_len
+
+
+def copy_exact(
+        src: BinaryIO,
+        dst: BinaryIO,
+        length: int,
+        chunk_size: int = COPY_CHUNK_SIZE,
+        on_chunk: Optional[Callable[[int], None]] = None,
+) -> None:
+    """
+    Copy exactly `length` bytes from src to dst in bounded chunks, read into one pooled buffer.
+    `on_chunk(n)` is called after each chunk with the number of bytes just copied; it may raise to abort.
+    """
+    remaining = length
+    for chunk in iter_readinto(src, chunk_size, limit=length):
+        dst.write(chunk)
+        remaining -= len(chunk)
+        if on_chunk:
+            on_chunk(len(chunk))
+    if remaining > 0:
+        raise zipfile.BadZipFile("Unexpected end of archive while copying entry data")
+
+
+@dataclass
+class ArchiveLayout:
+    """
+    An existing archive split into its data region and its central directory.
+    Bytes [0, data_end) hold every local header and payload; `entries` is the parsed
+    central directory, with offsets valid for any file starting with that same region.
+    """
+    path: Path
+    data_end: int
+    entries: list[ZipEntry]
+
+
+def read_archive_layout(path: Path) -> ArchiveLayout:
+    """Parse the central directory of `path` and locate where its data region ends."""
+    with zipfile.ZipFile(path, "r") as zf:
+        entries: list[ZipEntry] = []
+        for info in zf.infolist():
+            entry = ZipEntry.from_zipinfo(info)
+            # local headers are reused verbatim, so the central flags must match them
+            entry.flag_bits = info.flag_bits
+            entry.header_offset = info.header_offset
+            entries.append(entry)
+        data_end = zf.start_dir
+    return ArchiveLayout(path=path, data_end=data_end, entries=entries)
+
+
+@dataclass
+class PackedEntries:
+    """
+    Several finished entries laid out as they go in the archive (local header, then payload, back to back),
+    built off the writer thread so ZipStreamWriter.write_packed appends all of them with one write.
+    """
+    data: bytearray = field(default_factory=bytearray)
+    entries: list[ZipEntry] = field(default_factory=list)
+    offsets: list[int] = field(default_factory=list)  # of each local header within data
+    file_bytes: int = 0  # uncompressed size of the entries
+
+    def add(self, entry: ZipEntry, payload: bytes) -> None:
+        """Append an entry whose payload is already compressed and whose CRC/sizes are final."""
+        self.offsets.append(len(self.data))
+        self.data += local_header_bytes(entry)
+        self.data += payload
+        self.entries.append(entry)
+        self.file_bytes += entry.file_size
+
+
+def _compress_chunks(
+        entry: ZipEntry,
+        chunks: Iterable[memoryview],
+        level: int,
+        on_chunk: Optional[Callable[[int], None]] = None,
+) -> Iterator[bytes]:
+    """Deflate (or pass through, for a stored entry) source chunks, setting entry.crc / entry.file_size."""
+    comp = zlib.compressobj(level, zlib.DEFLATED, -15) if entry.compress_type == zipfile.ZIP_DEFLATED else None
+    entry.crc = entry.file_size = 0
+    for chunk in chunks:
+        entry.file_size += len(chunk)
+        entry.crc = zlib.crc32(chunk, entry.crc)
+        yield comp.compress(chunk) if comp else chunk
+        if on_chunk:
+            on_chunk(len(chunk))
+    if comp:
+        yield comp.flush()
+
+
+# --------------------------- Sequential writer ---------------------- #
+
+@dataclass
+class ZipStreamWriter:
+    """
+    Append-only ZIP writer.
+    Entries are written one after another and the central directory is emitted on close(),
+    so the output is produced in a single forward pass.
+    """
+    fp: BinaryIO
+    # entries already present before fp's position (e.g. a copied data region)
+    entries: list[ZipEntry] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._offset = self.fp.tell()
+
+    def tell(self) -> int:
+        return self._offset
+
+    def _write(self, data: bytes) -> None:
+        self.fp.write(data)
+        self._offset += len(data)
+
+    def truncate(self, offset: int) -> None:
+        """Drop everything written from `offset` on (an entry whose payload turned out bad); fp must be seekable."""
+        self.fp.seek(offset)
+        self.fp.truncate()
+        self._offset = offset
+        self.entries = [e for e in self.entries if e.header_offset < offset]
+
+    def copy_raw(self, src: BinaryIO, info: zipfile.ZipInfo) -> ZipEntry:
+        """
+        Copy one entry from an open source archive without decompressing it.
+        The compressed bytes, CRC and sizes are kept; only the headers are re-emitted.
+        """
+        entry = ZipEntry.from_zipinfo(info)
+        data_offset = local_data_offset(src, info.header_offset)
+        entry.header_offset = self._offset
+        self._write(local_header_bytes(entry))
+        src.seek(data_offset)
+        copy_exact(src, self.fp, entry.compress_size)
+        self._offset += entry.compress_size
+        self.entries.append(entry)
+        return entry
+
+    def write_entry(self, entry: ZipEntry, payload: bytes) -> ZipEntry:
+        """Append an entry whose payload is already compressed and whose CRC/sizes are final."""
+        entry.header_offset = self._offset
+        self._write(local_header_bytes(entry))
+        self._write(payload)
+        self.entries.append(entry)
+        return entry
+
+    def write_packed(self, packed: PackedEntries) -> list[ZipEntry]:
+        """Append a batch of entries prepared with PackedEntries in a single write."""
+        for entry, offset in zip(packed.entries, packed.offsets):
+            entry.header_offset = self._offset + offset
+        self._write(packed.data)
+        self.entries.extend(packed.entries)
+        return packed.entries
+
+    def write_chunks(self, entry: ZipEntry, chunks: Iterable[bytes]) -> ZipEntry:
+        """
+        Append an entry whose compressed payload arrives in pieces (too large to hold in memory).
+        The CRC and sizes go in a data descriptor after the payload, so the output is never seeked
+        back into. entry.file_size is the expected size and decides whether ZIP64 (8-byte) sizes
+        are announced; the producer of `chunks` must have set entry.crc and entry.file_size once
+        it is exhausted.
+        """
+        zip64 = entry.file_size * 1.05 >= _ZIP64_LIMIT
+        entry.flag_bits |= _FLAG_DATA_DESCRIPTOR
+        entry.header_offset = self._offset
+        entry.compress_size = 0
+        self._write(local_header_bytes(entry, force_zip64=zip64))
+        for chunk in chunks:
+            entry.compress_size += len(chunk)
+            self._write(chunk)
+        if not zip64 and (entry.file_size >= _ZIP64_LIMIT or entry.compress_size >= _ZIP64_LIMIT):
+            raise zipfile.LargeZipFile(f"{entry.name} grew past the 4 GB limit while being archived")
+        self._write(data_descriptor_bytes(entry, zip64))
+        self.entries.append(entry)
+        return entry
+
+    def write_stream(
+            self,
+            entry: ZipEntry,
+            src: BinaryIO,
+            level: int = DEFAULT_COMPRESS_LEVEL,
+            on_chunk: Optional[Callable[[int], None]] = None,
+    ) -> ZipEntry:
+        """
+        Compress src chunk by chunk on the calling thread into a new entry.
+        Chunks are read into a pooled buffer; stored chunks are written straight from it.
+        """
+        chunks = iter_readinto(src, COPY_CHUNK_SIZE)
+        return self.write_chunks(entry, _compress_chunks(entry, chunks, level, on_chunk))
+
+    def write_view(
+            self,
+            entry: ZipEntry,
+            data: memoryview,
+            level: int = DEFAULT_COMPRESS_LEVEL,
+            on_chunk: Optional[Callable[[int], None]] = None,
+    ) -> ZipEntry:
+        """write_stream() for content already in memory (e.g. a mapped file), sliced without copies."""
+        chunks = (data[i:i + COPY_CHUNK_SIZE] for i in range(0, len(data), COPY_CHUNK_SIZE))
+        return self.write_chunks(entry, _compress_chunks(entry, chunks, level, on_chunk))
+
+    def write_bytes(
+            self,
+            name: str,
+            data: bytes,
+            compress_type: int = zipfile.ZIP_DEFLATED,
+            date_time: Optional[tuple] = None,
+            external_attr: int = 0o644 << 16,
+    ) -> ZipEntry:
+        """Compress (or store) an in-memory payload and append it as a new entry."""
+        if compress_type == zipfile.ZIP_DEFLATED:
+            payload = deflate_bytes(data)
+        elif compress_type == zipfile.ZIP_STORED:
+            payload = data
+        else:
+            raise ValueError(f"Unsupported compression type: {compress_type}")
+        entry = ZipEntry(
+            name=name.replace("\\", "/"),
+            crc=zlib.crc32(data),
+            compress_size=len(payload),
+            file_size=len(data),
+            compress_type=compress_type,
+            date_time=date_time or time.localtime(time.time())[:6],
+            external_attr=external_attr,
+        )
+        return self.write_entry(entry, payload)
+
+    def close(self) -> None:
+        """Write the central directory and end records."""
+        cd_offset = self._offset
+        for entry in self.entries:
+            self._write(central_header_bytes(entry))
+        self._write(end_records_bytes(len(self.entries), cd_offset, self._offset - cd_offset))
+        self.fp.flush()
@@ -15,8 +15,10 @@ from PySide6.QtWidgets import (
 from src.gui.page_one.folder_lists import selected_root_excludes
 from src.gui.page_one.plugin_lists import selected_plugins_to_strip
 from src.gui.windows.ui_main import UI_MainWindow
-from src.gui.workers import BuildParams, BuildWorker, BuildController
-from src.core.config import get_seven_zip_path
+from src.gui.workers import BatchWorker, BuildParams, BuildWorker, BuildController
+from src.core.batch import BatchJob, ProfileError, get_batch_concurrency, profile_build_kwargs, validate_build_kwargs
+from src.core.config import get_seven_zip_path, get_build_concurrency
+from src.core.compression_presets import DEFAULT_PRESET, compression_from_config
 from src.gui.page_one.ui_bridge import UiBridge
 
 logger = logging.getLogger(__name__)
@@ -174,6 +176,7 @@ class Actions(QObject):
         self.ctx.ui_page_one().edTemplate.setText(profile.template_dir)
         self.ctx.ui_page_one().edOut.setText(profile.output_dir)
         self.ctx.ui_page_one().edPattern.setText(profile.zip_pattern or "{project}_{ueversion}")
+        self.ctx.main_window.page_one.cmbPreset.setCurrentText(profile.compression_preset or DEFAULT_PRESET)
 
         # Build items: one per catalog entry; fallback to catalog path if profile has empty override
         self.ctx.versions_model.clear()
@@ -224,7 +227,8 @@ class Actions(QObject):
             zip_pattern=self.ctx.ui_page_one().edPattern.text().strip() or "{project}_{ueversion}",
             versions=refs,
             plugins_to_strip=plugins_to_strip,
-            root_excludes=root_excludes
+            root_excludes=root_excludes,
+            compression_preset=self.ctx.main_window.page_one.cmbPreset.currentText() or DEFAULT_PRESET,
         )
 
     def get_checked_versions(self) -> List[Tuple[str, str]]:
@@ -340,11 +344,15 @@ class Actions(QObject):
             return
 
         plugins_to_strip = set(selected_plugins_to_strip(self.ctx.main_window.page_one.plugins_model))
-        root_excludes = set(selected_root_excludes(self.ctx.main_window.page_one.root_entries_model))
+        # anchored ('/Name'): only the root entry, not same-named folders deeper in the tree
+        root_model = self.ctx.main_window.page_one.root_entries_model
+        root_excludes = [f"/{name}" for name in selected_root_excludes(root_model)]
 
         logger.info("Plugins marked for removal: %s", plugins_to_strip)
         logger.info("Root files/directories marked for exclude: %s", root_excludes)
 
+        max_workers, disk_parallelism = get_build_concurrency(self.ctx.ui.cfg)
+
         # Worker Builder
         params = BuildParams(
             project_root=template_dir,
@@ -354,6 +362,13 @@ class Actions(QObject):
             seven_zip_path=seven_zip_path,
             plugins_to_strip=plugins_to_strip,
             root_excludes=root_excludes,
+            max_workers=max_workers,
+            disk_parallelism=disk_parallelism,
+            incremental=bool(self.ctx.ui.cfg.get("incremental_build", True)),
+            use_ignore_files=bool(self.ctx.ui.cfg.get("use_ignore_files", False)),
+            compression=compression_from_config(
+                self.ctx.ui.cfg, self.ctx.main_window.page_one.cmbPreset.currentText() or DEFAULT_PRESET),
+            debug_memory=bool(self.ctx.ui.cfg.get("debug_memory_stats", False)),
         )
         worker = BuildWorker(params)
         self.build_ctrl = BuildController(worker, parent_thread_parent=self.ctx.main_window)
@@ -369,11 +384,55 @@ class Actions(QObject):
         # UI state
         self.ctx.ui_page_one().txtLogs.clear()
         self.ctx.ui_page_one().progressBar.setValue(0)
-        self.ctx.ui_page_one().btnBuild.setEnabled(False)
-        self.ctx.ui_page_one().btnCancel.setEnabled(True)
+        self._set_build_buttons_enabled(False)
 
         self.build_ctrl.start()
 
+    def on_build_batch_clicked(self):
+        """Build every saved profile that is set up, sharing one CPU / disk budget."""
+        jobs: list[BatchJob] = []
+        skipped: list[str] = []
+        for name in list_profile_names():
+            try:
+                kwargs = profile_build_kwargs(name, self.ctx.ui.cfg)
+                validate_build_kwargs(kwargs)
+                if not kwargs["out_dir"].is_dir():
+                    raise ProfileError(f"Invalid output directory: {kwargs['out_dir']}")
+            except (ProfileError, OSError) as e:
+                skipped.append(f"{name}: {e}")
+                continue
+            jobs.append(BatchJob(name=name, kwargs=kwargs))
+
+        # Guard clause: nothing to build
+        if not jobs:
+            QMessageBox.critical(self.ctx.main_window, "Build all profiles",
+                                 "No profile is ready to build.\n\n" + "\n".join(skipped))
+            return
+
+        text = "Build the saved profiles:\n" + "\n".join(f"  - {job.name}" for job in jobs)
+        if skipped:
+            text += "\n\nSkipped:\n" + "\n".join(f"  - {s}" for s in skipped)
+        answer = QMessageBox.question(self.ctx.main_window, "Build all profiles", text)
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+
+        worker = BatchWorker(jobs, concurrency=get_batch_concurrency(self.ctx.ui.cfg))
+        self.build_ctrl = BuildController(worker, parent_thread_parent=self.ctx.main_window)
+        self.ui_bridge = UiBridge(self.ctx.ui_page_one(), parent=self)
+        self.build_ctrl.connect_signals(ui_bridge=self.ui_bridge)
+
+        # UI state
+        self.ctx.ui_page_one().txtLogs.clear()
+        self.ctx.ui_page_one().progressBar.setValue(0)
+        self._set_build_buttons_enabled(False)
+
+        self.build_ctrl.start()
+
+    def _set_build_buttons_enabled(self, enabled: bool):
+        self.ctx.ui_page_one().btnBuild.setEnabled(enabled)
+        self.ctx.main_window.page_one.btnBuildAll.setEnabled(enabled)
+        self.ctx.ui_page_one().btnCancel.setEnabled(not enabled)
+
     @Slot(str)
     def _on_build_log(self, text: str):
         logger.info("_on_build_log")
@@ -412,8 +471,7 @@ class Actions(QObject):
         logger.info("_restore_idle_state")
 
         # UI state
-        self.ctx.ui_page_one().btnBuild.setEnabled(True)
-        self.ctx.ui_page_one().btnCancel.setEnabled(False)
+        self._set_build_buttons_enabled(True)
 
         ctrl = getattr(self, "build_ctrl", None)
         if not ctrl:
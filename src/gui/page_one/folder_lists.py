@@ -7,6 +7,8 @@ from typing import Iterable, Set
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QStandardItem, QStandardItemModel
 
+from src.core.file_index import ProjectIndex
+
 # Roles
 USERROLE_ENTRY_NAME = Qt.ItemDataRole.UserRole + 200
 USERROLE_ENTRY_IS_DIR = Qt.ItemDataRole.UserRole + 201
@@ -17,23 +19,28 @@ DEFAULT_HIDDEN_ROOT: set[str] = {
 }
 
 
-def discover_root_entries(project_root: Path, extra_hidden: Iterable[str] = ()) -> list[Path]:
-    """Return root-level paths to display (sorted: dirs first), excluding hidden."""
+def discover_root_entries(project_root: Path, extra_hidden: Iterable[str] = ()) -> list[tuple[str, bool]]:
+    """Return root-level (name, is_dir) to display (sorted: dirs first), excluding hidden."""
     if not project_root or not project_root.exists():
         return []
 
     hidden = set(DEFAULT_HIDDEN_ROOT) | set(extra_hidden)
-    entries: list[Path] = []
+    index = ProjectIndex.for_project(project_root)
+    if index:
+        with index:
+            listing = index.root_entries()
+    else:
+        listing = [(child.name, child.is_dir()) for child in project_root.iterdir()]
 
-    for child in project_root.iterdir():
-        name = child.name
+    entries: list[tuple[str, bool]] = []
+    for name, is_dir in listing:
         if name in hidden:
             continue
         # hide the .uproject itself by name
         if name.endswith(".uproject"):
             continue
-        entries.append(child)
-    entries.sort(key=lambda p: (not p.is_dir(), p.name.lower()))
+        entries.append((name, is_dir))
+    entries.sort(key=lambda e: (not e[1], e[0].lower()))
     return entries
 
 
@@ -47,17 +54,13 @@ def populate_root_entries_model(
     if not project_root.exists():
         return
     pre = set(preselected_excludes or [])
-    # also find a specific .uproject file to hide by exact name
-    uproject = next(project_root.glob("*.uproject"), None)
-    extra_hidden = {uproject.name} if uproject else set()
-    for path in discover_root_entries(project_root, extra_hidden):
-        name = path.name
+    for name, is_dir in discover_root_entries(project_root):
         it = QStandardItem(name)
         it.setEditable(False)
         it.setCheckable(True)
         it.setCheckState(Qt.CheckState.Checked if name in pre else Qt.CheckState.Unchecked)
         it.setData(name, USERROLE_ENTRY_NAME)
-        it.setData(path.is_dir(), USERROLE_ENTRY_IS_DIR)
+        it.setData(is_dir, USERROLE_ENTRY_IS_DIR)
         root_model.appendRow(it)
 
 
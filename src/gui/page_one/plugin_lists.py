@@ -8,6 +8,8 @@ from typing import Set
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QStandardItem, QStandardItemModel
 
+from src.core.file_index import ProjectIndex
+
 # Roles
 USERROLE_PLUGIN_NAME = Qt.ItemDataRole.UserRole + 100
 USERROLE_PLUGIN_ENABLED = Qt.ItemDataRole.UserRole + 101
@@ -15,7 +17,11 @@ USERROLE_PLUGIN_ENABLED = Qt.ItemDataRole.UserRole + 101
 
 def scan_project_plugins(project_root: Path) -> list[tuple[str, bool]]:
     """Return list of (plugin_name, enabled) from <root>/*.uproject."""
-    uproject = next(project_root.glob("*.uproject"), None)
+    index = ProjectIndex.for_project(project_root)
+    if not index:
+        return []
+    with index:
+        uproject = index.uproject_path()
     if not uproject or not uproject.is_file():
         return []
     try:
@@ -6,6 +6,7 @@ from typing import TYPE_CHECKING
 # LOAD UI MAIN
 # ///////////////////////////////////////////////////////////////
 from src.gui.windows.ui_main import *
+from src.core.compression_presets import DEFAULT_PRESET, PRESET_NAMES
 from src.core.profiles import AppVersion, load_versions_catalog, ensure_default_profile_exists
 from src.core.version import APP_VERSION, APP_NAME
 from src.gui.page_one.actions import AppContext, Actions
@@ -19,6 +20,10 @@ if TYPE_CHECKING:
     from src.gui.windows.main_windows import MainWindow  # imported only for type hints
 
 
+# Delay between the last keystroke in the project path and the plugin/folder lists refresh
+PROJECT_PATH_DEBOUNCE_MS = 300
+
+
 # PY WINDOW
 # ///////////////////////////////////////////////////////////////
 class SetupPageOne(QObject):
@@ -40,8 +45,12 @@ class SetupPageOne(QObject):
         self.root_entries_model = QStandardItemModel(self.w)
         self.ui_page_one().listFolders.setModel(self.root_entries_model)
 
-        # Refresh when project root changes
-        self.ui_page_one().edTemplate.textChanged.connect(self._on_project_path_changed)
+        # Refresh when project root changes, debounced so typing a path doesn't rescan on every keystroke
+        self._project_path_timer = QTimer(self.w)
+        self._project_path_timer.setSingleShot(True)
+        self._project_path_timer.setInterval(PROJECT_PATH_DEBOUNCE_MS)
+        self._project_path_timer.timeout.connect(self._on_project_path_changed)
+        self.ui_page_one().edTemplate.textChanged.connect(self._project_path_timer.start)
 
         # Initial fill
         self._on_project_path_changed()
@@ -89,6 +98,23 @@ class SetupPageOne(QObject):
 
         apply_btn_svg_icon(self.ui_page_one().btnOpenOut, "icon_folder_open.svg")
 
+        # Batch button (not in the .ui): next to Build / Cancel
+        self.btnBuildAll = QPushButton("Build all profiles", self.ui_page_one().page_1)
+        self.btnBuildAll.setObjectName("btnBuildAll")
+        self.btnBuildAll.setToolTip("Build every saved profile, one compressing while another writes its zips")
+        apply_btn_svg_icon(self.btnBuildAll, "icon_package.svg")
+        layout = self.ui_page_one().horizontalLayout
+        layout.insertWidget(layout.indexOf(self.ui_page_one().btnCancel) + 1, self.btnBuildAll)
+
+        # Compression preset of the profile (not in the .ui): before the Build button
+        self.cmbPreset = QComboBox(self.ui_page_one().page_1)
+        self.cmbPreset.setObjectName("cmbPreset")
+        self.cmbPreset.addItems(PRESET_NAMES)
+        self.cmbPreset.setCurrentText(DEFAULT_PRESET)
+        self.cmbPreset.setToolTip("Compression: fast (iteration), balanced, release (Fab upload, smallest), "
+                                  "auto (tuned on a sample of the project)")
+        layout.insertWidget(layout.indexOf(self.ui_page_one().btnBuild), self.cmbPreset)
+
         # Listen pattern change
         self.ui_page_one().edPattern.textChanged.connect(self.actions.update_version_previews)
 
@@ -106,6 +132,7 @@ class SetupPageOne(QObject):
         # Build button
         self.ui_page_one().btnBuild.clicked.connect(self.actions.on_build_clicked)
         self.ui_page_one().btnCancel.clicked.connect(self.actions.on_cancel_clicked)
+        self.btnBuildAll.clicked.connect(self.actions.on_build_batch_clicked)
 
         ensure_default_profile_exists()
 
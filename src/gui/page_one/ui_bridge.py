@@ -1,6 +1,10 @@
 # ui_bridge.py
 from PySide6.QtCore import QObject, Slot, Qt, QMetaObject, Q_ARG
 
+from src.core.batch import BatchStatus
+from src.core.progress import ProgressEvent, format_eta
+from src.core.utils import human_size
+
 
 class UiBridge(QObject):
     def __init__(self, ui, parent=None):
@@ -24,6 +28,25 @@ class UiBridge(QObject):
             Q_ARG(int, value),
         )
 
+    @Slot(object)
+    def progress_event(self, event: ProgressEvent):
+        # e.g. "42% - compress - 85.3 MB/s - ETA 3:12" (scan rate is in files/s)
+        rate = f"{event.rate:.0f} files/s" if event.stage == "scan" else f"{human_size(event.rate)}/s"
+        self._set_progress_format(f"%p% - {event.stage} - {rate} - ETA {format_eta(event.eta)}")
+
+    @Slot(object)
+    def batch_status(self, status: BatchStatus):
+        # e.g. "42% - 1/3 profiles - 85.3 MB/s"
+        self._set_progress_format(f"%p% - {status.jobs_done}/{status.jobs_total} profiles - "
+                                  f"{human_size(status.rate)}/s")
+
+    def _set_progress_format(self, text: str):
+        QMetaObject.invokeMethod(
+            self.ui.progressBar, "setFormat",
+            Qt.QueuedConnection,
+            Q_ARG(str, text),
+        )
+
     @Slot(list)
     def finished(self):
         QMetaObject.invokeMethod(
@@ -31,6 +54,7 @@ class UiBridge(QObject):
             Qt.QueuedConnection,
             Q_ARG(int, 100),
         )
+        self._set_progress_format("%p%")
         QMetaObject.invokeMethod(
             self.ui.txtLogs, "appendPlainText",
             Qt.QueuedConnection,
@@ -46,6 +70,7 @@ class UiBridge(QObject):
             Qt.QueuedConnection,
             Q_ARG(str, f"ERROR: {msg}"),
         )
+        self._set_progress_format("%p%")
         QMetaObject.invokeMethod(self, "_restore_idle_state_proxy", Qt.QueuedConnection)
 
     @Slot()
@@ -55,6 +80,7 @@ class UiBridge(QObject):
             Qt.QueuedConnection,
             Q_ARG(str, "Canceled."),
         )
+        self._set_progress_format("%p%")
         QMetaObject.invokeMethod(self, "_restore_idle_state_proxy", Qt.QueuedConnection)
 
     @Slot()
@@ -10,7 +10,10 @@ from typing import Optional, Sequence, Tuple
 from PySide6.QtCore import QObject, Signal, Slot, QThread, Qt
 
 # Import your build orchestrator and the cancel helper
+from src.core.batch import BatchJob, BatchStatus, BuildBudget, run_batch
 from src.core.builder import build_zip_set
+from src.core.compression_presets import CompressionSettings
+from src.core.progress import ProgressEvent
 from src.gui.page_one.ui_bridge import UiBridge
 
 
@@ -26,7 +29,18 @@ class BuildParams:
     # optional: plugins to strip (names)
     plugins_to_strip: Optional[set[str]] = None
     # optional: root file/directories to excludes (names)
-    root_excludes: Optional[set[str]] = None
+    root_excludes: Optional[list[str]] = None
+    # apply the project's .gitignore / .p4ignore after the exclude list
+    use_ignore_files: bool = False
+    # optional: per-version assembly concurrency (None = automatic)
+    max_workers: Optional[int] = None
+    disk_parallelism: Optional[int] = None
+    # keep the base zip in <output>/.ue_fab_cache for incremental rebuilds
+    incremental: bool = True
+    # compression preset with its build options: entry cache, "auto" target, 7-Zip shards (None = balanced)
+    compression: Optional[CompressionSettings] = None
+    # log read buffers allocated / reused and the peak RSS at the end
+    debug_memory: bool = False
 
 
 class BuildWorker(QObject):
@@ -36,6 +50,7 @@ class BuildWorker(QObject):
     """
     sig_log = Signal(str)  # human-readable log line
     sig_progress = Signal(int)  # 0..100
+    sig_progress_event = Signal(object)  # ProgressEvent: stage, throughput, ETA
     sig_finished = Signal(list)  # list[Path] of produced zips (as str)
     sig_error = Signal(str)  # error message + optional traceback
     sig_canceled = Signal()  # build was canceled cooperatively
@@ -59,10 +74,17 @@ class BuildWorker(QObject):
                 seven_zip=self._params.seven_zip_path,
                 plugins_to_strip=self._params.plugins_to_strip,
                 excludes=self._params.root_excludes,
+                use_ignore_files=self._params.use_ignore_files,
+                max_workers=self._params.max_workers,
+                disk_parallelism=self._params.disk_parallelism,
+                incremental=self._params.incremental,
+                compression=self._params.compression,
+                debug_memory=self._params.debug_memory,
                 # wire callbacks to Qt signals
                 on_log=self._on_log,
                 on_progress=self._on_progress,
                 on_check_cancel=self._on_check_cancel,
+                on_event=self._on_event,
 
             )
         except RuntimeError as e:
@@ -84,7 +106,7 @@ class BuildWorker(QObject):
     def cancel(self):
         """Request cooperative cancellation."""
         self._cancel_event.set()
-        # Note: actual process termination is handled inside builder via on_check_cancel.
+        # The builder polls on_check_cancel; a running 7-Zip is terminated within ~200 ms.
 
     # -------- Callback bridges (builder -> Qt) -------- #
 
@@ -97,10 +119,68 @@ class BuildWorker(QObject):
         v = 0 if value < 0 else 100 if value > 100 else value
         self.sig_progress.emit(v)
 
+    def _on_event(self, event: ProgressEvent):
+        self.sig_progress_event.emit(event)
+
     def _on_check_cancel(self) -> bool:
         return self._cancel_event.is_set()
 
 
+class BatchWorker(QObject):
+    """
+    Cancellable worker that builds several profiles (run_batch) in a background thread.
+    Logs are prefixed with the profile name; progress is the batch aggregate.
+    """
+    sig_log = Signal(str)
+    sig_progress = Signal(int)  # 0..100, mean over the jobs
+    sig_batch_status = Signal(object)  # BatchStatus: jobs done, throughput
+    sig_finished = Signal(list)  # list[str] of produced zips, all profiles
+    sig_error = Signal(str)  # at least one profile failed (the others still ran)
+    sig_canceled = Signal()
+
+    def __init__(self, jobs: Sequence[BatchJob], concurrency: int):
+        super().__init__()
+        self._jobs = list(jobs)
+        self._concurrency = concurrency
+        self._cancel_event = threading.Event()
+
+    @Slot()
+    def run(self):
+        try:
+            results = run_batch(
+                self._jobs,
+                concurrency=self._concurrency,
+                budget=BuildBudget(),
+                on_log=self._on_log,
+                on_status=self._on_status,
+                on_check_cancel=self._cancel_event.is_set,
+            )
+        except Exception as e:
+            tb = traceback.format_exc()
+            self.sig_error.emit(f"{e}\n{tb}")
+            return
+
+        if self._cancel_event.is_set():
+            self.sig_canceled.emit()
+            return
+        failed = [r for r in results if r.status != "ok"]
+        if failed:
+            self.sig_error.emit("; ".join(f"{r.name}: {r.message}" for r in failed))
+            return
+        self.sig_finished.emit([str(p) for r in results for p in r.outputs])
+
+    def cancel(self):
+        """Request cooperative cancellation of every running build."""
+        self._cancel_event.set()
+
+    def _on_log(self, name: str, msg: str):
+        self.sig_log.emit(f"[{name}] {msg}")
+
+    def _on_status(self, status: BatchStatus):
+        self.sig_progress.emit(min(100, max(0, int(status.percent))))
+        self.sig_batch_status.emit(status)
+
+
 # -------- Helper to wire worker + thread easily -------- #
 
 class BuildController:
@@ -114,7 +194,7 @@ class BuildController:
         ctrl.wait()
     """
 
-    def __init__(self, worker: BuildWorker, parent_thread_parent: Optional[QObject] = None):
+    def __init__(self, worker: BuildWorker | BatchWorker, parent_thread_parent: Optional[QObject] = None):
         self.thread = QThread(parent_thread_parent)
         self.worker = worker
         self.worker.moveToThread(self.thread)
@@ -128,6 +208,10 @@ class BuildController:
     ):
         self.worker.sig_log.connect(ui_bridge.log, Qt.ConnectionType.QueuedConnection)
         self.worker.sig_progress.connect(ui_bridge.progress, Qt.ConnectionType.QueuedConnection)
+        if isinstance(self.worker, BatchWorker):
+            self.worker.sig_batch_status.connect(ui_bridge.batch_status, Qt.ConnectionType.QueuedConnection)
+        else:
+            self.worker.sig_progress_event.connect(ui_bridge.progress_event, Qt.ConnectionType.QueuedConnection)
         self.worker.sig_finished.connect(ui_bridge.finished, Qt.ConnectionType.QueuedConnection)
         self.worker.sig_error.connect(ui_bridge.error, Qt.ConnectionType.QueuedConnection)
         self.worker.sig_canceled.connect(ui_bridge.canceled, Qt.ConnectionType.QueuedConnection)
@@ -0,0 +1,31 @@
+# conftest.py
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.core import builder, path_helpers
+
+
+@pytest.fixture
+def app_dir(tmp_path, monkeypatch):
+    """Project indexes, reports and progress history of the build go to a temporary app folder."""
+    monkeypatch.setattr(path_helpers, "get_project_root", lambda: tmp_path / "app")
+    # the built-in writer, even where 7-Zip is installed
+    monkeypatch.setattr(builder, "_is_7z_available", lambda _path: None)
+    return tmp_path / "app"
+
+
+@pytest.fixture
+def fake_7z(tmp_path) -> Path:
+    """An executable running tests/fake_7z.py."""
+    if sys.platform == "win32":
+        pytest.skip("the fake 7-Zip is a shell script")
+    path = tmp_path / "bin" / "7z"
+    path.parent.mkdir()
+    path.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{Path(__file__).with_name("fake_7z.py")}" "$@"\n',
+                    encoding="utf-8")
+    path.chmod(0o755)
+    return path
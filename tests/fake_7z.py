@@ -0,0 +1,42 @@
+# fake_7z.py
+"""
+Stand-in for `7z a -tzip [switches] <archive> @<listfile>` (see the fake_7z fixture): writes the listed
+files with zipfile and prints 7-Zip style progress, redrawn with backspaces. FAKE_7Z_DELAY (seconds)
+pauses after each file, FAKE_7Z_EXIT exits with that code after printing an error.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+import zipfile
+
+
+def main(args: list[str]) -> int:
+    assert args[0] == "a", args
+    level, archive, listfile = 5, None, None
+    for arg in args[1:]:
+        if arg.startswith("-mx="):
+            level = int(arg[4:])
+        elif arg.startswith("@"):
+            listfile = arg[1:]
+        elif not arg.startswith("-"):
+            archive = arg
+    if os.environ.get("FAKE_7Z_EXIT"):
+        print("ERROR: fake failure", flush=True)
+        return int(os.environ["FAKE_7Z_EXIT"])
+    with open(listfile, encoding="utf-8") as f:
+        names = [line.rstrip("\n") for line in f if line.strip()]
+    delay = float(os.environ.get("FAKE_7Z_DELAY", "0"))
+    with zipfile.ZipFile(archive, "a", zipfile.ZIP_DEFLATED, compresslevel=min(9, level)) as zf:
+        for i, name in enumerate(names):
+            zf.write(name, name)
+            sys.stdout.write(f"\b\b\b\b{(i + 1) * 100 // len(names):3d}% {i + 1} + {name}")
+            sys.stdout.flush()
+            time.sleep(delay)
+    print("\nEverything is Ok", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
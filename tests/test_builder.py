@@ -0,0 +1,149 @@
+# test_builder.py
+from __future__ import annotations
+
+import json
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from src.core import builder
+from src.core.build_report import load_report
+from src.core.fingerprint import BuildInputs
+from src.core.progress import profile_key
+from src.core.zip_stream import read_archive_layout
+
+
+def _project(root: Path) -> Path:
+    (root / "Content").mkdir(parents=True)
+    (root / "Demo.uproject").write_text(json.dumps({"EngineAssociation": "5.4", "Plugins": []}), encoding="utf-8")
+    (root / "Content" / "A.uasset").write_bytes(b"asset " * 1000)
+    (root / "Content" / "B.uasset").write_bytes(b"b")
+    return root
+
+
+def _base_zip(path: Path) -> Path:
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("Content/A.uasset", b"asset " * 1000, compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr("Content/B.png", b"png", compress_type=zipfile.ZIP_STORED)
+    return path
+
+
+def _build(project: Path, out: Path, **options) -> list[Path]:
+    options = {"on_log": lambda _m: None, **options}
+    return builder.build_zip_set(project, out, "{project}_{ueversion}", [("ue55", "UE 5.5", "")],
+                                 on_progress=lambda _p: None, on_check_cancel=lambda: False, **options)
+
+
+def test_build_into_a_missing_output_folder(tmp_path, app_dir):
+    project = _project(tmp_path / "Demo")
+    out = tmp_path / "not" / "there" / "yet"
+
+    (output,) = _build(project, out)
+
+    assert output.parent == out.resolve()
+    with zipfile.ZipFile(output) as zf:
+        assert sorted(zf.namelist()) == ["Content/A.uasset", "Content/B.uasset", "Demo.uproject"]
+    assert sorted(p.name for p in out.iterdir()) == [builder.BUILD_CACHE_DIRNAME, "Demo_5_5.zip",
+                                                     "Demo_5_5.zip.fingerprint.json"]
+
+
+def test_incremental_base_is_kept_next_to_the_outputs(tmp_path, app_dir):
+    project = _project(tmp_path / "Demo")
+    out = tmp_path / "out"
+
+    _build(project, out)
+
+    base_dir = out / builder.BUILD_CACHE_DIRNAME
+    assert sorted(p.name for p in base_dir.iterdir() if p.suffix == ".zip") == ["__UE_BASE___BASE.zip"]
+
+
+def test_incremental_rebuild_records_the_built_in_writer(tmp_path, app_dir, fake_7z, monkeypatch):
+    monkeypatch.setattr(builder, "_is_7z_available", lambda _path: fake_7z)
+    recorded = []
+    monkeypatch.setattr(builder, "BuildInputs", lambda **kw: recorded.append(kw["compression"]) or BuildInputs(**kw))
+    project = _project(tmp_path / "Demo")
+    out = tmp_path / "out"
+    key = profile_key(project.resolve(), out.resolve())
+
+    _build(project, out)
+    assert load_report(key)["backend"] == "7z"
+    (project / "Content" / "B.uasset").write_bytes(b"changed")
+    (output,) = _build(project, out)
+
+    # a previous base archive is always updated by the built-in writer, whatever 7-Zip is around
+    assert load_report(key)["backend"] == "deflate"
+    assert [inputs[:2] for inputs in recorded] == [("7z", "balanced"), ("deflate", "balanced")]
+    with zipfile.ZipFile(output) as zf:
+        assert zf.read("Content/B.uasset") == b"changed"
+
+
+def test_assembled_version_is_the_base_plus_the_uproject(tmp_path):
+    base = read_archive_layout(_base_zip(tmp_path / "base.zip"))
+    dst = tmp_path / "Demo_5_5.zip"
+    uproject = b'{"EngineAssociation": "5.5"}'
+
+    copied = builder.assemble_version_zip(base, dst, "Demo.uproject", uproject)
+
+    assert copied.bytes_copied == (0 if copied.strategy == "reflink" else base.data_end)
+    with zipfile.ZipFile(dst) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["Content/A.uasset", "Content/B.png", "Demo.uproject"]
+    with open(base.path, "rb") as a, open(dst, "rb") as b:
+        assert a.read(base.data_end) == b.read(base.data_end)
+    builder.verify_version_zip(dst, 3, "Demo.uproject", uproject)
+    with pytest.raises(RuntimeError, match="entries"):
+        builder.verify_version_zip(dst, 4, "Demo.uproject", uproject)
+    with pytest.raises(RuntimeError, match="does not match"):
+        builder.verify_version_zip(dst, 3, "Demo.uproject", b"{}")
+
+
+def test_aborted_assembly_leaves_no_partial_file(tmp_path):
+    base = read_archive_layout(_base_zip(tmp_path / "base.zip"))
+
+    def _cancel(_n):
+        raise RuntimeError("Canceled")
+
+    with pytest.raises(RuntimeError, match="Canceled"):
+        builder.assemble_version_zip(base, tmp_path / "Demo_5_5.zip", "Demo.uproject", b"{}", on_chunk=_cancel)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["base.zip"]
+
+
+def test_uproject_replace_copies_the_other_entries_raw(tmp_path):
+    src = _base_zip(tmp_path / "src.zip")
+    with zipfile.ZipFile(src, "a") as zf:
+        zf.writestr("Demo.uproject", b'{"EngineAssociation": "5.4"}')
+    dst = tmp_path / "Demo_5_5.zip"
+
+    builder.update_zip_uproject_python(src, dst, "Demo.uproject", b'{"EngineAssociation": "5.5"}')
+
+    with zipfile.ZipFile(src) as a, zipfile.ZipFile(dst) as b:
+        assert b.testzip() is None
+        assert b.namelist() == ["Content/A.uasset", "Content/B.png", "Demo.uproject"]
+        assert b.read("Demo.uproject") == b'{"EngineAssociation": "5.5"}'
+        for name in ("Content/A.uasset", "Content/B.png"):
+            old, new = a.getinfo(name), b.getinfo(name)
+            assert (new.compress_type, new.compress_size, new.CRC) == (old.compress_type, old.compress_size, old.CRC)
+    assert not dst.with_name(dst.name + ".part").exists()
+
+
+def test_unchanged_outputs_are_skipped_until_an_input_changes(tmp_path, app_dir):
+    project = _project(tmp_path / "Demo")
+    out = tmp_path / "out"
+    (output,) = _build(project, out)
+    written = output.stat().st_mtime_ns
+
+    logs = []
+    _build(project, out, on_log=logs.append)
+    assert "All outputs are up to date, nothing to build." in logs
+    assert output.stat().st_mtime_ns == written
+
+    (project / "Content" / "B.uasset").write_bytes(b"changed")
+    _build(project, out)
+    with zipfile.ZipFile(output) as zf:
+        assert zf.read("Content/B.uasset") == b"changed"
+
+    for options in (dict(plugins_to_strip={"A"}), dict(force=True)):
+        rebuilt = output.stat().st_mtime_ns
+        _build(project, out, **options)
+        assert output.stat().st_mtime_ns != rebuilt, options
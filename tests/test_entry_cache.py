@@ -0,0 +1,121 @@
+# test_entry_cache.py
+from __future__ import annotations
+
+import os
+
+from src.core.entry_cache import EntryCache
+
+
+def _fill(cache: EntryCache, count: int, size: int) -> None:
+    for i in range(count):
+        cache.put(cache.key(f"{i:064x}", 6), 0, size, os.urandom(size))
+
+
+def test_trim_caps_a_local_cache_even_for_fresh_entries(tmp_path):
+    cache = EntryCache(tmp_path, max_bytes=10_000)
+    _fill(cache, 50, 1024)
+    cache.trim()
+    assert cache.stats.evicted > 0
+    stored = sum(f.stat().st_size for f in tmp_path.rglob("*") if f.is_file())
+    assert stored <= 10_000
+
+
+def test_trim_keeps_recent_entries_of_a_shared_cache(tmp_path):
+    cache = EntryCache(tmp_path, max_bytes=10_000, shared=True)
+    _fill(cache, 50, 1024)
+    cache.trim()
+    assert cache.stats.evicted == 0
+
+
+def test_small_files_bypass_the_cache(tmp_path):
+    from src.core.zip_parallel import SourceFile, write_zip_parallel
+
+    src = tmp_path / "src"
+    src.mkdir()
+    files = []
+    for name, size in (("small.txt", 1000), ("edge.txt", 4096), ("large.txt", 100_000)):
+        path = src / name
+        path.write_bytes(b"abcd" * (size // 4))
+        st = path.stat()
+        files.append(SourceFile(path, name, st.st_size, st.st_mtime_ns, st.st_mode))
+    cache = EntryCache(tmp_path / "cache", min_entry_size=4096)
+    write_zip_parallel(tmp_path / "out.zip", files, workers=2, cache=cache)
+    # below the threshold: neither looked up nor stored
+    assert cache.stats.misses == 2 and cache.stats.stored == 2
+    assert cache.wants(4096) and not cache.wants(4095)
+
+
+def _source(path, name, digest=None):
+    from src.core.zip_parallel import SourceFile
+
+    st = path.stat()
+    return SourceFile(path, name, st.st_size, st.st_mtime_ns, st.st_mode, digest=digest)
+
+
+def test_digest_from_the_index_is_used_without_hashing(tmp_path):
+    import zipfile
+    import zlib
+
+    from src.core.zip_parallel import write_zip_parallel
+    from src.core.zip_stream import deflate_bytes
+
+    path = tmp_path / "big.bin"
+    path.write_bytes(os.urandom(200_000))
+    data = path.read_bytes()
+    cache = EntryCache(tmp_path / "cache")
+    # a digest that hashing the file would never give: only the index can have supplied it
+    cache.put(cache.key("f" * 64, 6), zlib.crc32(data), len(data), deflate_bytes(data, 6))
+    src = _source(path, "big.bin", digest="f" * 64)
+    write_zip_parallel(tmp_path / "out.zip", [src], workers=2, level=6, cache=cache)
+    assert cache.stats.hits == 1
+    with zipfile.ZipFile(tmp_path / "out.zip") as zf:
+        assert zf.read("big.bin") == data
+
+
+def test_computed_digests_are_handed_back(tmp_path):
+    import hashlib
+
+    from src.core.zip_parallel import write_zip_parallel
+
+    small, large = tmp_path / "small.bin", tmp_path / "large.bin"
+    small.write_bytes(b"s" * 100_000)
+    large.write_bytes(os.urandom(300_000))
+    files = [_source(small, "small.bin"), _source(large, "large.bin")]
+    write_zip_parallel(tmp_path / "out.zip", files, workers=2, cache=EntryCache(tmp_path / "cache"),
+                       split_threshold=200_000, block_size=64 * 1024)
+    assert [f.digest for f in files] == [hashlib.sha256(p.read_bytes()).hexdigest() for p in (small, large)]
+
+
+def test_damaged_payload_is_caught_while_copying_and_recompressed(tmp_path):
+    import zipfile
+
+    from src.core.zip_parallel import write_zip_parallel
+
+    path = tmp_path / "large.bin"
+    path.write_bytes(os.urandom(300_000))
+    cache = EntryCache(tmp_path / "cache")
+    options = dict(workers=2, cache=cache, split_threshold=200_000, block_size=64 * 1024, mmap_threshold=0)
+    write_zip_parallel(tmp_path / "first.zip", [_source(path, "large.bin")], **options)
+    (entry,) = [f for f in (tmp_path / "cache").rglob("*-deflate*") if f.is_file()]
+    damaged = bytearray(entry.read_bytes())
+    damaged[-10] ^= 0xFF  # same size: only the payload crc tells
+    entry.write_bytes(bytes(damaged))
+
+    write_zip_parallel(tmp_path / "second.zip", [_source(path, "large.bin")], **options)
+    with zipfile.ZipFile(tmp_path / "second.zip") as zf:
+        assert zf.testzip() is None
+        assert zf.read("large.bin") == path.read_bytes()
+    assert (cache.stats.hits, cache.stats.misses) == (0, 2)
+    assert entry.read_bytes() != bytes(damaged)  # stored again from the fresh compression
+
+
+def test_damaged_small_payload_is_a_miss(tmp_path):
+    cache = EntryCache(tmp_path / "cache")
+    key = cache.key("a" * 64, 6)
+    cache.put(key, 0, 100, b"x" * 50)
+    path = cache.path_for(key)
+    damaged = bytearray(path.read_bytes())
+    damaged[-1] ^= 0xFF
+    path.write_bytes(bytes(damaged))
+    assert cache.get(key, 100) is None
+    assert not path.exists() and (cache.stats.hits, cache.stats.misses) == (0, 1)
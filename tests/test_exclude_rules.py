@@ -0,0 +1,16 @@
+# test_exclude_rules.py
+from __future__ import annotations
+
+from src.core.exclude_rules import ExcludeRules, merge_rules
+
+
+def test_merge_rules_keeps_caller_order():
+    rules = merge_rules(("Saved/", "*.pdb"), ["Content/Movies/*", "!Content/Movies/intro.mp4"])
+    assert rules == ("Saved/", "*.pdb", "Content/Movies/*", "!Content/Movies/intro.mp4")
+    compiled = ExcludeRules(list(rules))
+    assert not compiled.excludes_path("Content/Movies/intro.mp4")
+    assert compiled.excludes_path("Content/Movies/outro.mp4")
+
+
+def test_merge_rules_drops_earlier_duplicates_only():
+    assert merge_rules(("Saved/", "Binaries"), ["!Saved/Keep", "Saved/"]) == ("Binaries", "!Saved/Keep", "Saved/")
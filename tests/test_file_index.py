@@ -0,0 +1,58 @@
+# test_file_index.py
+from __future__ import annotations
+
+import os
+
+from src.core.file_index import ProjectIndex
+
+
+def _project(root):
+    (root / "Content").mkdir(parents=True)
+    (root / "Demo.uproject").write_text("{}", encoding="utf-8")
+    (root / "Content" / "A.uasset").write_bytes(b"a" * 10)
+    return root
+
+
+def test_uproject_and_root_entries_come_from_the_index(tmp_path):
+    root = _project(tmp_path / "Demo")
+    with ProjectIndex(root, db_path=tmp_path / "index.sqlite") as index:
+        assert index.uproject_path() == root.resolve() / "Demo.uproject"
+        assert sorted(index.root_entries()) == [("Content", True), ("Demo.uproject", False)]
+        index.refresh()
+        assert [f.relpath for f in index.files()] == ["Content/A.uasset", "Demo.uproject"]
+
+
+def test_file_hash_is_cached_until_the_file_changes(tmp_path):
+    root = _project(tmp_path / "Demo")
+    with ProjectIndex(root, db_path=tmp_path / "index.sqlite") as index:
+        index.refresh()
+        first = index.file_hash("Content/A.uasset")
+        assert [f.hash for f in index.files() if f.relpath == "Content/A.uasset"] == [first]
+        (root / "Content" / "A.uasset").write_bytes(b"b" * 11)
+        index.refresh()
+        assert [f.hash for f in index.files() if f.relpath == "Content/A.uasset"] == [None]
+        assert index.file_hash("Content/A.uasset") != first
+
+
+def test_directory_changed_within_the_mtime_tick_is_listed_again(tmp_path):
+    root = _project(tmp_path / "Demo")
+    content = root / "Content"
+    with ProjectIndex(root, db_path=tmp_path / "index.sqlite") as index:
+        index.refresh()
+        # a file added in the same mtime tick leaves the directory's mtime as it was when it was listed
+        mtime = content.stat().st_mtime_ns
+        (content / "B.uasset").write_bytes(b"b")
+        os.utime(content, ns=(mtime, mtime))
+        index.refresh()
+        assert "Content/B.uasset" in [f.relpath for f in index.files()]
+
+
+def test_old_directories_are_not_listed_again(tmp_path):
+    root = _project(tmp_path / "Demo")
+    old = 1_500_000_000 * 10 ** 9
+    for folder in (root, root / "Content"):
+        os.utime(folder, ns=(old, old))
+    with ProjectIndex(root, db_path=tmp_path / "index.sqlite") as index:
+        assert index.refresh().dirs_listed == 2
+        stats = index.refresh()
+        assert (stats.dirs_listed, stats.dirs_reused) == (0, 2)
@@ -0,0 +1,54 @@
+# test_fingerprint.py
+from __future__ import annotations
+
+import os
+
+from src.core.fingerprint import (BuildInputs, discard_fingerprint, fingerprint_path, is_up_to_date,
+                                  save_fingerprint, tree_digest)
+
+
+def _inputs(**changes) -> BuildInputs:
+    values = dict(tree=tree_digest([("Content/A.uasset", 10, 1)]), rules=("Saved/",), plugins_to_strip=("A",),
+                  uproject_relpath="Demo.uproject", compression=("deflate", "balanced", "6"))
+    return BuildInputs(**{**values, **changes})
+
+
+def test_tree_digest_ignores_the_order_but_not_the_stat_data():
+    files = [("a", 1, 2), ("b", 3, 4)]
+    assert tree_digest(files) == tree_digest(reversed(files))
+    assert tree_digest(files) != tree_digest([("a", 1, 2), ("b", 3, 5)])
+
+
+def test_every_input_changes_the_fingerprint():
+    base = _inputs().output_fingerprint("5.5")
+    assert _inputs().output_fingerprint("5.5") == base
+    assert _inputs().output_fingerprint("5.4") != base
+    for change in (dict(tree=tree_digest([])), dict(rules=("Saved/", "*.log")), dict(plugins_to_strip=()),
+                   dict(uproject_relpath="Other.uproject"), dict(compression=("7z", "balanced", "-mx=5"))):
+        assert _inputs(**change).output_fingerprint("5.5") != base, change
+
+
+def test_sidecar_matches_only_the_untouched_output(tmp_path):
+    output = tmp_path / "Demo_5_5.zip"
+    output.write_bytes(b"zip")
+    fingerprint = _inputs().output_fingerprint("5.5")
+    assert not is_up_to_date(output, fingerprint)
+
+    save_fingerprint(output, fingerprint)
+    assert is_up_to_date(output, fingerprint)
+    assert not is_up_to_date(output, _inputs().output_fingerprint("5.4"))
+
+    st = output.stat()
+    os.utime(output, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert not is_up_to_date(output, fingerprint)
+
+    save_fingerprint(output, fingerprint)
+    discard_fingerprint(output)
+    assert not fingerprint_path(output).exists() and not is_up_to_date(output, fingerprint)
+
+
+def test_unreadable_sidecar_is_not_up_to_date(tmp_path):
+    output = tmp_path / "Demo_5_5.zip"
+    output.write_bytes(b"zip")
+    fingerprint_path(output).write_text("{not json", encoding="utf-8")
+    assert not is_up_to_date(output, _inputs().output_fingerprint("5.5"))
@@ -0,0 +1,40 @@
+# test_progress.py
+from __future__ import annotations
+
+import threading
+
+from src.core.progress import BuildProgress
+
+
+def test_percent_never_goes_back():
+    events = []
+    progress = BuildProgress(on_event=events.append)
+    progress.start("compress", 100)
+    progress.advance("compress", 90)
+    before = events[-1].percent
+    # the base turns out much larger than guessed: the rest of the build now looks far longer
+    progress.start("assemble", 10 ** 12)
+    assert events[-1].percent == before and events[-1].stage == "assemble"
+    progress.finish("assemble")
+    progress.finish("verify")
+    assert events[-1].percent > before
+
+
+def test_events_from_several_threads_stay_in_order():
+    events = []
+    progress = BuildProgress(on_event=events.append)
+    progress.start("compress", 8 * 2000)
+
+    def _work():
+        for _ in range(2000):
+            progress.advance("compress", 1)
+
+    threads = [threading.Thread(target=_work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    progress.finish("compress")
+    percents = [e.percent for e in events]
+    assert percents == sorted(percents)
+    assert events[-1].stage_done == 8 * 2000
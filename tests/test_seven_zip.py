@@ -0,0 +1,67 @@
+# test_seven_zip.py
+from __future__ import annotations
+
+import subprocess
+import time
+import zipfile
+
+import pytest
+
+from src.core.seven_zip import parse_progress, run_7z, write_listfile
+
+
+@pytest.mark.parametrize("line, expected", [
+    (" 42% 118 + Content/Maps/m1.uasset", (42, "Content/Maps/m1.uasset")),
+    ("  7% U Content/A.uasset", (7, "Content/A.uasset")),
+    ("100%", (100, "")),
+    (" 12% 3", (12, "")),
+    ("Everything is Ok", None),
+    ("Scanning the drive:", None),
+])
+def test_parse_progress(line, expected):
+    assert parse_progress(line) == expected
+
+
+def _project(root):
+    (root / "Content").mkdir(parents=True)
+    names = [f"Content/A{i}.uasset" for i in range(4)] + ["Content/é.uasset"]
+    for name in names:
+        (root / name).write_bytes(name.encode() * 100)
+    write_listfile(root / "files.txt", names)
+    return names
+
+
+def test_progress_is_reported_per_file(tmp_path, fake_7z):
+    names = _project(tmp_path)
+    seen = []
+
+    run_7z([str(fake_7z), "a", "-tzip", "-mx=5", str(tmp_path / "out.zip"), "@files.txt"], cwd=tmp_path,
+           on_progress=lambda percent, current: seen.append((percent, current)))
+
+    assert seen == [((i + 1) * 100 // len(names), name) for i, name in enumerate(names)]
+    with zipfile.ZipFile(tmp_path / "out.zip") as zf:
+        assert zf.namelist() == names
+
+
+def test_cancel_stops_7z_promptly(tmp_path, fake_7z, monkeypatch):
+    _project(tmp_path)
+    monkeypatch.setenv("FAKE_7Z_DELAY", "30")
+    start = time.monotonic()
+
+    with pytest.raises(RuntimeError, match="Canceled"):
+        run_7z([str(fake_7z), "a", "-tzip", str(tmp_path / "out.zip"), "@files.txt"], cwd=tmp_path,
+               on_check_cancel=lambda: time.monotonic() - start > 0.5)
+
+    # the first file takes 30 s: 7-Zip was stopped, not waited for
+    assert time.monotonic() - start < 10
+
+
+def test_failure_raises_with_the_last_output(tmp_path, fake_7z, monkeypatch):
+    _project(tmp_path)
+    monkeypatch.setenv("FAKE_7Z_EXIT", "2")
+
+    with pytest.raises(subprocess.CalledProcessError) as failed:
+        run_7z([str(fake_7z), "a", "-tzip", str(tmp_path / "out.zip"), "@files.txt"], cwd=tmp_path)
+
+    assert failed.value.returncode == 2
+    assert "fake failure" in failed.value.output
@@ -0,0 +1,65 @@
+# test_zip64_large.py
+"""
+Opt-in: archive a project of more than 70k files and more than 5 GB (sparse files) with the built-in
+writer, so entries land past the 4 GiB offset. Needs ~6 GB of free disk for the archive.
+
+    UE_FAB_ZIP64_TEST=1 python -m pytest tests/test_zip64_large.py
+"""
+from __future__ import annotations
+
+import json
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from src.core import builder
+
+pytestmark = pytest.mark.skipif(not os.environ.get("UE_FAB_ZIP64_TEST"),
+                                reason="set UE_FAB_ZIP64_TEST=1 to run the multi-GB ZIP64 build")
+
+_ZIP64_LIMIT = 0xFFFFFFFF
+_SMALL_FILES = 70_100
+_MOVIE_SIZE = 4_600_000_000  # stored (.bk2): the archive itself grows past 4 GiB
+_MAP_SIZE = 1_200_000_000  # deflated zeros
+
+
+def _make_project(root: Path) -> None:
+    (root / "Content" / "Movies").mkdir(parents=True)
+    (root / "Content" / "Maps").mkdir(parents=True)
+    (root / "Big.uproject").write_text(json.dumps({"EngineAssociation": "5.4", "Plugins": []}), encoding="utf-8")
+    for path, size in ((root / "Content" / "Movies" / "intro.bk2", _MOVIE_SIZE),
+                       (root / "Content" / "Maps" / "World.umap", _MAP_SIZE)):
+        with open(path, "wb") as f:
+            f.truncate(size)
+    # sorted after the big files, so they are written past the 4 GiB offset
+    for i in range(_SMALL_FILES):
+        folder = root / "Content" / "ZLate" / f"D{i // 1000:03d}"
+        if i % 1000 == 0:
+            folder.mkdir(parents=True)
+        (folder / f"A_{i:05d}.uasset").write_bytes(f"asset {i}\n".encode() * (1 + i % 7))
+
+
+def test_build_past_4_gib(tmp_path, monkeypatch):
+    work = Path(os.environ.get("UE_FAB_ZIP64_TEST_DIR") or tmp_path)
+    project, out = work / "Big", work / "out"
+    _make_project(project)
+    out.mkdir()
+    # the built-in writer (with data descriptors) is what this covers, even where 7-Zip is installed
+    monkeypatch.setattr(builder, "_is_7z_available", lambda _path: None)
+
+    outputs = builder.build_zip_set(project, out, "{project}_{ueversion}", [("ue55", "UE 5.5", "")],
+                                    on_log=lambda _m: None, on_progress=lambda _p: None,
+                                    on_check_cancel=lambda: False, incremental=False)
+
+    with zipfile.ZipFile(outputs[0]) as zf:
+        assert zf.testzip() is None
+        infos = zf.infolist()
+        assert len(infos) == _SMALL_FILES + 3
+        late = [i for i in infos if i.header_offset >= _ZIP64_LIMIT and i.filename != "Big.uproject"]
+        assert late, "no entry past the 4 GiB offset"
+        for info in late[-3:]:
+            assert zf.read(info) == (project / info.filename).read_bytes()
+        assert json.loads(zf.read("Big.uproject"))["EngineAssociation"] == "5.5"
+    assert outputs[0].stat().st_size > _ZIP64_LIMIT
@@ -0,0 +1,80 @@
+# test_zip_merge.py
+from __future__ import annotations
+
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from src.core.zip_merge import merge_archives, shard_files
+from src.core.zip_parallel import SourceFile
+from src.core.zip_stream import read_archive_layout
+
+
+def _file(arcname: str, size: int) -> SourceFile:
+    return SourceFile(Path(arcname), arcname, size, 0, 0o644)
+
+
+def test_shards_balance_sizes_and_keep_the_order():
+    files = [_file("A/a", 50), _file("A/b", 10), _file("B/c", 40), _file("B/d", 20), _file("root.txt", 30)]
+
+    shards = shard_files(files, 2)
+
+    assert sorted(sum(f.size for f in shard) for shard in shards) == [70, 80]
+    assert sorted(f.arcname for shard in shards for f in shard) == [f.arcname for f in files]
+    for shard in shards:
+        assert shard == sorted(shard, key=files.index)
+
+
+def test_folder_shards_keep_each_top_level_folder_together():
+    files = [_file("A/a", 50), _file("A/b", 10), _file("B/c", 40), _file("B/d", 20), _file("root.txt", 30),
+             _file("Demo.uproject", 1)]
+
+    shards = shard_files(files, 3, mode="folder")
+
+    assert sorted([f.arcname for f in shard] for shard in shards) == [
+        ["A/a", "A/b"], ["B/c", "B/d"], ["root.txt", "Demo.uproject"]]
+
+
+def test_no_empty_shards_and_unknown_mode():
+    assert shard_files([_file("a", 1)], 4) == [[_file("a", 1)]]
+    with pytest.raises(ValueError, match="shard mode"):
+        shard_files([_file("a", 1)], 2, mode="extension")
+
+
+def _part(path: Path, names: list[str]) -> Path:
+    with zipfile.ZipFile(path, "w") as zf:
+        for name in names:
+            zf.writestr(name, name.encode() * 2000, compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr(f"{path.stem}.bin", os.urandom(3000), compress_type=zipfile.ZIP_STORED)
+    return path
+
+
+def test_merged_archive_holds_every_entry_unchanged(tmp_path):
+    parts = [_part(tmp_path / "p0.zip", ["A/a", "A/b"]), _part(tmp_path / "p1.zip", ["B/c"])]
+    copied = []
+
+    entries = merge_archives(parts, tmp_path / "base.zip", on_chunk=copied.append)
+
+    assert [e.name for e in entries] == ["A/a", "A/b", "p0.bin", "B/c", "p1.bin"]
+    with zipfile.ZipFile(tmp_path / "base.zip") as merged:
+        assert merged.testzip() is None
+        for part in parts:
+            with zipfile.ZipFile(part) as zf:
+                for info in zf.infolist():
+                    new = merged.getinfo(info.filename)
+                    assert (new.compress_size, new.CRC) == (info.compress_size, info.CRC)
+                    assert merged.read(info.filename) == zf.read(info.filename)
+    assert sum(copied) == sum(read_archive_layout(p).data_end for p in parts)
+
+
+def test_aborted_merge_leaves_no_partial_file(tmp_path):
+    parts = [_part(tmp_path / "p0.zip", ["A/a"]), _part(tmp_path / "p1.zip", ["B/c"])]
+
+    def _cancel(_n):
+        raise RuntimeError("Canceled")
+
+    with pytest.raises(RuntimeError, match="Canceled"):
+        merge_archives(parts, tmp_path / "base.zip", on_chunk=_cancel)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["p0.zip", "p1.zip"]
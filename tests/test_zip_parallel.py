@@ -0,0 +1,59 @@
+# test_zip_parallel.py
+from __future__ import annotations
+
+import io
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.core.zip_parallel import _deflate_blocks, _read_blocks, _slice_blocks, crc32_combine
+from src.core.zip_stream import ZipEntry
+
+
+@pytest.mark.parametrize("split", [0, 1, 7, 4096, 100_000])
+def test_crc32_combine(split):
+    data = os.urandom(100_000)
+    a, b = data[:split], data[split:]
+    assert crc32_combine(zlib.crc32(a), zlib.crc32(b), len(b)) == zlib.crc32(data)
+
+
+def _deflated(blocks, level=6, max_pending=3):
+    entry = ZipEntry("big.bin", 0, 0, 0)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        payload = b"".join(_deflate_blocks(blocks, entry, pool, level, max_pending, lambda: None))
+    return entry, payload
+
+
+# random and repetitive data: the blocks reference the dictionary of the previous one
+_DATA = os.urandom(50_000) + b"0123456789abcdef" * 20_000 + os.urandom(777)
+
+
+@pytest.mark.parametrize("block_size", [64 * 1024, 100_000, len(_DATA) + 1])
+def test_deflate_blocks_make_one_stream(block_size):
+    for blocks in (_read_blocks(io.BytesIO(_DATA), block_size), _slice_blocks(memoryview(_DATA), block_size)):
+        entry, payload = _deflated(blocks)
+        assert zlib.decompress(payload, -15) == _DATA
+        assert (entry.crc, entry.file_size) == (zlib.crc32(_DATA), len(_DATA))
+
+
+def test_deflate_blocks_of_an_empty_file():
+    entry, payload = _deflated(_read_blocks(io.BytesIO(b""), 64 * 1024))
+    assert zlib.decompress(payload, -15) == b""
+    assert (entry.crc, entry.file_size) == (0, 0)
+
+
+def test_deflate_blocks_stop_on_cancel():
+    entry = ZipEntry("big.bin", 0, 0, 0)
+    calls = []
+
+    def _check_cancel():
+        calls.append(1)
+        if len(calls) > 2:
+            raise RuntimeError("Canceled")
+
+    with ThreadPoolExecutor(max_workers=2) as pool, pytest.raises(RuntimeError, match="Canceled"):
+        for _payload in _deflate_blocks(_slice_blocks(memoryview(_DATA), 4096), entry, pool, 6, 2, _check_cancel):
+            pass
+    assert entry.file_size < len(_DATA)
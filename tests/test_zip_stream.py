@@ -0,0 +1,27 @@
+# test_zip_stream.py
+from __future__ import annotations
+
+import io
+import zipfile
+
+import pytest
+
+from src.core.zip_stream import ZipStreamWriter
+
+
+def test_write_bytes_deflated_and_stored():
+    buf = io.BytesIO()
+    writer = ZipStreamWriter(buf)
+    writer.write_bytes("a.txt", b"text " * 100)
+    writer.write_bytes("b.bin", b"raw", compress_type=zipfile.ZIP_STORED)
+    writer.close()
+    with zipfile.ZipFile(buf) as zf:
+        assert zf.testzip() is None
+        assert [i.compress_type for i in zf.infolist()] == [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED]
+
+
+def test_write_bytes_rejects_an_unknown_compression_type():
+    writer = ZipStreamWriter(io.BytesIO())
+    with pytest.raises(ValueError, match="Unsupported compression type"):
+        writer.write_bytes("a.txt", b"text", compress_type=zipfile.ZIP_LZMA)
+    assert writer.tell() == 0 and not writer.entries